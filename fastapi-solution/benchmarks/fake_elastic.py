@@ -0,0 +1,201 @@
+"""
+Подмена AsyncElasticsearch в памяти процесса для нагрузочных тестов.
+Поддерживает только те запросы, которые строят сервисы: get, mget и search
+с match, terms, nested, constant_score, сортировкой, search_after,
+completion-подсказками и фасетными агрегациями.
+"""
+
+import asyncio
+from typing import Any
+
+from elasticsearch import NotFoundError
+
+
+def _values(doc: Any, path: list[str]) -> list:
+    if not path:
+        return doc if isinstance(doc, list) else [doc]
+    if isinstance(doc, list):
+        return [value for item in doc for value in _values(item, path)]
+    if not isinstance(doc, dict) or path[0] not in doc:
+        return []
+    return _values(doc[path[0]], path[1:])
+
+
+def _field_path(field: str) -> list[str]:
+    return field.removesuffix(".raw").split(".")
+
+
+def _matches(doc: dict, query: dict) -> bool:
+    kind, params = next(iter(query.items()))
+    if kind == "match_all":
+        return True
+    if kind == "constant_score":
+        return _matches(doc, params["filter"])
+    if kind == "bool":
+        clauses = list()
+        for occur in ("must", "filter"):
+            clause = params.get(occur, [])
+            clauses.extend(clause if isinstance(clause, list) else [clause])
+        return all(_matches(doc, clause) for clause in clauses)
+    if kind == "nested":
+        return _matches(doc, params["query"])
+    if kind == "terms":
+        field, values = next(iter(params.items()))
+        return bool(set(map(str, _values(doc, _field_path(field)))) & set(map(str, values)))
+    if kind == "match":
+        field, match = next(iter(params.items()))
+        words = set(str(match["query"]).lower().split())
+        text = " ".join(map(str, _values(doc, _field_path(field)))).lower().split()
+        return bool(words & set(text))
+    raise ValueError(f"Неподдерживаемый запрос: {kind}")
+
+
+def _is_after(values: list, search_after: list, orders: list[str]) -> bool:
+    for value, after, order in zip(values, search_after, orders):
+        if value == after:
+            continue
+        return value > after if order == "asc" else value < after
+    return False
+
+
+class _FakeTransport:
+    async def perform_request(self, method: str, url: str, params: dict | None = None) -> dict:
+        return {"id": "fake-pit"}
+
+
+class FakeElasticsearch:
+    """
+    :param latency: задержка каждого ответа в секундах, имитирует сеть и работу кластера
+    """
+
+    def __init__(self, corpus: dict[str, list[dict]], latency: float = 0.0):
+        self.indices = {index: {doc["id"]: doc for doc in docs} for index, docs in corpus.items()}
+        self.latency = latency
+        self.transport = _FakeTransport()
+        self.requests = 0
+
+    async def _respond(self) -> None:
+        self.requests += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+    async def get(self, index: str, id: str, **params) -> dict:
+        await self._respond()
+        doc = self.indices.get(index, {}).get(id)
+        if doc is None:
+            raise NotFoundError(404, "not_found", {"_index": index, "_id": id, "found": False})
+        return {"_index": index, "_id": id, "found": True, "_source": doc}
+
+    async def mget(self, body: dict, index: str, **params) -> dict:
+        await self._respond()
+        docs = self.indices.get(index, {})
+        return {
+            "docs": [
+                {"_id": obj_id, "found": obj_id in docs, "_source": docs.get(obj_id)}
+                for obj_id in body["ids"]
+            ]
+        }
+
+    async def search(
+        self,
+        index: str | None = None,
+        body: dict | None = None,
+        size: int = 10,
+        from_: int = 0,
+        sort: str | None = None,
+        _source_includes: tuple[str, ...] | None = None,
+        **params,
+    ) -> dict:
+        await self._respond()
+        body = body or dict()
+        docs = list(self.indices.get(index or "", {}).values())
+        source_fields = body.get("_source", _source_includes)
+
+        if "suggest" in body:
+            return {"took": 1, "suggest": self._suggest(docs, body["suggest"], source_fields)}
+
+        query = body.get("query", {"match_all": {}})
+        found = [doc for doc in docs if _matches(doc, query)]
+
+        clauses = [clause.split(":") for clause in sort.split(",")] if sort else []
+        for field, order in reversed(clauses):
+            found.sort(key=lambda doc: _values(doc, _field_path(field))[0], reverse=order == "desc")
+
+        def sort_values(doc: dict) -> list:
+            return [_values(doc, _field_path(field))[0] for field, _ in clauses]
+
+        if "search_after" in body:
+            orders = [order for _, order in clauses]
+            after = body["search_after"]
+            found = [doc for doc in found if _is_after(sort_values(doc), after, orders)]
+            from_ = 0
+
+        hits = [
+            {
+                "_id": doc["id"],
+                "_source": {f: doc[f] for f in source_fields if f in doc} if source_fields else doc,
+                "sort": sort_values(doc),
+            }
+            for doc in found[from_ : from_ + size]
+        ]
+        response = {"took": 1, "hits": {"total": {"value": len(found)}, "hits": hits}}
+        if "aggs" in body:
+            response["aggregations"] = self._aggregate(found, body["aggs"])
+        return response
+
+    @staticmethod
+    def _suggest(docs: list[dict], suggest: dict, source_fields: list[str] | None) -> dict:
+        result = dict()
+        for name, params in suggest.items():
+            prefix = params["prefix"].lower()
+            field = params["completion"]["field"].removesuffix("_suggest")
+            options = [
+                {"_id": doc["id"], "_source": {f: doc[f] for f in source_fields or doc}}
+                for doc in docs
+                if any(
+                    " ".join(words).lower().startswith(prefix)
+                    for words in (
+                        str(doc.get(field, "")).split()[i:]
+                        for i in range(len(str(doc.get(field, "")).split()))
+                    )
+                )
+            ][: params["completion"]["size"]]
+            result[name] = [{"text": prefix, "options": options}]
+        return result
+
+    @staticmethod
+    def _aggregate(docs: list[dict], aggs: dict) -> dict:
+        result = dict()
+        for name, agg in aggs.items():
+            if "nested" in agg:
+                path = agg["nested"]["path"]
+                counts, samples = dict(), dict()
+                for doc in docs:
+                    for item in doc.get(path, []):
+                        counts[item["id"]] = counts.get(item["id"], 0) + 1
+                        samples.setdefault(item["id"], item)
+                size = agg["aggs"]["values"]["terms"]["size"]
+                top = sorted(counts.items(), key=lambda item: -item[1])[:size]
+                buckets = [
+                    {
+                        "key": key,
+                        "doc_count": count,
+                        "sample": {"hits": {"hits": [{"_source": samples[key]}]}},
+                    }
+                    for key, count in top
+                ]
+                result[name] = {"values": {"buckets": buckets}}
+            elif "histogram" in agg:
+                field, interval = agg["histogram"]["field"], agg["histogram"]["interval"]
+                counts = dict()
+                for doc in docs:
+                    if doc.get(field) is not None:
+                        key = doc[field] // interval * interval
+                        counts[key] = counts.get(key, 0) + 1
+                result[name] = {
+                    "buckets": [{"key": key, "doc_count": counts[key]} for key in sorted(counts)]
+                }
+        return result
+
+    async def close(self) -> None:
+        pass
@@ -0,0 +1,78 @@
+import random
+import uuid
+
+_WORDS = (
+    "star",
+    "wars",
+    "empire",
+    "return",
+    "hope",
+    "night",
+    "day",
+    "lost",
+    "city",
+    "dark",
+    "light",
+    "river",
+    "space",
+    "time",
+    "war",
+    "love",
+    "king",
+    "ring",
+    "shadow",
+    "storm",
+)
+_ROLES = {"actors": "actor", "writers": "writer", "directors": "director"}
+
+
+def _words(rnd: random.Random, count: int) -> str:
+    return " ".join(rnd.choice(_WORDS).capitalize() for _ in range(count))
+
+
+def _uuid(rnd: random.Random) -> str:
+    return str(uuid.UUID(int=rnd.getrandbits(128)))
+
+
+def _film_doc(rnd: random.Random, persons: list[dict], genres: list[dict]) -> dict:
+    doc = {
+        "id": _uuid(rnd),
+        "title": _words(rnd, rnd.randint(1, 4)),
+        "imdb_rating": round(rnd.uniform(1, 10), 1),
+        "description": _words(rnd, rnd.randint(20, 60)),
+        "genres": [
+            {"id": g["id"], "name": g["name"]} for g in rnd.sample(genres, rnd.randint(1, 3))
+        ],
+    }
+    for field, size in (("actors", rnd.randint(5, 30)), ("writers", 2), ("directors", 1)):
+        cast = rnd.sample(persons, size)
+        doc[field] = [{"id": p["id"], "name": p["full_name"]} for p in cast]
+        doc[f"{field}_names"] = [p["full_name"] for p in cast]
+    return doc
+
+
+def make_corpus(films: int = 1000, persons: int = 500, genres: int = 26, seed: int = 0) -> dict:
+    """
+    Генерирует согласованные документы индексов movies, persons и genres
+    в том виде, в каком их загружает ETL.
+    """
+    rnd = random.Random(seed)
+    genre_docs = [
+        {"id": _uuid(rnd), "name": _words(rnd, 1), "description": _words(rnd, 12)}
+        for _ in range(genres)
+    ]
+    person_docs = [
+        {"id": _uuid(rnd), "full_name": _words(rnd, 2), "films": []} for _ in range(persons)
+    ]
+    by_id = {p["id"]: p for p in person_docs}
+
+    film_docs = [_film_doc(rnd, person_docs, genre_docs) for _ in range(films)]
+    for film in film_docs:
+        roles = dict()
+        for field, role in _ROLES.items():
+            for person in film[field]:
+                roles.setdefault(person["id"], []).append(role)
+        for person_id, person_roles in roles.items():
+            by_id[person_id]["films"].append({"id": film["id"], "roles": person_roles})
+
+    return {"movies": film_docs, "persons": person_docs, "genres": genre_docs}
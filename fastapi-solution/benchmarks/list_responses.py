@@ -0,0 +1,61 @@
+"""
+CPU на формирование страницы списка фильмов из 50 документов elastic:
+прежний путь (FilmDetail -> FilmBrief -> response_model) против текущего
+(FilmBrief.construct по урезанному _source и один рендер в json).
+
+Запуск из каталога fastapi-solution:
+    python -m benchmarks.list_responses
+"""
+
+from datetime import datetime
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+from pydantic import parse_obj_as
+
+from benchmarks.fixtures import make_corpus
+from benchmarks.timing import measure, print_table
+from models.film import FilmBrief, FilmDetail
+from services.base import Service
+from services.query_plan import get_source_includes
+from utils.cache_serializer import CacheData, OrjsonCacheSerializer
+
+PAGE_SIZE = 50
+
+
+def main():
+    corpus = make_corpus(films=PAGE_SIZE)["movies"]
+    full_docs = {"hits": {"hits": [{"_source": doc} for doc in corpus]}}
+    brief_fields = get_source_includes(FilmBrief)
+    brief_docs = {
+        "hits": {"hits": [{"_source": {f: doc[f] for f in brief_fields}} for doc in corpus]}
+    }
+    serializer = OrjsonCacheSerializer(list[FilmBrief])
+
+    def before():
+        films = [FilmDetail(**doc["_source"]) for doc in full_docs["hits"]["hits"]]
+        briefs = [FilmBrief(**film.dict()) for film in films]
+        return orjson.dumps(jsonable_encoder(parse_obj_as(list[FilmBrief], briefs)))
+
+    def after_miss():
+        return serializer.render(Service._build_trusted(FilmBrief, brief_docs))
+
+    stored = serializer.serialize(
+        CacheData(saved_datetime=datetime.now(), data=Service._build_trusted(FilmBrief, brief_docs))
+    )
+
+    def after_hit():
+        return serializer.deserialize_rendered(stored).data
+
+    print_table(
+        f"Страница из {PAGE_SIZE} фильмов, время на запрос",
+        [
+            ("before", measure(before, number=200)),
+            ("after, cache miss", measure(after_miss, number=200)),
+            ("after, cache hit", measure(after_hit, number=200)),
+        ],
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,296 @@
+"""
+Нагрузочный тест приложения целиком: запросы проходят через все middleware,
+роутеры, кеш и сервисы, а вместо внешних сервисов используются
+FakeElasticsearch со сгенерированным корпусом и InMemoryRedis.
+
+Воркеры с фиксированной конкурентностью отправляют смесь запросов
+к карточкам, спискам, поиску, фильтрам и подсказкам; популярность id
+неравномерна, как у реального трафика. По каждому эндпоинту выводятся
+RPS, p50/p95/p99 и доля попаданий в кеш, а с --output — json для сравнения
+между релизами.
+
+Запуск из каталога fastapi-solution:
+    python -m benchmarks.load_test --concurrency 32 --duration 10 --output load.json
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+from dataclasses import asdict, dataclass, field
+from time import perf_counter
+from typing import Callable
+from urllib.parse import urlencode
+
+import orjson
+
+from benchmarks.fake_elastic import FakeElasticsearch
+from benchmarks.fixtures import make_corpus
+from core.config import settings
+from utils.caching import get_cache_stats
+
+_WORDS = ("star", "wars", "night", "city", "dark", "light", "space", "time", "love", "king")
+_SORTS = (None, "-imdb_rating", "imdb_rating", "title")
+
+
+@dataclass
+class Scenario:
+    name: str
+    weight: int
+    make_path: Callable[[random.Random, dict], str]
+    cached_methods: tuple[str, ...]
+
+
+@dataclass
+class EndpointResult:
+    latencies: list[float] = field(default_factory=list)
+    errors: int = 0
+
+
+def _popular(rnd: random.Random, docs: list[dict]) -> dict:
+    """
+    Около половины запросов приходится на первые 10% документов.
+    """
+    return docs[int(len(docs) * rnd.random() ** 3)]
+
+
+def _with_query(path: str, params: dict) -> str:
+    params = {name: value for name, value in params.items() if value is not None}
+    return f"{path}?{urlencode(params, doseq=True)}" if params else path
+
+
+def _film_list(rnd: random.Random, corpus: dict) -> str:
+    params = {"sort": rnd.choice(_SORTS), "page_number": rnd.randint(1, 5), "page_size": 20}
+    if rnd.random() < 0.4:
+        params["genres_id"] = _popular(rnd, corpus["genres"])["id"]
+    return _with_query("/api/v1/films/", params)
+
+
+def _film_search(rnd: random.Random, corpus: dict) -> str:
+    params = {"query": rnd.choice(_WORDS), "page_number": rnd.randint(1, 3), "page_size": 20}
+    if rnd.random() < 0.3:
+        params["genres_id"] = _popular(rnd, corpus["genres"])["id"]
+    return _with_query("/api/v1/films/search", params)
+
+
+SCENARIOS = (
+    Scenario(
+        "films/{film_id}",
+        30,
+        lambda rnd, corpus: f"/api/v1/films/{_popular(rnd, corpus['movies'])['id']}",
+        ("FilmService.get_by_id",),
+    ),
+    Scenario("films/", 20, _film_list, ("FilmService.get_list",)),
+    Scenario("films/search", 15, _film_search, ("FilmService.get_by_query",)),
+    Scenario(
+        "films/facets",
+        5,
+        lambda rnd, corpus: _with_query(
+            "/api/v1/films/facets", {"genres_id": _popular(rnd, corpus["genres"])["id"]}
+        ),
+        ("FilmService.get_facets",),
+    ),
+    Scenario(
+        "persons/{person_id}",
+        10,
+        lambda rnd, corpus: f"/api/v1/persons/{_popular(rnd, corpus['persons'])['id']}",
+        ("PersonService.get_by_id",),
+    ),
+    Scenario(
+        "persons/search",
+        5,
+        lambda rnd, corpus: _with_query("/api/v1/persons/search", {"query": rnd.choice(_WORDS)}),
+        ("PersonService.get_by_query",),
+    ),
+    Scenario(
+        "genres/{genre_id}",
+        5,
+        lambda rnd, corpus: f"/api/v1/genres/{_popular(rnd, corpus['genres'])['id']}",
+        ("GenreService.get_by_id",),
+    ),
+    Scenario(
+        "suggest/",
+        10,
+        lambda rnd, corpus: _with_query(
+            "/api/v1/suggest/", {"query": rnd.choice(_WORDS)[: rnd.randint(1, 4)]}
+        ),
+        ("FilmService.suggest", "PersonService.suggest"),
+    ),
+)
+
+
+async def _request(app, path: str) -> int:
+    """
+    Вызывает ASGI-приложение напрямую, без сокетов и http-клиента,
+    чтобы в замер попадала только работа сервиса.
+    """
+    raw_path, _, query_string = path.partition("?")
+    scope = {
+        "type": "http",
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": raw_path,
+        "raw_path": raw_path.encode(),
+        "root_path": "",
+        "query_string": query_string.encode(),
+        "headers": [(b"host", b"testserver"), (b"accept-encoding", b"gzip, br")],
+        "client": ("127.0.0.1", 50000),
+        "server": ("testserver", 80),
+    }
+    status = 500
+
+    async def receive() -> dict:
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message: dict) -> None:
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    await app(scope, receive, send)
+    return status
+
+
+async def _worker(
+    app, rnd: random.Random, corpus: dict, deadline: float, results: dict[str, EndpointResult]
+) -> None:
+    weights = [scenario.weight for scenario in SCENARIOS]
+    while perf_counter() < deadline:
+        scenario = rnd.choices(SCENARIOS, weights)[0]
+        path = scenario.make_path(rnd, corpus)
+        started = perf_counter()
+        try:
+            status = await _request(app, path)
+        except Exception:
+            status = 500
+        result = results.setdefault(scenario.name, EndpointResult())
+        result.latencies.append(perf_counter() - started)
+        if status >= 400:
+            result.errors += 1
+
+
+async def _run(app, corpus: dict, concurrency: int, duration: float, seed: int) -> tuple:
+    results: dict[str, EndpointResult] = dict()
+    deadline = perf_counter() + duration
+    started = perf_counter()
+    await asyncio.gather(
+        *(
+            _worker(app, random.Random(seed + worker), corpus, deadline, results)
+            for worker in range(concurrency)
+        )
+    )
+    return results, perf_counter() - started
+
+
+def _snapshot_cache_stats() -> dict[str, dict[str, int]]:
+    return {method: asdict(stats) for method, stats in get_cache_stats().items()}
+
+
+def _hit_ratio(before: dict, after: dict, methods: tuple[str, ...]) -> float | None:
+    hits = lookups = 0
+    for method in methods:
+        delta = {
+            name: after.get(method, {}).get(name, 0) - before.get(method, {}).get(name, 0)
+            for name in ("hits", "local_hits", "stale_hits", "coalesced", "misses")
+        }
+        hits += delta["hits"] + delta["local_hits"] + delta["stale_hits"] + delta["coalesced"]
+        lookups += sum(delta.values())
+    return round(hits / lookups, 4) if lookups else None
+
+
+def _summarize(latencies: list[float]) -> dict[str, float]:
+    if len(latencies) < 2:
+        latency = latencies[0] * 1000 if latencies else 0.0
+        return {"p50_ms": latency, "p95_ms": latency, "p99_ms": latency}
+    percentiles = statistics.quantiles(latencies, n=100, method="inclusive")
+    return {
+        "p50_ms": round(percentiles[49] * 1000, 3),
+        "p95_ms": round(percentiles[94] * 1000, 3),
+        "p99_ms": round(percentiles[98] * 1000, 3),
+    }
+
+
+def _report(
+    results: dict[str, EndpointResult], elapsed: float, before: dict, after: dict
+) -> dict[str, dict]:
+    endpoints = dict()
+    for scenario in SCENARIOS:
+        result = results.get(scenario.name, EndpointResult())
+        endpoints[scenario.name] = {
+            "requests": len(result.latencies),
+            "errors": result.errors,
+            "rps": round(len(result.latencies) / elapsed, 2),
+            **_summarize(result.latencies),
+            "cache_hit_ratio": _hit_ratio(before, after, scenario.cached_methods),
+        }
+    latencies = [latency for result in results.values() for latency in result.latencies]
+    total = {
+        "requests": len(latencies),
+        "errors": sum(result.errors for result in results.values()),
+        "rps": round(len(latencies) / elapsed, 2),
+        **_summarize(latencies),
+    }
+    return {"endpoints": endpoints, "total": total}
+
+
+def _print_report(report: dict) -> None:
+    columns = ("requests", "errors", "rps", "p50_ms", "p95_ms", "p99_ms", "cache_hit_ratio")
+    rows = {**report["endpoints"], "total": report["total"]}
+    width = max(len(name) for name in rows)
+    print(f"{'endpoint':<{width}}  " + "  ".join(f"{column:>15}" for column in columns))
+    for name, row in rows.items():
+        values = ("-" if row.get(column) is None else row[column] for column in columns)
+        print(f"{name:<{width}}  " + "  ".join(f"{value:>15}" for value in values))
+
+
+async def run(args: argparse.Namespace) -> dict:
+    settings.redis_mode = "memory"
+    settings.tracing_enabled = False
+    settings.warmup_on_startup = False
+
+    import main as service
+    from db import elastic
+
+    corpus = make_corpus(films=args.films, persons=args.persons, seed=args.seed)
+    await service.app.router.startup()
+    await elastic.es.close()
+    elastic.es = FakeElasticsearch(corpus, latency=args.es_latency_ms / 1000)
+    try:
+        if args.warmup:
+            await _run(service.app, corpus, args.concurrency, args.warmup, args.seed + 10_000)
+        before = _snapshot_cache_stats()
+        es_requests = elastic.es.requests
+        results, elapsed = await _run(
+            service.app, corpus, args.concurrency, args.duration, args.seed
+        )
+        report = _report(results, elapsed, before, _snapshot_cache_stats())
+        report["total"]["elastic_requests"] = elastic.es.requests - es_requests
+    finally:
+        await service.app.router.shutdown()
+
+    report["config"] = {name: value for name, value in vars(args).items() if name != "output"}
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10.0, help="секунды замера")
+    parser.add_argument("--warmup", type=float, default=2.0, help="секунды прогрева до замера")
+    parser.add_argument("--films", type=int, default=2000)
+    parser.add_argument("--persons", type=int, default=1000)
+    parser.add_argument("--es-latency-ms", type=float, default=2.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="файл для json-отчёта")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    _print_report(report)
+    if args.output:
+        with open(args.output, "wb") as file:
+            file.write(orjson.dumps(report, option=orjson.OPT_INDENT_2 | orjson.OPT_SORT_KEYS))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""
+Накладные расходы метрик на горячем пути: наблюдение гистограммы
+и обёртка observe_redis вокруг уже готовой корутины.
+
+Запуск из каталога fastapi-solution:
+    python -m benchmarks.metrics_overhead
+"""
+
+from benchmarks.timing import measure, print_table
+from core.config import settings
+from utils.metrics import REQUEST_LATENCY, observe_redis
+
+
+async def _noop() -> None:
+    pass
+
+
+def _run(coroutine) -> None:
+    try:
+        coroutine.send(None)
+    except StopIteration:
+        pass
+
+
+def main():
+    rows = [
+        (
+            "Histogram.labels().observe()",
+            measure(lambda: REQUEST_LATENCY.labels("GET", "/bench", 200).observe(0.001)),
+        ),
+        ("await без метрик", measure(lambda: _run(_noop()))),
+    ]
+    settings.metrics_redis = True
+    rows.append(("observe_redis, включено", measure(lambda: _run(observe_redis("get", _noop())))))
+    settings.metrics_redis = False
+    rows.append(("observe_redis, выключено", measure(lambda: _run(observe_redis("get", _noop())))))
+    print_table("Время на вызов", rows)
+
+
+if __name__ == "__main__":
+    main()
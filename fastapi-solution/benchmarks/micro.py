@@ -0,0 +1,204 @@
+"""
+Микробенчмарки чистого Python на горячем пути запроса с сохранённым
+эталоном и порогом регрессии.
+
+Время каждого случая делится на время эталонного цикла calibration,
+измеренного в том же запуске, поэтому эталон, снятый на одной машине,
+можно сравнивать с запуском на другой. Случай считается регрессией,
+если отношение выросло больше чем на --threshold; тогда код возврата 1.
+
+Калибровка не выравнивает разницу между версиями библиотек: валидация
+pydantic, например, в несобранной из Cython сборке в разы медленнее.
+Поэтому эталон снимается в окружении образа сервиса (python:3.10 из Dockerfile
+и версии из requirements.txt), и окружение записывается в эталон. Порог
+проверяется всегда; если окружение отличается от эталонного, это выводится
+вместе с результатом. Не считать замедления в чужом окружении ошибкой можно
+только явно, флагом --allow-env-mismatch.
+
+Запуск из каталога fastapi-solution в окружении образа:
+    python -m benchmarks.micro                   # сравнить с эталоном
+    python -m benchmarks.micro --update-baseline # записать новый эталон
+"""
+
+import argparse
+import platform
+import sys
+import timeit
+from datetime import datetime
+from pathlib import Path
+from statistics import median
+from typing import Callable
+
+import orjson
+import pydantic
+
+from benchmarks.fixtures import make_corpus
+from models.film import FilmBrief, FilmDetail
+from services.films import FilmService
+from services.query_plan import get_source_includes
+from utils.cache_keys import SEARCH_KEY_NORMALIZERS
+from utils.cache_serializer import CacheData, OrjsonCacheSerializer, PickleCacheSerializer
+from utils.caching import _get_cache_key
+
+BASELINE_PATH = Path(__file__).parent / "baselines" / "micro.json"
+PAGE_SIZE = 50
+
+FILM_FILTERS = {
+    "genres_id": ["3d8d9bf5-0d90-4353-88ba-4ccc5d2c07ff"],
+    "actors_name": ["Mark Hamill"],
+    "directors_id": None,
+}
+
+
+def get_environment() -> dict[str, str | bool]:
+    return {
+        "python": f"{platform.python_implementation()} {platform.python_version()}",
+        "pydantic": pydantic.VERSION,
+        "pydantic_compiled": pydantic.compiled,
+        "orjson": orjson.__version__,
+    }
+
+
+def _calibration() -> int:
+    return sum(i * i for i in range(1000))
+
+
+def _cases() -> dict[str, Callable]:
+    service = FilmService(redis=None, elastic=None)
+    model = service.search_model
+    docs = make_corpus(films=PAGE_SIZE)["movies"]
+    brief_fields = get_source_includes(FilmBrief)
+    brief_docs = [{f: doc[f] for f in brief_fields} for doc in docs]
+    films = [FilmDetail(**doc) for doc in docs]
+    pickled = PickleCacheSerializer.serialize(CacheData(saved_datetime=datetime.now(), data=films))
+    orjson_serializer = OrjsonCacheSerializer(list[FilmBrief])
+    briefs = [FilmBrief.construct(**doc) for doc in brief_docs]
+    stored = orjson_serializer.serialize(CacheData(saved_datetime=datetime.now(), data=briefs))
+    get_list = FilmService.get_list.__wrapped__
+
+    return {
+        "sort_string": lambda: service._make_sort_string(["-imdb_rating", "title"], model),
+        "query_filters": lambda: service._get_query_filters(FILM_FILTERS, model),
+        "build_search": lambda: service._build_search(
+            model, ["-imdb_rating"], 3, PAGE_SIZE, FILM_FILTERS, ("title", "star wars")
+        ),
+        "cache_key": lambda: _get_cache_key(
+            service,
+            get_list,
+            ["-imdb_rating"],
+            1,
+            PAGE_SIZE,
+            FILM_FILTERS,
+            key_normalizers=SEARCH_KEY_NORMALIZERS,
+        ),
+        "pickle_serialize_50": lambda: PickleCacheSerializer.serialize(
+            CacheData(saved_datetime=datetime.now(), data=films)
+        ),
+        "pickle_deserialize_50": lambda: PickleCacheSerializer.deserialize(pickled),
+        "orjson_deserialize_rendered_50": lambda: orjson_serializer.deserialize_rendered(stored),
+        "film_detail_validate": lambda: FilmDetail(**docs[0]),
+        "film_brief_construct_50": lambda: [FilmBrief.construct(**doc) for doc in brief_docs],
+    }
+
+
+def _measure(timer: timeit.Timer, number: int) -> float:
+    return timer.timeit(number=number) / number * 1e6
+
+
+def run(repeat: int) -> dict:
+    """
+    Каждый замер случая идёт сразу после замера эталонного цикла, и отношение
+    считается по паре; берётся медиана отношений. Так на результат меньше
+    влияют частота процессора и соседние процессы. Число вызовов в замере
+    подбирается так, чтобы замер длился не меньше 0.2 с.
+    """
+    calibration_timer = timeit.Timer(_calibration)
+    calibration_number, _ = calibration_timer.autorange()
+    calibrations, results = list(), dict()
+    for name, func in _cases().items():
+        timer = timeit.Timer(func)
+        number, _ = timer.autorange()
+        times, ratios = list(), list()
+        for _ in range(repeat):
+            calibration = _measure(calibration_timer, calibration_number)
+            time_us = _measure(timer, number)
+            calibrations.append(calibration)
+            times.append(time_us)
+            ratios.append(time_us / calibration)
+        results[name] = {"us": round(min(times), 3), "ratio": round(median(ratios), 4)}
+    return {
+        "calibration_us": round(min(calibrations), 3),
+        "environment": get_environment(),
+        "cases": results,
+    }
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> list[str]:
+    """
+    :return: имена случаев, которые замедлились относительно эталона больше порога
+    """
+    regressions = list()
+    header = f"{'case':<32}  {'us':>10}  {'ratio':>9}  {'baseline':>9}  {'change':>8}"
+    print(header)
+    for name, result in current["cases"].items():
+        base = baseline.get("cases", {}).get(name)
+        if base is None:
+            print(f"{name:<32}  {result['us']:>10.2f}  {result['ratio']:>9.3f}  {'-':>9}  new")
+            continue
+        change = result["ratio"] / base["ratio"] - 1
+        mark = ""
+        if change > threshold:
+            regressions.append(name)
+            mark = "  REGRESSION"
+        print(
+            f"{name:<32}  {result['us']:>10.2f}  {result['ratio']:>9.3f}  "
+            f"{base['ratio']:>9.3f}  {change:>+8.1%}{mark}"
+        )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Микробенчмарки горячего пути с эталоном")
+    parser.add_argument("--repeat", type=int, default=7, help="замеров, берётся медиана отношений")
+    parser.add_argument("--threshold", type=float, default=0.25, help="допустимое замедление")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument(
+        "--allow-env-mismatch",
+        action="store_true",
+        help="не считать замедления ошибкой, если окружение отличается от эталонного",
+    )
+    parser.add_argument("--output", type=Path, help="файл для json с результатами запуска")
+    args = parser.parse_args()
+
+    current = run(args.repeat)
+    if args.output:
+        args.output.write_bytes(orjson.dumps(current, option=orjson.OPT_INDENT_2))
+
+    if args.update_baseline:
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_bytes(
+            orjson.dumps(current, option=orjson.OPT_INDENT_2 | orjson.OPT_SORT_KEYS) + b"\n"
+        )
+        print(f"Эталон записан в {args.baseline}")
+        return
+
+    baseline = orjson.loads(args.baseline.read_bytes()) if args.baseline.exists() else dict()
+    regressions = compare(current, baseline, args.threshold)
+    env_mismatch = baseline.get("environment") != current["environment"]
+    if env_mismatch:
+        print(
+            f"Окружение отличается от эталона: {current['environment']} "
+            f"вместо {baseline.get('environment')}"
+        )
+    if not regressions:
+        return
+    print(f"Замедление больше {args.threshold:.0%}: {', '.join(regressions)}")
+    if env_mismatch and args.allow_env_mismatch:
+        print("Передан --allow-env-mismatch, замедления не считаются ошибкой")
+        return
+    sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
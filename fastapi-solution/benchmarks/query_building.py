@@ -0,0 +1,61 @@
+"""
+Стоимость построения запроса к elastic в Service на один запрос к API.
+
+Запуск из каталога fastapi-solution:
+    python -m benchmarks.query_building
+"""
+
+from benchmarks.timing import measure, print_table
+from services.films import FilmService
+from services.persons import PersonService
+from services.query_plan import compile_filter_plans
+
+FILM_FILTERS = {
+    "genres_id": ["3d8d9bf5-0d90-4353-88ba-4ccc5d2c07ff"],
+    "actors_name": ["Mark Hamill"],
+    "directors_id": None,
+}
+
+
+def main():
+    film_service = FilmService(redis=None, elastic=None)
+    person_service = PersonService(redis=None, elastic=None)
+
+    rows = [
+        (
+            "film list, no filters",
+            measure(lambda: film_service._build_search(film_service.search_model, None, 1, 50, {})),
+        ),
+        (
+            "film search, 2 filters + 2 sort fields",
+            measure(
+                lambda: film_service._build_search(
+                    film_service.search_model,
+                    ["-imdb_rating", "title"],
+                    3,
+                    50,
+                    FILM_FILTERS,
+                    ("title", "star wars"),
+                )
+            ),
+        ),
+        (
+            "person list, nested filter",
+            measure(
+                lambda: person_service._build_search(
+                    person_service.search_model, ["full_name"], 1, 50, {"films_id": ["x"]}
+                )
+            ),
+        ),
+        (
+            "compile film plans (once per service)",
+            measure(
+                lambda: compile_filter_plans(FilmService.filters_cls, FilmService.search_model)
+            ),
+        ),
+    ]
+    print_table("Построение запроса, время на вызов", rows)
+
+
+if __name__ == "__main__":
+    main()
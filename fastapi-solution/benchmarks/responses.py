@@ -0,0 +1,50 @@
+"""
+Стоимость формирования ответа при попадании в кеш: построение моделей
+и сериализация через response_model против отдачи готового json.
+
+Запуск из каталога fastapi-solution:
+    python -m benchmarks.responses
+"""
+
+from datetime import datetime
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+
+from benchmarks.fixtures import make_corpus
+from benchmarks.timing import measure, print_table
+from models.film import FilmDetail
+from models.genre import GenreBrief
+from utils.cache_serializer import CacheData, OrjsonCacheSerializer, PickleCacheSerializer
+
+
+def _cases() -> dict:
+    corpus = make_corpus(films=1)
+    return {
+        "film_details": (FilmDetail, FilmDetail(**corpus["movies"][0])),
+        "genre_list": (list[GenreBrief], [GenreBrief(**doc) for doc in corpus["genres"][:20]]),
+    }
+
+
+def main():
+    rows = []
+    for name, (data_type, data) in _cases().items():
+        cache_data = CacheData(saved_datetime=datetime.now(), data=data)
+        pickled = PickleCacheSerializer.serialize(cache_data)
+        serializer = OrjsonCacheSerializer(data_type)
+        stored = serializer.serialize(cache_data)
+
+        def via_models():
+            return orjson.dumps(jsonable_encoder(PickleCacheSerializer.deserialize(pickled).data))
+
+        def rendered():
+            return serializer.deserialize_rendered(stored).data
+
+        rows.append((f"{name} pickle + response_model", measure(via_models)))
+        rows.append((f"{name} rendered bytes", measure(rendered)))
+
+    print_table("Попадание в кеш, время на запрос", rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""
+Сравнение сериализаторов кеша на списке FilmDetail.
+
+Запуск из каталога fastapi-solution:
+    python -m benchmarks.serializers
+"""
+
+from datetime import datetime
+
+from benchmarks.fixtures import make_corpus
+from benchmarks.timing import measure, print_table
+from models.film import FilmDetail
+from utils.cache_serializer import CacheData, OrjsonCacheSerializer, PickleCacheSerializer
+
+PAGE_SIZE = 50
+
+
+def main():
+    docs = make_corpus(films=PAGE_SIZE)["movies"]
+    films = [FilmDetail(**doc) for doc in docs]
+    cache_data = CacheData(saved_datetime=datetime.now(), data=films)
+
+    serializers = {
+        "pickle": PickleCacheSerializer(),
+        "orjson": OrjsonCacheSerializer(list[FilmDetail]),
+    }
+    timings, sizes = [], []
+    for name, serializer in serializers.items():
+        raw = serializer.serialize(cache_data)
+        serialize_time = measure(lambda: serializer.serialize(cache_data), number=200)
+        deserialize_time = measure(lambda: serializer.deserialize(raw), number=200)
+        timings.append((f"{name} serialize", serialize_time))
+        timings.append((f"{name} deserialize", deserialize_time))
+        sizes.append((name, len(raw) / 1024))
+
+    print_table(f"list[FilmDetail] x {PAGE_SIZE}, время на вызов", timings)
+    print_table("Размер записи", sizes, unit="KiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,16 @@
+import timeit
+from typing import Callable
+
+
+def measure(func: Callable, number: int = 1000, repeat: int = 5) -> float:
+    """
+    :return: лучшее из repeat замеров время одного вызова в микросекундах
+    """
+    return min(timeit.repeat(func, number=number, repeat=repeat)) / number * 1e6
+
+
+def print_table(title: str, rows: list[tuple[str, float]], unit: str = "us") -> None:
+    print(title)
+    width = max(len(name) for name, _ in rows)
+    for name, value in rows:
+        print(f"  {name:<{width}}  {value:>12.2f} {unit}")
@@ -0,0 +1,61 @@
+from dataclasses import fields
+
+from fastapi import APIRouter, Response
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, generate_latest
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+from core.config import settings
+from db import elastic, redis
+from utils.caching import CacheStats, get_cache_stats
+
+router = APIRouter()
+
+
+class CacheStatsCollector:
+    """
+    Отдаёт счётчики CacheStats закешированных методов при каждом чтении /metrics,
+    поэтому на пути запроса учёт не стоит ничего сверх уже имеющихся счётчиков.
+    """
+
+    def collect(self):
+        if not settings.metrics_cache:
+            return
+        families = {
+            field.name: CounterMetricFamily(
+                f"cache_{field.name}", f"Кеш: {field.name}", labels=("method",)
+            )
+            for field in fields(CacheStats)
+        }
+        for method, stats in get_cache_stats().items():
+            for name, family in families.items():
+                family.add_metric((method,), getattr(stats, name))
+        yield from families.values()
+
+
+class PoolUsageCollector:
+    """
+    Загрузка пулов соединений redis и elastic текущего воркера на момент чтения /metrics.
+    """
+
+    def collect(self):
+        if not settings.metrics_pools:
+            return
+        family = GaugeMetricFamily(
+            "connection_pool_connections", "Соединения пула", labels=("client", "state")
+        )
+        for client, get_usage in (
+            ("redis", redis.get_pool_usage),
+            ("elastic", elastic.get_pool_usage),
+        ):
+            for state, value in get_usage().items():
+                family.add_metric((client, state), value)
+        yield family
+
+
+REGISTRY.register(CacheStatsCollector())
+REGISTRY.register(PoolUsageCollector())
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics() -> Response:
+    return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
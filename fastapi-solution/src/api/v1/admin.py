@@ -0,0 +1,69 @@
+import logging
+import secrets
+from dataclasses import asdict
+from http import HTTPStatus
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request
+
+from core.config import settings
+from db import elastic, redis
+from services.warmup import CacheWarmer
+from utils.caching import get_hot_keys
+from utils.tracing import InMemorySpanExporter, get_exporter
+
+logger = logging.getLogger(__name__)
+
+
+async def verify_admin_token(x_admin_token: str | None = Header(default=None)) -> None:
+    """
+    Служебные эндпоинты доступны только с токеном ADMIN_TOKEN в заголовке
+    X-Admin-Token; без настроенного токена они отключены.
+    """
+    if not settings.admin_token:
+        raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail="admin api is disabled")
+    if x_admin_token is None or not secrets.compare_digest(x_admin_token, settings.admin_token):
+        raise HTTPException(status_code=HTTPStatus.FORBIDDEN, detail="invalid admin token")
+
+
+router = APIRouter(dependencies=[Depends(verify_admin_token)])
+
+
+@router.get("/pools", description="Connection pool utilisation of the current worker")
+async def pool_usage() -> dict[str, dict[str, int]]:
+    return {"redis": redis.get_pool_usage(), "elastic": elastic.get_pool_usage()}
+
+
+@router.get("/traces", description="Recent spans kept by the in-memory exporter of this worker")
+async def recent_spans(
+    trace_id: str | None = None, limit: int = Query(default=100, ge=1, le=10000)
+) -> list[dict]:
+    exporter = get_exporter()
+    if not isinstance(exporter, InMemorySpanExporter):
+        raise HTTPException(
+            status_code=HTTPStatus.NOT_FOUND, detail="in-memory span exporter is not enabled"
+        )
+    spans = [span for span in exporter.spans if trace_id is None or span.trace_id == trace_id]
+    return [asdict(span) for span in spans[-limit:]]
+
+
+@router.get("/hot-keys", description="Most requested cache keys sampled by this worker")
+async def hot_keys(limit: int = Query(default=20, ge=1, le=1000)) -> list[dict]:
+    return [{"key": key, "count": count} for key, count in get_hot_keys(limit)]
+
+
+@router.post(
+    "/warmup",
+    status_code=HTTPStatus.ACCEPTED,
+    description="Start cache warm-up unless another worker holds the warm-up lock",
+)
+async def start_warmup(request: Request) -> dict:
+    warmer: CacheWarmer = request.app.state.warmer
+    return asdict(warmer.start())
+
+
+@router.get("/warmup", description="Progress of the last cache warm-up in this worker")
+async def warmup_progress(request: Request) -> dict:
+    warmer: CacheWarmer = request.app.state.warmer
+    if warmer.progress is None:
+        raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail="cache warm-up has not run")
+    return {"running": warmer.running, **asdict(warmer.progress)}
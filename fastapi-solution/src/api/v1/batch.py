@@ -0,0 +1,17 @@
+from http import HTTPStatus
+
+from fastapi import HTTPException, Query
+
+from core.config import settings
+
+
+def get_batch_ids(ids: list[str] = Query(...)) -> list[str]:
+    """
+    Ограничивает размер пакета: все id читаются одним MGET и одним запросом в elastic.
+    """
+    if len(ids) > settings.batch_max_ids:
+        raise HTTPException(
+            status_code=HTTPStatus.BAD_REQUEST,
+            detail=f"no more than {settings.batch_max_ids} ids allowed",
+        )
+    return ids
@@ -1,55 +1,160 @@
 import logging
 from dataclasses import asdict
+from functools import partial
 from http import HTTPStatus
 
-from fastapi import Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 
-from models.film import FilmFilters, FilmBrief, FilmDetail
-from models.shared import Paginator
+from api.v1.batch import get_batch_ids
+from api.v1.pagination import CURSOR_DESCRIPTION, next_cursor_headers, resolve_cursor
+from api.v1.responses import cached_response
+from models.film import FilmFacets, FilmFilters, FilmBrief, FilmDetail
+from models.shared import Paginator, Total
+from services.films import FilmService, get_film_service
+from services.warmup import record_query, record_request
+from utils.caching import get_rendered
 
 logger = logging.getLogger(__name__)
-from fastapi import APIRouter, Depends, HTTPException
-
-from services.films import FilmService, get_film_service
 
 router = APIRouter()
 
 
 @router.get(
-    "/search", response_model=list[FilmBrief], description="Search films based on title query, filters and sorting"
+    "/search",
+    response_model=list[FilmBrief],
+    description="Search films based on title query, filters and sorting",
 )
 async def film_search(
+    request: Request,
     query: str | None = None,
     sort: list[str] | None = Query(default=None),
     filters: FilmFilters = Depends(FilmFilters),
     paginator: Paginator = Depends(Paginator),
+    cursor: str | None = Query(default=None, description=CURSOR_DESCRIPTION),
     film_service: FilmService = Depends(get_film_service),
-) -> list[FilmBrief]:
-    films = await film_service.get_by_query(
-        query, sort, paginator.page_number, paginator.page_size, asdict(filters)
+) -> Response:
+    decoded_cursor = await resolve_cursor(cursor, film_service, sort, FilmDetail)
+    films = await get_rendered(
+        film_service.get_by_query,
+        query,
+        sort,
+        paginator.page_number,
+        paginator.page_size,
+        asdict(filters),
+        cursor=decoded_cursor,
+    )
+    await record_query(
+        film_service.get_by_query,
+        query,
+        sort,
+        paginator.page_number,
+        paginator.page_size,
+        asdict(filters),
+        cursor=decoded_cursor,
     )
-    return [FilmBrief(**film.dict()) for film in films]
+    make_headers = partial(
+        next_cursor_headers,
+        film_service,
+        films,
+        sort,
+        FilmDetail,
+        decoded_cursor,
+    )
+    return cached_response(request, films, film_service.get_by_query, make_headers)
 
 
-@router.get("/", response_model=list[FilmBrief], description="Get list of all films with filters and sorting")
+@router.get(
+    "/",
+    response_model=list[FilmBrief],
+    description="Get list of all films with filters and sorting",
+)
 async def film_list(
+    request: Request,
     sort: list[str] | None = Query(default=None),
     filters: FilmFilters = Depends(FilmFilters),
     paginator: Paginator = Depends(Paginator),
+    cursor: str | None = Query(default=None, description=CURSOR_DESCRIPTION),
     film_service: FilmService = Depends(get_film_service),
-) -> list[FilmBrief]:
-    films = await film_service.get_list(
-        sort, paginator.page_number, paginator.page_size, asdict(filters)
+) -> Response:
+    decoded_cursor = await resolve_cursor(cursor, film_service, sort, FilmDetail)
+    films = await get_rendered(
+        film_service.get_list,
+        sort,
+        paginator.page_number,
+        paginator.page_size,
+        asdict(filters),
+        cursor=decoded_cursor,
     )
-    return [FilmBrief(**film.dict()) for film in films]
+    await record_query(
+        film_service.get_list,
+        sort,
+        paginator.page_number,
+        paginator.page_size,
+        asdict(filters),
+        cursor=decoded_cursor,
+    )
+    make_headers = partial(
+        next_cursor_headers,
+        film_service,
+        films,
+        sort,
+        FilmDetail,
+        decoded_cursor,
+    )
+    return cached_response(request, films, film_service.get_list, make_headers)
+
+
+@router.get(
+    "/facets",
+    response_model=FilmFacets,
+    description="Get genre, director and rating counts for films matching the query and filters",
+)
+async def film_facets(
+    request: Request,
+    query: str | None = None,
+    filters: FilmFilters = Depends(FilmFilters),
+    film_service: FilmService = Depends(get_film_service),
+) -> Response:
+    facets = await get_rendered(film_service.get_facets, query, asdict(filters))
+    return cached_response(request, facets, film_service.get_facets)
+
+
+@router.get(
+    "/count",
+    response_model=Total,
+    description="Get number of films matching the query and filters",
+)
+async def film_count(
+    request: Request,
+    query: str | None = None,
+    filters: FilmFilters = Depends(FilmFilters),
+    film_service: FilmService = Depends(get_film_service),
+) -> Response:
+    total = await get_rendered(film_service.get_count, query, asdict(filters))
+    return cached_response(request, b'{"total":' + total + b"}", film_service.get_count)
+
+
+@router.get(
+    "/batch",
+    response_model=list[FilmDetail],
+    description="Get details of several films by ids, in the order of ids",
+)
+async def film_batch(
+    request: Request,
+    ids: list[str] = Depends(get_batch_ids),
+    film_service: FilmService = Depends(get_film_service),
+) -> Response:
+    films = await film_service.get_by_ids(ids, model_cls=FilmDetail, rendered=True)
+    return cached_response(request, films, film_service.get_by_id)
 
 
 @router.get("/{film_id}", response_model=FilmDetail, description="Get single film details")
 async def film_details(
-    film_id: str, film_service: FilmService = Depends(get_film_service)
-) -> FilmDetail:
-    film = await film_service.get_by_id(film_id, model_cls=FilmDetail)
+    request: Request, film_id: str, film_service: FilmService = Depends(get_film_service)
+) -> Response:
+    film = await get_rendered(film_service.get_by_id, film_id, model_cls=FilmDetail)
     if not film:
         raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail="film not found")
+    await record_request(film_service, film_id)
 
-    return film
+    return cached_response(request, film, film_service.get_by_id)
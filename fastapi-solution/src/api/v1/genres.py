@@ -2,36 +2,71 @@ import logging
 from dataclasses import asdict
 from http import HTTPStatus
 
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from fastapi.params import Query
 
+from api.v1.batch import get_batch_ids
+from api.v1.responses import cached_response
 from models.genre import GenreDetail, GenreBrief, GenreFilters
 from models.shared import Paginator
 from services.genres import GenreService, get_genre_service
+from services.warmup import record_query, record_request
+from utils.caching import get_rendered
 
 logger = logging.getLogger(__name__)
-from fastapi import APIRouter, Depends, HTTPException
 
 router = APIRouter()
 
 
-@router.get("/", response_model=list[GenreBrief], description="Get list of all genres with filters and sorting")
+@router.get(
+    "/",
+    response_model=list[GenreBrief],
+    description="Get list of all genres with filters and sorting",
+)
 async def genre_list(
+    request: Request,
     sort: list[str] | None = Query(default=None),
     filters: GenreFilters = Depends(GenreFilters),
     paginator: Paginator = Depends(Paginator),
     genre_service: GenreService = Depends(get_genre_service),
-) -> list[GenreBrief]:
-    genres = await genre_service.get_list(
-        sort, paginator.page_number, paginator.page_size, filters=asdict(filters)
+) -> Response:
+    genres = await get_rendered(
+        genre_service.get_list,
+        sort,
+        paginator.page_number,
+        paginator.page_size,
+        filters=asdict(filters),
     )
-    return [GenreBrief(**genre.dict()) for genre in genres]
+    await record_query(
+        genre_service.get_list,
+        sort,
+        paginator.page_number,
+        paginator.page_size,
+        filters=asdict(filters),
+    )
+    return cached_response(request, genres, genre_service.get_list)
+
+
+@router.get(
+    "/batch",
+    response_model=list[GenreDetail],
+    description="Get details of several genres by ids, in the order of ids",
+)
+async def genre_batch(
+    request: Request,
+    ids: list[str] = Depends(get_batch_ids),
+    genre_service: GenreService = Depends(get_genre_service),
+) -> Response:
+    genres = await genre_service.get_by_ids(ids, model_cls=GenreDetail, rendered=True)
+    return cached_response(request, genres, genre_service.get_by_id)
 
 
 @router.get("/{genre_id}", response_model=GenreDetail, description="Get single genre details")
 async def genre_details(
-    genre_id: str, genre_service: GenreService = Depends(get_genre_service)
-) -> GenreDetail:
-    genre = await genre_service.get_by_id(genre_id, model_cls=GenreDetail)
+    request: Request, genre_id: str, genre_service: GenreService = Depends(get_genre_service)
+) -> Response:
+    genre = await get_rendered(genre_service.get_by_id, genre_id, model_cls=GenreDetail)
     if not genre:
         raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail="genre not found")
-    return genre
+    await record_request(genre_service, genre_id)
+    return cached_response(request, genre, genre_service.get_by_id)
@@ -0,0 +1,50 @@
+from http import HTTPStatus
+
+from fastapi import HTTPException
+from pydantic import BaseModel
+
+from core.config import settings
+from services.base import Service
+from utils.cursor import Cursor, RenderedPage, decode_cursor, encode_cursor
+from utils.exceptions import InvalidCursorException
+
+CURSOR_DESCRIPTION = (
+    "Opaque cursor from the X-Next-Cursor header of the previous page. "
+    "When set, page_number is ignored and the next page is fetched with search_after"
+)
+
+
+async def resolve_cursor(
+    cursor: str | None, service: Service, sort: list[str] | None, model: type[BaseModel]
+) -> Cursor | None:
+    if cursor is None:
+        return None
+
+    try:
+        decoded_cursor = decode_cursor(cursor)
+        service.check_cursor(decoded_cursor, sort, model)
+    except InvalidCursorException:
+        raise HTTPException(status_code=HTTPStatus.BAD_REQUEST, detail="invalid cursor")
+
+    if settings.elastic_point_in_time and not decoded_cursor.pit_id:
+        decoded_cursor.pit_id = await service.open_point_in_time()
+    return decoded_cursor
+
+
+def next_cursor_headers(
+    service: Service,
+    page: RenderedPage,
+    sort: list[str] | None,
+    model: type[BaseModel],
+    cursor: Cursor | None,
+) -> dict[str, str]:
+    """
+    :param page: страница, значения сортировки последнего документа которой
+        становятся search_after следующей
+    """
+    if page.search_after is None:
+        return dict()
+
+    pit_id = page.pit_id or (cursor.pit_id if cursor else None)
+    next_cursor = service.make_cursor(page.search_after, sort, model, pit_id)
+    return {"X-Next-Cursor": encode_cursor(next_cursor)}
@@ -1,55 +1,145 @@
 import logging
 from dataclasses import asdict
+from functools import partial
 from http import HTTPStatus
 
-from fastapi import Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 
+from api.v1.batch import get_batch_ids
+from api.v1.pagination import CURSOR_DESCRIPTION, next_cursor_headers, resolve_cursor
+from api.v1.responses import cached_response
 from models.person import PersonFilters, PersonBrief, PersonDetail
-from models.shared import Paginator
+from models.shared import Paginator, Total
+from services.persons import PersonService, get_person_service
+from services.warmup import record_query, record_request
+from utils.caching import get_rendered
 
 logger = logging.getLogger(__name__)
-from fastapi import APIRouter, Depends, HTTPException
-
-from services.persons import PersonService, get_person_service
 
 router = APIRouter()
 
 
 @router.get(
-    "/search", response_model=list[PersonBrief], description="Search persons based on title query, filters and sorting"
+    "/search",
+    response_model=list[PersonBrief],
+    description="Search persons based on title query, filters and sorting",
 )
 async def person_search(
+    request: Request,
     query: str | None = None,
     sort: list[str] | None = Query(default=None),
     filters: PersonFilters = Depends(PersonFilters),
     paginator: Paginator = Depends(Paginator),
+    cursor: str | None = Query(default=None, description=CURSOR_DESCRIPTION),
     person_service: PersonService = Depends(get_person_service),
-) -> list[PersonBrief]:
-    persons = await person_service.get_by_query(
-        query, sort, paginator.page_number, paginator.page_size, asdict(filters)
+) -> Response:
+    decoded_cursor = await resolve_cursor(cursor, person_service, sort, PersonDetail)
+    persons = await get_rendered(
+        person_service.get_by_query,
+        query,
+        sort,
+        paginator.page_number,
+        paginator.page_size,
+        asdict(filters),
+        cursor=decoded_cursor,
     )
-    return [PersonBrief(**person.dict()) for person in persons]
+    await record_query(
+        person_service.get_by_query,
+        query,
+        sort,
+        paginator.page_number,
+        paginator.page_size,
+        asdict(filters),
+        cursor=decoded_cursor,
+    )
+    make_headers = partial(
+        next_cursor_headers,
+        person_service,
+        persons,
+        sort,
+        PersonDetail,
+        decoded_cursor,
+    )
+    return cached_response(request, persons, person_service.get_by_query, make_headers)
 
 
-@router.get("/", response_model=list[PersonBrief], description="Get list of all persons with filters and sorting")
+@router.get(
+    "/",
+    response_model=list[PersonBrief],
+    description="Get list of all persons with filters and sorting",
+)
 async def person_list(
+    request: Request,
     sort: list[str] | None = Query(default=None),
     filters: PersonFilters = Depends(PersonFilters),
     paginator: Paginator = Depends(Paginator),
+    cursor: str | None = Query(default=None, description=CURSOR_DESCRIPTION),
     person_service: PersonService = Depends(get_person_service),
-) -> list[PersonBrief]:
-    persons = await person_service.get_list(
-        sort, paginator.page_number, paginator.page_size, asdict(filters)
+) -> Response:
+    decoded_cursor = await resolve_cursor(cursor, person_service, sort, PersonDetail)
+    persons = await get_rendered(
+        person_service.get_list,
+        sort,
+        paginator.page_number,
+        paginator.page_size,
+        asdict(filters),
+        cursor=decoded_cursor,
+    )
+    await record_query(
+        person_service.get_list,
+        sort,
+        paginator.page_number,
+        paginator.page_size,
+        asdict(filters),
+        cursor=decoded_cursor,
+    )
+    make_headers = partial(
+        next_cursor_headers,
+        person_service,
+        persons,
+        sort,
+        PersonDetail,
+        decoded_cursor,
     )
-    return [PersonBrief(**person.dict()) for person in persons]
+    return cached_response(request, persons, person_service.get_list, make_headers)
+
+
+@router.get(
+    "/count",
+    response_model=Total,
+    description="Get number of persons matching the query and filters",
+)
+async def person_count(
+    request: Request,
+    query: str | None = None,
+    filters: PersonFilters = Depends(PersonFilters),
+    person_service: PersonService = Depends(get_person_service),
+) -> Response:
+    total = await get_rendered(person_service.get_count, query, asdict(filters))
+    return cached_response(request, b'{"total":' + total + b"}", person_service.get_count)
+
+
+@router.get(
+    "/batch",
+    response_model=list[PersonDetail],
+    description="Get details of several persons by ids, in the order of ids",
+)
+async def person_batch(
+    request: Request,
+    ids: list[str] = Depends(get_batch_ids),
+    person_service: PersonService = Depends(get_person_service),
+) -> Response:
+    persons = await person_service.get_by_ids(ids, model_cls=PersonDetail, rendered=True)
+    return cached_response(request, persons, person_service.get_by_id)
 
 
 @router.get("/{person_id}", response_model=PersonDetail, description="Get single person details")
 async def person_details(
-    person_id: str, person_service: PersonService = Depends(get_person_service)
-) -> PersonDetail:
-    person = await person_service.get_by_id(person_id, model_cls=PersonDetail)
+    request: Request, person_id: str, person_service: PersonService = Depends(get_person_service)
+) -> Response:
+    person = await get_rendered(person_service.get_by_id, person_id, model_cls=PersonDetail)
     if not person:
         raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail="person not found")
+    await record_request(person_service, person_id)
 
-    return person
+    return cached_response(request, person, person_service.get_by_id)
@@ -0,0 +1,63 @@
+from http import HTTPStatus
+from typing import Callable
+
+from fastapi import Request, Response
+
+from utils.cache_keys import get_digest
+from utils.compression import get_response_encoding
+
+
+def get_cache_control(method: Callable) -> str:
+    """
+    Время жизни ответа у клиента и CDN совпадает со временем жизни записи
+    в кеше метода сервиса, а устаревшую запись можно отдавать ещё stale_ttl.
+    """
+    policy = method.__func__.policy
+    cache_control = f"public, max-age={policy.expire}"
+    if policy.stale_ttl:
+        cache_control += f", stale-while-revalidate={policy.stale_ttl}"
+    return cache_control
+
+
+def etag_matches(if_none_match: str | None, digest: str) -> bool:
+    """
+    Сравнение по RFC 7232 для If-None-Match: слабое, поэтому учитываются
+    и ETag сжатых представлений вида "<дайджест>-gzip".
+    """
+    if not if_none_match:
+        return False
+    for tag in if_none_match.split(","):
+        tag = tag.strip().removeprefix("W/").strip('"')
+        if tag == "*" or tag.split("-", 1)[0] == digest:
+            return True
+    return False
+
+
+def cached_response(
+    request: Request,
+    content: bytes,
+    method: Callable,
+    make_headers: Callable[[], dict[str, str]] | None = None,
+) -> Response:
+    """
+    Ответ с ETag по дайджесту готового json и Cache-Control по политике кеша метода.
+    При совпадении If-None-Match возвращается 304 без тела с тем же ETag,
+    который получил бы сжатый ответ 200.
+    :param method: закешированный метод сервиса, которым получен content
+    :param make_headers: дополнительные заголовки, нужны только для ответа 200
+    """
+    digest = get_digest(content)
+    headers = {
+        "ETag": f'"{digest}"',
+        "Cache-Control": get_cache_control(method),
+        "Vary": "Accept-Encoding",
+    }
+    if etag_matches(request.headers.get("if-none-match"), digest):
+        encoding = get_response_encoding(request.headers.get("accept-encoding", ""), len(content))
+        if encoding is not None:
+            headers["ETag"] = f'"{digest}-{encoding}"'
+        return Response(status_code=HTTPStatus.NOT_MODIFIED, headers=headers)
+
+    if make_headers is not None:
+        headers.update(make_headers())
+    return Response(content=content, media_type="application/json", headers=headers)
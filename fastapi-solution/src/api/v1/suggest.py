@@ -0,0 +1,38 @@
+import asyncio
+
+from fastapi import APIRouter, Depends, Request, Response
+from fastapi.params import Query
+
+from api.v1.responses import cached_response
+from models.suggestion import Suggestions
+from services.films import FilmService, get_film_service
+from services.persons import PersonService, get_person_service
+from utils.cache_keys import normalize_query
+from utils.caching import get_rendered
+
+router = APIRouter()
+
+
+@router.get(
+    "/",
+    response_model=Suggestions,
+    description="Get film titles and person names starting with the typed prefix",
+)
+async def suggest(
+    request: Request,
+    query: str = Query(..., min_length=1, max_length=50),
+    size: int = Query(default=5, ge=1, le=10),
+    film_service: FilmService = Depends(get_film_service),
+    person_service: PersonService = Depends(get_person_service),
+) -> Response:
+    prefix = normalize_query(query)
+    if not prefix:
+        return Response(content=b'{"films":[],"persons":[]}', media_type="application/json")
+
+    films, persons = await asyncio.gather(
+        get_rendered(film_service.suggest, prefix, size),
+        get_rendered(person_service.suggest, prefix, size),
+    )
+    return cached_response(
+        request, b'{"films":' + films + b',"persons":' + persons + b"}", film_service.suggest
+    )
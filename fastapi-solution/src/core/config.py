@@ -1,5 +1,6 @@
 import logging
 import os
+from typing import Literal
 
 from pydantic import BaseSettings, Field
 
@@ -8,10 +9,106 @@ class Settings(BaseSettings):
     project_name: str = Field(default="movies", env="PROJECT_NAME")
     redis_host: str = Field(default="127.0.0.1", env="REDIS_HOST")
     redis_port: int = Field(default=6379, env="REDIS_PORT")
+    redis_mode: Literal["standalone", "cluster", "memory"] = Field(
+        default="standalone", env="REDIS_MODE"
+    )
+    redis_read_from_replicas: bool = Field(default=False, env="REDIS_READ_FROM_REPLICAS")
+    redis_max_connections: int = Field(default=50, env="REDIS_MAX_CONNECTIONS")
+    redis_pool_timeout: float = Field(default=1, env="REDIS_POOL_TIMEOUT_SEC")
+    redis_timeout: float = Field(default=0.5, env="REDIS_TIMEOUT_SEC")
+    redis_connect_timeout: float = Field(default=1, env="REDIS_CONNECT_TIMEOUT_SEC")
+    redis_keepalive: bool = Field(default=True, env="REDIS_KEEPALIVE")
+    redis_health_check_interval: int = Field(default=30, env="REDIS_HEALTH_CHECK_INTERVAL_SEC")
+    redis_max_retries: int = Field(default=1, env="REDIS_MAX_RETRIES")
     elastic_host: str = Field(default="127.0.0.1", env="ELASTIC_HOST")
     elastic_port: str = Field(default=9200, env="ELASTIC_PORT")
+    elastic_max_connections: int = Field(default=25, env="ELASTIC_MAX_CONNECTIONS")
+    elastic_timeout: float = Field(default=5, env="ELASTIC_TIMEOUT_SEC")
+    elastic_max_retries: int = Field(default=2, env="ELASTIC_MAX_RETRIES")
+    elastic_request_cache: bool = Field(default=True, env="ELASTIC_REQUEST_CACHE")
+    elastic_preference_by_query: bool = Field(default=True, env="ELASTIC_PREFERENCE_BY_QUERY")
+    elastic_point_in_time: bool = Field(default=False, env="ELASTIC_POINT_IN_TIME")
+    elastic_pit_keep_alive: str = Field(default="1m", env="ELASTIC_PIT_KEEP_ALIVE")
+    compression_min_size: int = Field(default=1024, env="COMPRESSION_MIN_SIZE")
+    compression_gzip_level: int = Field(default=6, env="COMPRESSION_GZIP_LEVEL")
+    compression_brotli_quality: int = Field(default=5, env="COMPRESSION_BROTLI_QUALITY")
+    compression_cache_expire_in_seconds: float = Field(
+        default=300, env="COMPRESSION_CACHE_EXPIRE_SEC"
+    )
+    compression_cache_max_entries: int = Field(default=2048, env="COMPRESSION_CACHE_MAX_ENTRIES")
+    compression_cache_max_bytes: int = Field(
+        default=16 * 1024 * 1024, env="COMPRESSION_CACHE_MAX_BYTES"
+    )
+    compression_shared: bool = Field(default=True, env="COMPRESSION_SHARED")
+    metrics_enabled: bool = Field(default=True, env="METRICS_ENABLED")
+    metrics_requests: bool = Field(default=True, env="METRICS_REQUESTS")
+    metrics_payload: bool = Field(default=True, env="METRICS_PAYLOAD")
+    metrics_cache: bool = Field(default=True, env="METRICS_CACHE")
+    metrics_redis: bool = Field(default=True, env="METRICS_REDIS")
+    metrics_elastic: bool = Field(default=True, env="METRICS_ELASTIC")
+    metrics_pools: bool = Field(default=True, env="METRICS_POOLS")
+    tracing_enabled: bool = Field(default=False, env="TRACING_ENABLED")
+    tracing_sample_rate: float = Field(default=0.01, env="TRACING_SAMPLE_RATE")
+    tracing_exporter: Literal["memory", "file", "none"] = Field(
+        default="memory", env="TRACING_EXPORTER"
+    )
+    tracing_memory_max_spans: int = Field(default=10000, env="TRACING_MEMORY_MAX_SPANS")
+    tracing_file_path: str = Field(default="spans.jsonl", env="TRACING_FILE_PATH")
+    tracing_file_max_queued: int = Field(default=10000, env="TRACING_FILE_MAX_QUEUED")
+    admin_token: str | None = Field(default=None, env="ADMIN_TOKEN")
+    warmup_on_startup: bool = Field(default=True, env="WARMUP_ON_STARTUP")
+    warmup_top_films: int = Field(default=100, env="WARMUP_TOP_FILMS")
+    warmup_popular_ids: int = Field(default=200, env="WARMUP_POPULAR_IDS")
+    warmup_page_size: int = Field(default=20, env="WARMUP_PAGE_SIZE")
+    warmup_concurrency: int = Field(default=4, env="WARMUP_CONCURRENCY")
+    warmup_popular_queries: int = Field(default=50, env="WARMUP_POPULAR_QUERIES")
+    warmup_lock_timeout_in_seconds: int = Field(default=600, env="WARMUP_LOCK_TIMEOUT_SEC")
+    warmup_after_invalidation: bool = Field(default=True, env="WARMUP_AFTER_INVALIDATION")
+    warmup_invalidation_delay_in_seconds: float = Field(
+        default=30, env="WARMUP_INVALIDATION_DELAY_SEC"
+    )
+    popularity_sample_rate: float = Field(default=0.01, env="POPULARITY_SAMPLE_RATE")
+    popularity_max_ids: int = Field(default=1000, env="POPULARITY_MAX_IDS")
+    popularity_bucket_seconds: int = Field(default=3600, env="POPULARITY_BUCKET_SEC")
+    popularity_buckets: int = Field(default=24, env="POPULARITY_BUCKETS")
     base_dir: str = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    batch_max_ids: int = Field(default=50, env="BATCH_MAX_IDS")
+    facet_size: int = Field(default=20, env="FACET_SIZE")
     cache_expire_in_seconds: int = Field(default=60, env="CACHE_EXPIRE_SEC")
+    cache_film_list_expire_in_seconds: int = Field(default=60, env="CACHE_FILM_LIST_EXPIRE_SEC")
+    cache_film_search_expire_in_seconds: int = Field(default=60, env="CACHE_FILM_SEARCH_EXPIRE_SEC")
+    cache_person_list_expire_in_seconds: int = Field(default=60, env="CACHE_PERSON_LIST_EXPIRE_SEC")
+    cache_person_search_expire_in_seconds: int = Field(
+        default=60, env="CACHE_PERSON_SEARCH_EXPIRE_SEC"
+    )
+    cache_film_facets_expire_in_seconds: int = Field(
+        default=600, env="CACHE_FILM_FACETS_EXPIRE_SEC"
+    )
+    cache_genre_list_expire_in_seconds: int = Field(default=60, env="CACHE_GENRE_LIST_EXPIRE_SEC")
+    cache_suggest_expire_in_seconds: int = Field(default=30, env="CACHE_SUGGEST_EXPIRE_SEC")
+    cache_stale_ttl_in_seconds: int = Field(default=300, env="CACHE_STALE_TTL_SEC")
+    cache_refresh_retry_in_seconds: float = Field(default=5, env="CACHE_REFRESH_RETRY_SEC")
+    cache_local_expire_in_seconds: float = Field(default=5, env="CACHE_LOCAL_EXPIRE_SEC")
+    cache_local_max_entries: int = Field(default=1024, env="CACHE_LOCAL_MAX_ENTRIES")
+    cache_local_max_bytes: int = Field(default=32 * 1024 * 1024, env="CACHE_LOCAL_MAX_BYTES")
+    cache_lock_timeout_in_seconds: int = Field(default=10, env="CACHE_LOCK_TIMEOUT_SEC")
+    cache_lock_wait_in_seconds: float = Field(default=5, env="CACHE_LOCK_WAIT_SEC")
+    cache_generation_refresh_in_seconds: float = Field(
+        default=1, env="CACHE_GENERATION_REFRESH_SEC"
+    )
+    cache_refresh_ahead_in_seconds: float = Field(default=10, env="CACHE_REFRESH_AHEAD_SEC")
+    cache_hot_keys_sample_rate: float = Field(default=0.1, env="CACHE_HOT_KEYS_SAMPLE_RATE")
+    cache_hot_keys_min_count: int = Field(default=5, env="CACHE_HOT_KEYS_MIN_COUNT")
+    cache_hot_keys_top_k: int = Field(default=100, env="CACHE_HOT_KEYS_TOP_K")
+    cache_hot_keys_width: int = Field(default=1024, env="CACHE_HOT_KEYS_WIDTH")
+    cache_hot_keys_depth: int = Field(default=4, env="CACHE_HOT_KEYS_DEPTH")
+    cache_hot_keys_decay_interval: int = Field(default=10000, env="CACHE_HOT_KEYS_DECAY_INTERVAL")
+    cache_invalidation_channel: str = Field(
+        default="cache_invalidation", env="CACHE_INVALIDATION_CHANNEL"
+    )
+    cache_invalidation_retry_in_seconds: float = Field(
+        default=1, env="CACHE_INVALIDATION_RETRY_SEC"
+    )
     debug_log_level: bool = Field(default=False, env="DEBUG")
 
     class Config:
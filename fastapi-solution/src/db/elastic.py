@@ -2,8 +2,34 @@ from typing import Optional
 
 from elasticsearch import AsyncElasticsearch
 
+from core.config import settings
+from utils.metrics import get_elastic_in_flight
+
 es: Optional[AsyncElasticsearch] = None
 
 
 async def get_elastic() -> AsyncElasticsearch:
     return es
+
+
+def create_elastic() -> AsyncElasticsearch:
+    return AsyncElasticsearch(
+        hosts=[f"{settings.elastic_host}:{settings.elastic_port}"],
+        maxsize=settings.elastic_max_connections,
+        timeout=settings.elastic_timeout,
+        max_retries=settings.elastic_max_retries,
+        retry_on_timeout=settings.elastic_max_retries > 0,
+    )
+
+
+def get_pool_usage() -> dict[str, int]:
+    """
+    У каждого узла из hosts свой пул на elastic_max_connections соединений; занятыми
+    считаются соединения запросов, которые выполняются в этот момент.
+    """
+    if es is None:
+        return {"max": 0, "in_use": 0}
+    return {
+        "max": settings.elastic_max_connections * len(es.transport.hosts),
+        "in_use": get_elastic_in_flight(),
+    }
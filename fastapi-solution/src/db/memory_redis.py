@@ -0,0 +1,214 @@
+import asyncio
+import fnmatch
+from collections import defaultdict
+from time import monotonic
+from typing import Any, AsyncIterator
+
+Members = set[bytes]
+
+
+def _encode(value: Any) -> bytes:
+    if isinstance(value, bytes):
+        return value
+    return str(value).encode()
+
+
+def _rank_slice(length: int, start: int, end: int) -> slice:
+    """
+    Диапазон рангов по правилам redis: отрицательные индексы считаются с конца,
+    границы обрезаются по размеру множества, при start > end диапазон пуст.
+    """
+    start = max(length + start if start < 0 else start, 0)
+    end = min(length + end if end < 0 else end, length - 1)
+    return slice(start, end + 1) if start <= end else slice(0, 0)
+
+
+class InMemoryRedis:
+    """
+    Замена redis в памяти процесса для локального запуска и нагрузочных тестов.
+    Поддерживает только команды, которые использует слой кеширования.
+    """
+
+    def __init__(self):
+        self._data: dict[str, Any] = dict()
+        self._expires_at: dict[str, float] = dict()
+        self._locks: dict[str, asyncio.Lock] = defaultdict(asyncio.Lock)
+        self._subscribers: dict[str, set[asyncio.Queue]] = defaultdict(set)
+
+    def _get(self, key: str) -> Any:
+        expires_at = self._expires_at.get(key)
+        if expires_at is not None and expires_at <= monotonic():
+            self._data.pop(key, None)
+            self._expires_at.pop(key, None)
+        return self._data.get(key)
+
+    async def get(self, key: str) -> bytes | None:
+        return self._get(key)
+
+    async def mget(self, keys: list[str]) -> list[bytes | None]:
+        return [self._get(key) for key in keys]
+
+    async def set(self, key: str, value: Any, ex: int | None = None) -> bool:
+        self._data[key] = _encode(value)
+        if ex:
+            self._expires_at[key] = monotonic() + ex
+        else:
+            self._expires_at.pop(key, None)
+        return True
+
+    async def incr(self, key: str, amount: int = 1) -> int:
+        value = int(self._get(key) or 0) + amount
+        self._data[key] = _encode(value)
+        return value
+
+    async def delete(self, *keys: str) -> int:
+        deleted = 0
+        for key in keys:
+            deleted += self._get(key) is not None
+            self._data.pop(key, None)
+            self._expires_at.pop(key, None)
+        return deleted
+
+    async def expire(self, key: str, seconds: int) -> bool:
+        if self._get(key) is None:
+            return False
+        self._expires_at[key] = monotonic() + seconds
+        return True
+
+    async def sadd(self, key: str, *members: Any) -> int:
+        members_set = self._get(key)
+        if members_set is None:
+            members_set = self._data[key] = set()
+        added = {_encode(member) for member in members} - members_set
+        members_set.update(added)
+        return len(added)
+
+    async def smembers(self, key: str) -> Members:
+        return set(self._get(key) or ())
+
+    async def zincrby(self, key: str, amount: float, member: Any) -> float:
+        scores = self._get(key)
+        if scores is None:
+            scores = self._data[key] = dict()
+        member = _encode(member)
+        scores[member] = scores.get(member, 0) + amount
+        return scores[member]
+
+    async def zremrangebyrank(self, key: str, start: int, end: int) -> int:
+        scores = self._get(key) or dict()
+        ranked = sorted(scores, key=lambda member: (scores[member], member))
+        removed = ranked[_rank_slice(len(ranked), start, end)]
+        for member in removed:
+            del scores[member]
+        return len(removed)
+
+    async def zrevrange(
+        self, key: str, start: int, end: int, withscores: bool = False
+    ) -> list[bytes] | list[tuple[bytes, float]]:
+        scores = self._get(key) or dict()
+        ranked = sorted(scores, key=lambda member: (scores[member], member), reverse=True)
+        members = ranked[_rank_slice(len(ranked), start, end)]
+        if withscores:
+            return [(member, float(scores[member])) for member in members]
+        return members
+
+    async def zcard(self, key: str) -> int:
+        return len(self._get(key) or ())
+
+    async def keys(self, pattern: str = "*") -> list[bytes]:
+        return [key.encode() for key in list(self._data) if fnmatch.fnmatchcase(key, pattern)]
+
+    async def flushdb(self) -> bool:
+        self._data.clear()
+        self._expires_at.clear()
+        return True
+
+    async def publish(self, channel: str, message: Any) -> int:
+        for queue in self._subscribers[channel]:
+            queue.put_nowait({"type": "message", "channel": channel, "data": _encode(message)})
+        return len(self._subscribers[channel])
+
+    def pubsub(self, ignore_subscribe_messages: bool = False) -> "_PubSub":
+        return _PubSub(self)
+
+    def pipeline(self, transaction: bool = True) -> "_Pipeline":
+        return _Pipeline(self)
+
+    def lock(
+        self,
+        name: str,
+        timeout: float | None = None,
+        blocking: bool = True,
+        blocking_timeout: float | None = None,
+    ):
+        return _Lock(self._locks[name], blocking, blocking_timeout)
+
+    async def close(self) -> None:
+        pass
+
+
+class _Pipeline:
+    def __init__(self, redis: InMemoryRedis):
+        self._redis = redis
+        self._commands = list()
+
+    async def __aenter__(self) -> "_Pipeline":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        self._commands.clear()
+
+    def __getattr__(self, name: str):
+        command = getattr(self._redis, name)
+
+        def queue(*args, **kwargs) -> "_Pipeline":
+            self._commands.append((command, args, kwargs))
+            return self
+
+        return queue
+
+    async def execute(self) -> list[Any]:
+        commands, self._commands = self._commands, list()
+        return [await command(*args, **kwargs) for command, args, kwargs in commands]
+
+
+class _Lock:
+    def __init__(self, lock: asyncio.Lock, blocking: bool, blocking_timeout: float | None):
+        self._lock = lock
+        self._blocking = blocking
+        self._blocking_timeout = blocking_timeout
+
+    async def acquire(self) -> bool:
+        if not self._blocking and self._lock.locked():
+            return False
+        try:
+            await asyncio.wait_for(self._lock.acquire(), self._blocking_timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+    async def release(self) -> None:
+        self._lock.release()
+
+
+class _PubSub:
+    def __init__(self, redis: InMemoryRedis):
+        self._redis = redis
+        self._queue = asyncio.Queue()
+        self._channels = list()
+
+    async def __aenter__(self) -> "_PubSub":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        for channel in self._channels:
+            self._redis._subscribers[channel].discard(self._queue)
+
+    async def subscribe(self, *channels: str) -> None:
+        for channel in channels:
+            self._redis._subscribers[channel].add(self._queue)
+            self._channels.append(channel)
+
+    async def listen(self) -> AsyncIterator[dict]:
+        while True:
+            yield await self._queue.get()
@@ -1,9 +1,99 @@
 from typing import Optional
 
+from redis.asyncio import BlockingConnectionPool
 from redis.asyncio.client import Redis
+from redis.asyncio.cluster import RedisCluster
+from redis.asyncio.retry import Retry
+from redis.backoff import ExponentialBackoff
 
-redis: Optional[Redis] = None
+from core.config import settings
+from db.memory_redis import InMemoryRedis
+
+redis: Optional[Redis | RedisCluster | InMemoryRedis] = None
+_memory_redis: Optional[InMemoryRedis] = None
 
 
 async def get_redis() -> Redis:
     return redis
+
+
+def create_redis(
+    max_connections: int = settings.redis_max_connections,
+    socket_timeout: float | None = settings.redis_timeout,
+) -> Redis | RedisCluster | InMemoryRedis:
+    """
+    Создаёт клиент в режиме settings.redis_mode.
+    В режиме cluster max_connections ограничивает число соединений с каждым узлом,
+    а чтение при redis_read_from_replicas идёт с реплик.
+    :param socket_timeout: None для клиентов, которые долго ждут сообщений, например pub/sub
+    """
+    if settings.redis_mode == "memory":
+        return _get_memory_redis()
+    if settings.redis_mode == "cluster":
+        return RedisCluster(
+            host=settings.redis_host,
+            port=settings.redis_port,
+            read_from_replicas=settings.redis_read_from_replicas,
+            max_connections=max_connections,
+            socket_timeout=socket_timeout,
+            socket_connect_timeout=settings.redis_connect_timeout,
+            socket_keepalive=settings.redis_keepalive,
+            health_check_interval=settings.redis_health_check_interval,
+            retry=Retry(ExponentialBackoff(), settings.redis_max_retries),
+        )
+    return _create_standalone_redis(max_connections, socket_timeout)
+
+
+def create_pubsub_redis() -> Redis | InMemoryRedis:
+    """
+    Асинхронный клиент кластера не поддерживает pub/sub, а PUBLISH кластер
+    рассылает всем узлам, поэтому подписка всегда идёт через клиент к одному узлу.
+    """
+    if settings.redis_mode == "memory":
+        return _get_memory_redis()
+    return _create_standalone_redis(max_connections=2, socket_timeout=None)
+
+
+def _create_standalone_redis(max_connections: int, socket_timeout: float | None) -> Redis:
+    """
+    Пул блокирующий: при исчерпании соединений запрос ждёт освобождения
+    не дольше redis_pool_timeout, а не получает ошибку сразу.
+    """
+    pool = BlockingConnectionPool(
+        host=settings.redis_host,
+        port=settings.redis_port,
+        max_connections=max_connections,
+        timeout=settings.redis_pool_timeout,
+        socket_timeout=socket_timeout,
+        socket_connect_timeout=settings.redis_connect_timeout,
+        socket_keepalive=settings.redis_keepalive,
+        health_check_interval=settings.redis_health_check_interval,
+        retry=Retry(ExponentialBackoff(), settings.redis_max_retries),
+        retry_on_timeout=settings.redis_max_retries > 0,
+    )
+    return Redis(connection_pool=pool)
+
+
+def _get_memory_redis() -> InMemoryRedis:
+    global _memory_redis
+    if _memory_redis is None:
+        _memory_redis = InMemoryRedis()
+    return _memory_redis
+
+
+def get_pool_usage() -> dict[str, int]:
+    if redis is None or isinstance(redis, InMemoryRedis):
+        return {"max": 0, "created": 0, "in_use": 0}
+    if isinstance(redis, RedisCluster):
+        nodes = redis.get_nodes()
+        return {
+            "max": sum(node.max_connections for node in nodes),
+            "created": sum(len(node._connections) for node in nodes),
+            "in_use": sum(len(node._connections) - len(node._free) for node in nodes),
+        }
+    pool = redis.connection_pool
+    return {
+        "max": pool.max_connections,
+        "created": len(pool._connections),
+        "in_use": pool.max_connections - pool.pool.qsize(),
+    }
@@ -1,14 +1,22 @@
+import asyncio
+from http import HTTPStatus
+
 import uvicorn
-from elasticsearch import AsyncElasticsearch
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.responses import ORJSONResponse
-from redis.asyncio import Redis
 
-from api.v1 import films, genres, persons
+from api import metrics
+from api.v1 import admin, films, genres, persons, suggest
 from core import config
 from core.config import settings
 from core.logger import get_logging_config_dict
 from db import elastic, redis
+from services.warmup import CacheWarmer
+from utils.cache_invalidation import listen_invalidations
+from utils.compression import CompressionMiddleware
+from utils.exceptions import InvalidCursorException
+from utils.metrics import MetricsMiddleware
+from utils.tracing import TracingMiddleware, get_exporter
 
 app = FastAPI(
     title=settings.project_name,
@@ -16,23 +24,56 @@ app = FastAPI(
     openapi_url="/api/openapi.json",
     default_response_class=ORJSONResponse,
 )
+app.add_middleware(CompressionMiddleware)
+if settings.metrics_enabled:
+    app.add_middleware(MetricsMiddleware)
+if settings.tracing_enabled:
+    app.add_middleware(TracingMiddleware)
+
+
+@app.exception_handler(InvalidCursorException)
+async def invalid_cursor(request: Request, exc: InvalidCursorException) -> ORJSONResponse:
+    """
+    Курсор может оказаться недействительным уже во время поиска: например,
+    если point in time истёк.
+    """
+    return ORJSONResponse(status_code=HTTPStatus.BAD_REQUEST, content={"detail": "invalid cursor"})
 
 
 @app.on_event("startup")
 async def startup():
-    redis.redis = Redis(host=settings.redis_host, port=settings.redis_port)
-    elastic.es = AsyncElasticsearch(hosts=[f"{settings.elastic_host}:{settings.elastic_port}"])
+    redis.redis = redis.create_redis()
+    elastic.es = elastic.create_elastic()
+    app.state.warmer = CacheWarmer()
+    app.state.invalidation_redis = redis.create_pubsub_redis()
+    app.state.cache_invalidation = asyncio.create_task(
+        listen_invalidations(
+            app.state.invalidation_redis,
+            app.state.warmer.schedule if settings.warmup_after_invalidation else None,
+        )
+    )
+    if settings.warmup_on_startup:
+        app.state.warmer.start()
 
 
 @app.on_event("shutdown")
 async def shutdown():
+    await app.state.warmer.stop()
+    app.state.cache_invalidation.cancel()
+    await app.state.invalidation_redis.close()
     await redis.redis.close()
     await elastic.es.close()
+    if (exporter := get_exporter()) is not None:
+        await asyncio.to_thread(exporter.close)
 
 
 app.include_router(films.router, prefix="/api/v1/films", tags=["films"])
 app.include_router(genres.router, prefix="/api/v1/genres", tags=["genres"])
 app.include_router(persons.router, prefix="/api/v1/persons", tags=["persons"])
+app.include_router(suggest.router, prefix="/api/v1/suggest", tags=["suggest"])
+app.include_router(admin.router, prefix="/api/v1/admin", tags=["admin"])
+if settings.metrics_enabled:
+    app.include_router(metrics.router)
 
 
 if __name__ == "__main__":
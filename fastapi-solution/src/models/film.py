@@ -28,6 +28,11 @@ class FilmGenre(BaseModel):
     name: str
 
 
+class FilmSuggestion(BaseOrjsonModel):
+    id: str
+    title: str
+
+
 class FilmBrief(BaseOrjsonModel):
     id: str
     title: str
@@ -40,3 +45,20 @@ class FilmDetail(FilmBrief):
     writers: list[FilmPerson]
     directors: list[FilmPerson]
     genres: list[FilmGenre]
+
+
+class FacetValue(BaseModel):
+    id: str
+    name: str
+    count: int
+
+
+class RatingFacetValue(BaseModel):
+    value: float
+    count: int
+
+
+class FilmFacets(BaseOrjsonModel):
+    genres: list[FacetValue]
+    directors: list[FacetValue]
+    imdb_rating: list[RatingFacetValue]
@@ -12,3 +12,7 @@ class BaseOrjsonModel(BaseModel):
 class Paginator(BaseModel):
     page_number: int = Query(default=1, ge=0)
     page_size: int = Query(default=20, ge=1, le=50)
+
+
+class Total(BaseOrjsonModel):
+    total: int
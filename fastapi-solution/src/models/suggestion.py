@@ -0,0 +1,8 @@
+from models.film import FilmSuggestion
+from models.person import PersonBrief
+from models.shared import BaseOrjsonModel
+
+
+class Suggestions(BaseOrjsonModel):
+    films: list[FilmSuggestion]
+    persons: list[PersonBrief]
@@ -1,38 +1,121 @@
 import logging
-from copy import deepcopy
-from enum import Enum
-from typing import Any, Type, Union
+from functools import partial
+from typing import Type, Union
 
 from elasticsearch import AsyncElasticsearch, NotFoundError
 from pydantic import BaseModel
-from pydantic.main import ModelMetaclass
 from redis.asyncio.client import Redis
 
+from core.config import settings
 from models.film import FilmDetail
 from models.genre import GenreDetail
+from services.query_plan import (
+    ID_TIEBREAKER,
+    FacetPlan,
+    FilterPlan,
+    SortingOrder,
+    SortPlan,
+    compile_filter_plan,
+    compile_filter_plans,
+    compile_sort_plans,
+    get_source_includes,
+)
+from utils.cache_keys import hash_arguments
+from utils.cursor import Cursor, Page
+from utils.exceptions import InvalidCursorException
+from utils.metrics import observe_elastic
+from utils.tracing import start_span
 
 logger = logging.getLogger(__name__)
 
 
-class SortingOrder(Enum):
-    ASC = "asc"
-    DESC = "desc"
-
-
 class Service:
+    index: str
+    detail_model: Type[BaseModel]
+    search_model: Type[BaseModel] | None = None
+    filters_cls: type | None = None
+    ALLOWED_SORT_FIELDS: dict[str, str] = dict()
+    FACET_PLANS: dict[str, FacetPlan] = dict()
+
     def __init__(self, redis: Redis, elastic: AsyncElasticsearch):
         self.redis = redis
         self.elastic = elastic
-        self.ALLOWED_SORT_FIELDS = dict()
+        self._sort_plans: dict[Type[BaseModel], dict[str, SortPlan]] = dict()
+        self._filter_plans: dict[Type[BaseModel], dict[str, FilterPlan | None]] = dict()
+        if self.search_model is not None:
+            self._compile_plans(self.search_model)
+
+    def _compile_plans(self, model: Type[BaseModel]) -> None:
+        self._sort_plans[model] = compile_sort_plans(model, self.ALLOWED_SORT_FIELDS)
+        self._filter_plans[model] = (
+            compile_filter_plans(self.filters_cls, model) if self.filters_cls else dict()
+        )
 
     async def _get_obj_from_elastic(
         self, obj_id: str, index: str, model_cls: Type[Union[FilmDetail, GenreDetail]]
     ) -> BaseModel | None:
-        try:
-            doc = await self.elastic.get(index, obj_id)
-        except NotFoundError:
-            return None
-        return model_cls(**doc["_source"])
+        with start_span("Service.get_obj", index=index) as span:
+            try:
+                doc = await observe_elastic("get", self.elastic.get(index, obj_id))
+            except NotFoundError:
+                span.set_attribute("found", False)
+                return None
+            span.set_attribute("found", True)
+            return model_cls(**doc["_source"])
+
+    async def _get_objs_from_elastic(
+        self, obj_ids: list[str], index: str, model_cls: Type[BaseModel]
+    ) -> dict[str, BaseModel]:
+        docs = await observe_elastic("mget", self.elastic.mget(body={"ids": obj_ids}, index=index))
+        return {doc["_id"]: model_cls(**doc["_source"]) for doc in docs["docs"] if doc["found"]}
+
+    async def get_by_ids(
+        self,
+        obj_ids: list[str],
+        model_cls: Type[BaseModel] | None = None,
+        rendered: bool = False,
+    ) -> list[BaseModel] | bytes:
+        """
+        Пакетная версия get_by_id с теми же ключами кеша: порядок obj_ids
+        сохраняется, повторы отдаются повторно, ненайденные объекты пропускаются.
+        :param rendered: вернуть готовый json-массив вместо списка объектов
+        """
+        # utils.caching сам импортирует Service, поэтому импорт здесь
+        from utils.caching import get_many
+
+        model_cls = model_cls or self.detail_model
+        return await get_many(
+            self.get_by_id,
+            obj_ids,
+            partial(self._get_objs_from_elastic, index=self.index, model_cls=model_cls),
+            rendered=rendered,
+            model_cls=model_cls,
+        )
+
+    async def _get_suggestions_from_elastic(
+        self, field: str, prefix: str, size: int, model: Type[BaseModel]
+    ) -> list[BaseModel]:
+        """
+        Подсказки completion-suggester: читаются из памяти индекса без поиска
+        по документам, поэтому дешевле match-запроса на каждое нажатие клавиши.
+        """
+        body = {
+            "_source": list(get_source_includes(model)),
+            "suggest": {
+                "suggestion": {"prefix": prefix, "completion": {"field": field, "size": size}}
+            },
+        }
+        response = await observe_elastic(
+            "suggest",
+            self.elastic.search(
+                index=self.index, body=body, size=0, filter_path="took,suggest.*.options._source"
+            ),
+        )
+        return [
+            model.construct(**option["_source"])
+            for suggestion in response.get("suggest", {}).get("suggestion", ())
+            for option in suggestion.get("options", ())
+        ]
 
     async def search(
         self,
@@ -43,88 +126,215 @@ class Service:
         page_size: int,
         filters: dict[str, list | None],
         query: tuple[str, str] | None = None,
+        cursor: Cursor | None = None,
+        source_model: Type[BaseModel] | None = None,
+        aggregations: dict | None = None,
     ) -> list[BaseModel]:
-        if query:
-            field, query = query
-            query = {
-                "query": {
-                    "bool": {"must": {"match": {field: {"query": query, "fuzziness": "auto"}}}}
-                }
-            }
-        else:
-            query = {"query": {"bool": {"must": {"match_all": {}}}}}
+        """
+        :param source_model: модель, для построения которой достаточно возвращаемых полей;
+            по умолчанию документ возвращается целиком
+        :param aggregations: агрегации, которые вычисляются в том же запросе, что и документы
+        """
+        with start_span("Service.search", index=self.index, page_size=page_size) as span:
+            body, params = self._build_search(
+                model, sort, page_number, page_size, filters, query, cursor, source_model
+            )
+            if aggregations:
+                body["aggs"] = aggregations
+            if cursor and cursor.pit_id:
+                index = None
+            logger.debug("Elastic query: %s", body)
 
-        filters = {k: v for k, v in filters.items() if v is not None}
+            try:
+                docs = await observe_elastic(
+                    "search", self.elastic.search(index=index, body=body, **params)
+                )
+            except NotFoundError as e:
+                if cursor and cursor.pit_id:
+                    raise InvalidCursorException("Point in time курсора истёк") from e
+                raise
+            span.set_attribute("hits", len(docs["hits"]["hits"]))
+            return docs
 
-        query = self._add_query_filters(query, filters, model)
-        logger.info("Elastic query: {}", query)
+    async def _get_facets_from_elastic(
+        self, model: Type[BaseModel], filters: dict, query: tuple[str, str] | None = None
+    ) -> dict[str, list[dict]]:
+        """
+        Считает все фасеты FACET_PLANS одним запросом без документов: такой
+        запрос Elasticsearch кеширует в shard request cache.
+        """
+        response = await self.search(
+            index=self.index,
+            model=model,
+            sort=None,
+            page_number=1,
+            page_size=0,
+            filters=filters,
+            query=query,
+            aggregations={name: plan.aggregation for name, plan in self.FACET_PLANS.items()},
+        )
+        return {
+            name: plan.parse(response["aggregations"][name])
+            for name, plan in self.FACET_PLANS.items()
+        }
 
-        docs = await self.elastic.search(
-            index=index,
-            body=query,
-            from_=(page_number - 1) * page_size,
-            size=page_size,
-            sort=self._make_sort_string(sort, model),
+    async def count(
+        self, model: Type[BaseModel], filters: dict, query: tuple[str, str] | None = None
+    ) -> int:
+        body, params = self._build_search(model, None, 1, 0, filters, query)
+        params.update(track_total_hits=True, filter_path="took,hits.total.value")
+        logger.debug("Elastic query: %s", body)
+
+        response = await observe_elastic(
+            "count", self.elastic.search(index=self.index, body=body, **params)
         )
-        return docs
+        return response["hits"]["total"]["value"]
 
-    def _make_sort_string(self, sort_fields: list[str] | None, model: BaseModel) -> str:
-        if sort_fields is None:
-            return "id:desc"
+    async def open_point_in_time(self) -> str:
+        response = await self.elastic.transport.perform_request(
+            "POST", f"/{self.index}/_pit", params={"keep_alive": settings.elastic_pit_keep_alive}
+        )
+        return response["id"]
 
-        prepared_sort_fields = []
-        for field in sort_fields:
-            sort_order = (
-                SortingOrder.DESC.value if field.startswith("-") else SortingOrder.ASC.value
-            )
-            sort_by = field.strip("-")
-            if sort_by in model.__fields__ and sort_by in self.ALLOWED_SORT_FIELDS:
-                prepared_sort_fields.append(f"{self.ALLOWED_SORT_FIELDS[sort_by]}:{sort_order}")
-        return ",".join(prepared_sort_fields)
+    @staticmethod
+    def _build_trusted(model: Type[BaseModel], docs: dict) -> list[BaseModel]:
+        """
+        Документы в elastic уже проверены ETL, поэтому модели ответа
+        собираются из них без повторной валидации.
+        """
+        with start_span("models.build", model=model.__name__):
+            return [model.construct(**doc["_source"]) for doc in docs["hits"]["hits"]]
 
-    def _add_query_filters(self, query: dict, filters: dict, model: Type[BaseModel]) -> dict:
-        query_filters = list()
+    def _build_page(self, model: Type[BaseModel], docs: dict, page_size: int) -> Page:
+        """
+        Значения сортировки берутся из hits[-1]["sort"]: только они точно
+        совпадают с тем, с чем elastic сравнивает search_after.
+        """
+        hits = docs["hits"]["hits"]
+        search_after = hits[-1]["sort"] if hits and len(hits) == page_size else None
+        return Page(self._build_trusted(model, docs), search_after, docs.get("pit_id"))
 
-        for filter_field, values in filters.items():
-            if path := self._generate_filter_path(filter_field, model):
-                query_filter = self._generate_filter(path, values)
-                query_filters.append(query_filter)
+    def make_cursor(
+        self,
+        search_after: list,
+        sort_fields: list[str] | None,
+        model: Type[BaseModel],
+        pit_id: str | None = None,
+    ) -> Cursor:
+        return Cursor(
+            search_after=search_after,
+            sort=self._make_sort_string(sort_fields, model),
+            pit_id=pit_id,
+        )
 
-        if query_filters:
-            query["query"]["bool"]["filter"] = query_filters
+    def check_cursor(
+        self, cursor: Cursor, sort_fields: list[str] | None, model: Type[BaseModel]
+    ) -> None:
+        """
+        Курсор подходит только к сортировке, для которой он выдан: иначе
+        search_after не совпадёт с полями сортировки и elastic ответит ошибкой.
+        """
+        sort_plans = self._get_sort_plans(sort_fields, model)
+        if cursor.sort != self._make_sort_string(sort_fields, model):
+            raise InvalidCursorException("Курсор выдан для другой сортировки")
+        if len(cursor.search_after) != len(sort_plans) or not all(
+            value is None or isinstance(value, (str, int, float)) for value in cursor.search_after
+        ):
+            raise InvalidCursorException("Некорректные значения search_after в курсоре")
 
-        return query
+    def _build_search(
+        self,
+        model: Type[BaseModel],
+        sort: list[str] | None,
+        page_number: int,
+        page_size: int,
+        filters: dict[str, list | None],
+        query: tuple[str, str] | None = None,
+        cursor: Cursor | None = None,
+        source_model: Type[BaseModel] | None = None,
+    ) -> tuple[dict, dict]:
+        body = {"query": self._build_query(filters, model, query)}
 
-    def _generate_filter(self, path: list, values: Any):
-        inner_insert = {"nested": {"path": str(), "query": {}}}
-        f = dict()
-        curr = f
+        params = dict(size=page_size, track_total_hits=False)
+        if page_size:
+            params["sort"] = self._make_sort_string(sort, model)
+        if source_model is not None:
+            params["_source_includes"] = get_source_includes(source_model)
+        if cursor:
+            body["search_after"] = cursor.search_after
+            if cursor.pit_id:
+                body["pit"] = {"id": cursor.pit_id, "keep_alive": settings.elastic_pit_keep_alive}
+        else:
+            params["from_"] = (page_number - 1) * page_size
+        if not query and not (cursor and cursor.pit_id):
+            self._add_cache_routing(body, params)
+        return body, params
 
-        for i in range(1, len(path)):
-            curr.update(deepcopy(inner_insert))
-            curr["nested"]["path"] = ".".join(path[:i])
-            curr = curr["nested"]["query"]
-        curr.update({"terms": {".".join(path): values}})
+    @staticmethod
+    def _add_cache_routing(body: dict, params: dict) -> None:
+        """
+        Запросы без текстового поиска не зависят от релевантности, поэтому
+        их результаты можно брать из shard request cache. Одинаковые запросы
+        направляются на одни и те же копии шардов, иначе каждая реплика
+        прогревала бы свой кеш отдельно.
+        """
+        if settings.elastic_request_cache:
+            params["request_cache"] = True
+        if settings.elastic_preference_by_query:
+            params["preference"] = hash_arguments(body)
 
-        return f
+    def _build_query(
+        self, filters: dict, model: Type[BaseModel], query: tuple[str, str] | None = None
+    ) -> dict:
+        """
+        Без текстового запроса фильтры выполняются в filter context без подсчёта
+        релевантности: такие условия Elasticsearch кеширует между запросами.
+        """
+        query_filters = self._get_query_filters(filters, model)
+        if query:
+            field, query = query
+            bool_query = {"must": {"match": {field: {"query": query, "fuzziness": "auto"}}}}
+            if query_filters:
+                bool_query["filter"] = query_filters
+            return {"bool": bool_query}
+        if query_filters:
+            return {"constant_score": {"filter": {"bool": {"filter": query_filters}}}}
+        return {"match_all": {}}
 
-    def _generate_filter_path(self, filter_path: list, root_model: Type[BaseModel]):
-        path = list()
-        while filter_path:
-            path_field = str()
+    def _get_plans(
+        self, model: Type[BaseModel]
+    ) -> tuple[dict[str, SortPlan], dict[str, FilterPlan | None]]:
+        if model not in self._sort_plans:
+            self._compile_plans(model)
+        return self._sort_plans[model], self._filter_plans[model]
 
-            for field_name, field in root_model.__fields__.items():
-                if filter_path.startswith(field_name):
-                    path_field = field_name
-                    filter_path = filter_path.lstrip(field_name).lstrip("_")
+    def _get_sort_plans(
+        self, sort_fields: list[str] | None, model: Type[BaseModel]
+    ) -> list[SortPlan]:
+        """
+        :return: планы сортировки по допустимым полям; последним всегда идёт id,
+            чтобы порядок был однозначным
+        """
+        sort_plans, _ = self._get_plans(model)
+        prepared_sort_fields = [
+            sort_plans[field] for field in sort_fields or () if field in sort_plans
+        ]
+        prepared_sort_fields.append(ID_TIEBREAKER)
+        return prepared_sort_fields
 
-                    if isinstance(field.type_, ModelMetaclass):
-                        root_model = field.type_
+    def _make_sort_string(self, sort_fields: list[str] | None, model: Type[BaseModel]) -> str:
+        return ",".join(sort_plan.clause for sort_plan in self._get_sort_plans(sort_fields, model))
 
-            if not path_field:
-                logger.warning("Invalid filter path: {}", filter_path)
-                return
+    def _get_query_filters(self, filters: dict, model: Type[BaseModel]) -> list[dict]:
+        _, filter_plans = self._get_plans(model)
+        query_filters = list()
 
-            path.append(path_field)
+        for filter_field, values in filters.items():
+            if values is None:
+                continue
+            if filter_field not in filter_plans:
+                filter_plans[filter_field] = compile_filter_plan(filter_field, model)
+            if filter_plan := filter_plans[filter_field]:
+                query_filters.append(filter_plan.build(values))
 
-        return path
+        return query_filters
@@ -5,46 +5,124 @@ from elasticsearch import AsyncElasticsearch
 from fastapi import Depends
 from redis.asyncio.client import Redis
 
+from core.config import settings
 from db.elastic import get_elastic
 from db.redis import get_redis
-from models.film import FilmDetail, FilmBrief
+from models.film import FilmFacets, FilmFilters, FilmDetail, FilmBrief, FilmSuggestion
 from services.base import Service
+from services.query_plan import HistogramFacetPlan, TermsFacetPlan
+from utils.cache_serializer import OrjsonCacheSerializer, PageCacheSerializer
+from utils.cache_keys import SEARCH_KEY_NORMALIZERS
 from utils.caching import cache
+from utils.cursor import Cursor, Page, uses_point_in_time
 
 logger = logging.getLogger(__name__)
 
 
 class FilmService(Service):
-    @cache()
+    index = "movies"
+    detail_model = FilmDetail
+    search_model = FilmDetail
+    filters_cls = FilmFilters
+    ALLOWED_SORT_FIELDS = {"title": "title.raw", "imdb_rating": "imdb_rating"}
+    FACET_PLANS = {
+        "genres": TermsFacetPlan("genres", settings.facet_size),
+        "directors": TermsFacetPlan("directors", settings.facet_size),
+        "imdb_rating": HistogramFacetPlan("imdb_rating", 1),
+    }
+
+    @cache(
+        stale_ttl=settings.cache_stale_ttl_in_seconds,
+        distributed_lock=True,
+        local_expire=settings.cache_local_expire_in_seconds,
+        serializer=OrjsonCacheSerializer(FilmDetail),
+        by_id=True,
+    )
     async def get_by_id(self, obj_id: str, model_cls=FilmDetail) -> FilmDetail | None:
-        return await self._get_obj_from_elastic(obj_id, "movies", model_cls)
+        return await self._get_obj_from_elastic(obj_id, self.index, model_cls)
 
+    @cache(
+        expire=settings.cache_film_list_expire_in_seconds,
+        serializer=PageCacheSerializer(list[FilmBrief]),
+        key_normalizers=SEARCH_KEY_NORMALIZERS,
+        bypass=uses_point_in_time,
+    )
     async def get_list(
-        self, sort: list[str] | None, page_number: int, page_size: int, filters: dict
-    ) -> list[FilmBrief]:
+        self,
+        sort: list[str] | None,
+        page_number: int,
+        page_size: int,
+        filters: dict,
+        cursor: Cursor | None = None,
+    ) -> Page:
         docs = await self.search(
-            index="movies",
+            index=self.index,
             model=FilmDetail,
             sort=sort,
             page_number=page_number,
             page_size=page_size,
             filters=filters,
+            cursor=cursor,
+            source_model=FilmBrief,
         )
-        return [FilmDetail(**doc["_source"]) for doc in docs["hits"]["hits"]]
+        return self._build_page(FilmBrief, docs, page_size)
 
+    @cache(
+        expire=settings.cache_film_search_expire_in_seconds,
+        serializer=PageCacheSerializer(list[FilmBrief]),
+        key_normalizers=SEARCH_KEY_NORMALIZERS,
+        bypass=uses_point_in_time,
+    )
     async def get_by_query(
-        self, query: str, sort: list[str] | None, page_number: int, page_size: int, filters: dict
-    ) -> list[FilmDetail]:
+        self,
+        query: str,
+        sort: list[str] | None,
+        page_number: int,
+        page_size: int,
+        filters: dict,
+        cursor: Cursor | None = None,
+    ) -> Page:
         docs = await self.search(
-            index="movies",
+            index=self.index,
             model=FilmDetail,
             sort=sort,
             page_number=page_number,
             page_size=page_size,
             filters=filters,
             query=("title", query) if query else None,
+            cursor=cursor,
+            source_model=FilmBrief,
+        )
+        return self._build_page(FilmBrief, docs, page_size)
+
+    @cache(
+        expire=settings.cache_film_facets_expire_in_seconds,
+        serializer=OrjsonCacheSerializer(FilmFacets),
+        key_normalizers=SEARCH_KEY_NORMALIZERS,
+    )
+    async def get_facets(self, query: str | None, filters: dict) -> FilmFacets:
+        facets = await self._get_facets_from_elastic(
+            FilmDetail, filters, ("title", query) if query else None
+        )
+        return FilmFacets(**facets)
+
+    @cache(
+        expire=settings.cache_film_list_expire_in_seconds,
+        serializer=OrjsonCacheSerializer(int),
+        key_normalizers=SEARCH_KEY_NORMALIZERS,
+    )
+    async def get_count(self, query: str | None, filters: dict) -> int:
+        return await self.count(FilmDetail, filters, ("title", query) if query else None)
+
+    @cache(
+        expire=settings.cache_suggest_expire_in_seconds,
+        local_expire=settings.cache_local_expire_in_seconds,
+        serializer=OrjsonCacheSerializer(list[FilmSuggestion]),
+    )
+    async def suggest(self, prefix: str, size: int) -> list[FilmSuggestion]:
+        return await self._get_suggestions_from_elastic(
+            "title_suggest", prefix, size, FilmSuggestion
         )
-        return [FilmDetail(**doc["_source"]) for doc in docs["hits"]["hits"]]
 
 
 @lru_cache()
@@ -52,6 +130,4 @@ def get_film_service(
     redis: Redis = Depends(get_redis),
     elastic: AsyncElasticsearch = Depends(get_elastic),
 ) -> FilmService:
-    film_service = FilmService(redis, elastic)
-    film_service.ALLOWED_SORT_FIELDS = {"title": "title.raw", "imdb_rating": "imdb_rating"}
-    return film_service
+    return FilmService(redis, elastic)
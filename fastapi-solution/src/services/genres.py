@@ -5,33 +5,53 @@ from elasticsearch import AsyncElasticsearch
 from fastapi import Depends
 from redis.asyncio.client import Redis
 
+from core.config import settings
 from db.elastic import get_elastic
 from db.redis import get_redis
-from models.genre import GenreDetail, GenreBrief
+from models.genre import GenreFilters, GenreDetail, GenreBrief
 from services.base import Service
+from utils.cache_serializer import OrjsonCacheSerializer
+from utils.cache_keys import SEARCH_KEY_NORMALIZERS
 from utils.caching import cache
 
 logger = logging.getLogger(__name__)
 
 
 class GenreService(Service):
-    @cache()
+    index = "genres"
+    detail_model = GenreDetail
+    search_model = GenreBrief
+    filters_cls = GenreFilters
+    ALLOWED_SORT_FIELDS = {"name": "name.raw", "description": "description.raw"}
+
+    @cache(
+        stale_ttl=settings.cache_stale_ttl_in_seconds,
+        local_expire=settings.cache_local_expire_in_seconds,
+        serializer=OrjsonCacheSerializer(GenreDetail),
+        by_id=True,
+    )
     async def get_by_id(self, obj_id: str, model_cls=GenreDetail) -> GenreDetail | None:
-        return await self._get_obj_from_elastic(obj_id, "genres", model_cls)
-
-    @cache()
+        return await self._get_obj_from_elastic(obj_id, self.index, model_cls)
+
+    @cache(
+        expire=settings.cache_genre_list_expire_in_seconds,
+        local_expire=settings.cache_local_expire_in_seconds,
+        serializer=OrjsonCacheSerializer(list[GenreBrief]),
+        key_normalizers=SEARCH_KEY_NORMALIZERS,
+    )
     async def get_list(
         self, sort: list[str] | None, page_number: int, page_size: int, filters: dict
     ) -> list[GenreBrief]:
         docs = await self.search(
-            index="genres",
+            index=self.index,
             model=GenreBrief,
             sort=sort,
             page_number=page_number,
             page_size=page_size,
             filters=filters,
+            source_model=GenreBrief,
         )
-        return [GenreBrief(**doc["_source"]) for doc in docs["hits"]["hits"]]
+        return self._build_trusted(GenreBrief, docs)
 
 
 @lru_cache()
@@ -39,6 +59,4 @@ def get_genre_service(
     redis: Redis = Depends(get_redis),
     elastic: AsyncElasticsearch = Depends(get_elastic),
 ) -> GenreService:
-    genre_service = GenreService(redis, elastic)
-    genre_service.ALLOWED_SORT_FIELDS = {"name": "name.raw", "description": "description.raw"}
-    return genre_service
+    return GenreService(redis, elastic)
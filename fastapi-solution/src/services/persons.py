@@ -5,46 +5,105 @@ from elasticsearch import AsyncElasticsearch
 from fastapi import Depends
 from redis.asyncio.client import Redis
 
+from core.config import settings
 from db.elastic import get_elastic
 from db.redis import get_redis
-from models.person import PersonDetail, PersonBrief
+from models.person import PersonFilters, PersonDetail, PersonBrief
 from services.base import Service
+from utils.cache_serializer import OrjsonCacheSerializer, PageCacheSerializer
+from utils.cache_keys import SEARCH_KEY_NORMALIZERS
 from utils.caching import cache
+from utils.cursor import Cursor, Page, uses_point_in_time
 
 logger = logging.getLogger(__name__)
 
 
 class PersonService(Service):
-    @cache()
+    index = "persons"
+    detail_model = PersonDetail
+    search_model = PersonDetail
+    filters_cls = PersonFilters
+    ALLOWED_SORT_FIELDS = {"full_name": "full_name.raw"}
+
+    @cache(
+        stale_ttl=settings.cache_stale_ttl_in_seconds,
+        serializer=OrjsonCacheSerializer(PersonDetail),
+        by_id=True,
+    )
     async def get_by_id(self, obj_id: str, model_cls=PersonDetail) -> PersonDetail | None:
-        return await self._get_obj_from_elastic(obj_id, "persons", model_cls)
+        return await self._get_obj_from_elastic(obj_id, self.index, model_cls)
 
+    @cache(
+        expire=settings.cache_person_list_expire_in_seconds,
+        serializer=PageCacheSerializer(list[PersonBrief]),
+        key_normalizers=SEARCH_KEY_NORMALIZERS,
+        bypass=uses_point_in_time,
+    )
     async def get_list(
-        self, sort: list[str] | None, page_number: int, page_size: int, filters: dict
-    ) -> list[PersonBrief]:
+        self,
+        sort: list[str] | None,
+        page_number: int,
+        page_size: int,
+        filters: dict,
+        cursor: Cursor | None = None,
+    ) -> Page:
         docs = await self.search(
-            index="persons",
+            index=self.index,
             model=PersonDetail,
             sort=sort,
             page_number=page_number,
             page_size=page_size,
             filters=filters,
+            cursor=cursor,
+            source_model=PersonBrief,
         )
-        return [PersonDetail(**doc["_source"]) for doc in docs["hits"]["hits"]]
+        return self._build_page(PersonBrief, docs, page_size)
 
+    @cache(
+        expire=settings.cache_person_search_expire_in_seconds,
+        serializer=PageCacheSerializer(list[PersonBrief]),
+        key_normalizers=SEARCH_KEY_NORMALIZERS,
+        bypass=uses_point_in_time,
+    )
     async def get_by_query(
-        self, query: str, sort: list[str] | None, page_number: int, page_size: int, filters: dict
-    ) -> list[PersonDetail]:
+        self,
+        query: str,
+        sort: list[str] | None,
+        page_number: int,
+        page_size: int,
+        filters: dict,
+        cursor: Cursor | None = None,
+    ) -> Page:
         docs = await self.search(
-            index="persons",
+            index=self.index,
             model=PersonDetail,
             sort=sort,
             page_number=page_number,
             page_size=page_size,
             filters=filters,
-            query=("title", query) if query else None,
+            query=("full_name", query) if query else None,
+            cursor=cursor,
+            source_model=PersonBrief,
+        )
+        return self._build_page(PersonBrief, docs, page_size)
+
+    @cache(
+        expire=settings.cache_person_list_expire_in_seconds,
+        serializer=OrjsonCacheSerializer(int),
+        key_normalizers=SEARCH_KEY_NORMALIZERS,
+    )
+    async def get_count(self, query: str | None, filters: dict) -> int:
+        return await self.count(PersonDetail, filters, ("full_name", query) if query else None)
+
+    @cache(
+        expire=settings.cache_suggest_expire_in_seconds,
+        local_expire=settings.cache_local_expire_in_seconds,
+        serializer=OrjsonCacheSerializer(list[PersonBrief]),
+    )
+    async def suggest(self, prefix: str, size: int) -> list[PersonBrief]:
+        return await self._get_suggestions_from_elastic(
+            "full_name_suggest", prefix, size, PersonBrief
         )
-        return [PersonDetail(**doc["_source"]) for doc in docs["hits"]["hits"]]
 
 
 @lru_cache()
@@ -52,6 +111,4 @@ def get_person_service(
     redis: Redis = Depends(get_redis),
     elastic: AsyncElasticsearch = Depends(get_elastic),
 ) -> PersonService:
-    person_service = PersonService(redis, elastic)
-    person_service.ALLOWED_SORT_FIELDS = {"full_name": "full_name.raw"}
-    return person_service
+    return PersonService(redis, elastic)
@@ -0,0 +1,145 @@
+import logging
+from dataclasses import dataclass
+from enum import Enum
+from functools import lru_cache
+from typing import Any, Type
+
+from pydantic import BaseModel
+from pydantic.main import ModelMetaclass
+
+logger = logging.getLogger(__name__)
+
+
+class SortingOrder(Enum):
+    ASC = "asc"
+    DESC = "desc"
+
+
+@dataclass(frozen=True)
+class FilterPlan:
+    nested_paths: tuple[str, ...]
+    field: str
+
+    def build(self, values: Any) -> dict:
+        query_filter = {"terms": {self.field: values}}
+        for nested_path in reversed(self.nested_paths):
+            query_filter = {"nested": {"path": nested_path, "query": query_filter}}
+        return query_filter
+
+
+@dataclass(frozen=True)
+class SortPlan:
+    model_field: str
+    es_field: str
+    order: str
+
+    @property
+    def clause(self) -> str:
+        return f"{self.es_field}:{self.order}"
+
+
+@dataclass(frozen=True)
+class TermsFacetPlan:
+    """
+    Счётчики по вложенным объектам вида {id, name}: группировка идёт по id,
+    а имя берётся из первого попавшегося вложенного документа группы.
+    """
+
+    nested_path: str
+    size: int
+
+    @property
+    def aggregation(self) -> dict:
+        return {
+            "nested": {"path": self.nested_path},
+            "aggs": {
+                "values": {
+                    "terms": {"field": f"{self.nested_path}.id", "size": self.size},
+                    "aggs": {"sample": {"top_hits": {"size": 1}}},
+                }
+            },
+        }
+
+    @staticmethod
+    def parse(result: dict) -> list[dict]:
+        return [
+            {**bucket["sample"]["hits"]["hits"][0]["_source"], "count": bucket["doc_count"]}
+            for bucket in result["values"]["buckets"]
+        ]
+
+
+@dataclass(frozen=True)
+class HistogramFacetPlan:
+    field: str
+    interval: float
+
+    @property
+    def aggregation(self) -> dict:
+        return {"histogram": {"field": self.field, "interval": self.interval}}
+
+    @staticmethod
+    def parse(result: dict) -> list[dict]:
+        return [
+            {"value": bucket["key"], "count": bucket["doc_count"]} for bucket in result["buckets"]
+        ]
+
+
+FacetPlan = TermsFacetPlan | HistogramFacetPlan
+
+ID_TIEBREAKER = SortPlan("id", "id", SortingOrder.DESC.value)
+
+
+def compile_filter_plan(filter_field: str, root_model: Type[BaseModel]) -> FilterPlan | None:
+    """
+    Разбирает имя фильтра вида genres_id по полям модели: каждое вложенное
+    поле-модель становится nested-путём, а весь путь — полем terms.
+    """
+    path = list()
+    rest = filter_field
+    while rest:
+        matched = [
+            (field_name, field)
+            for field_name, field in root_model.__fields__.items()
+            if rest == field_name or rest.startswith(f"{field_name}_")
+        ]
+        if not matched:
+            logger.warning("Invalid filter path: %s", filter_field)
+            return None
+
+        field_name, field = max(matched, key=lambda item: len(item[0]))
+        path.append(field_name)
+        rest = rest[len(field_name) + 1 :]
+        if isinstance(field.type_, ModelMetaclass):
+            root_model = field.type_
+
+    nested_paths = tuple(".".join(path[:i]) for i in range(1, len(path)))
+    return FilterPlan(nested_paths=nested_paths, field=".".join(path))
+
+
+def compile_filter_plans(filters_cls: type, model: Type[BaseModel]) -> dict[str, FilterPlan | None]:
+    return {
+        filter_field: compile_filter_plan(filter_field, model)
+        for filter_field in filters_cls.__dataclass_fields__
+    }
+
+
+def compile_sort_plans(
+    model: Type[BaseModel], allowed_sort_fields: dict[str, str]
+) -> dict[str, SortPlan]:
+    """
+    :return: план для каждого допустимого значения параметра sort: "field" и "-field"
+    """
+    sort_plans = dict()
+    for field, es_field in allowed_sort_fields.items():
+        if field in model.__fields__:
+            sort_plans[field] = SortPlan(field, es_field, SortingOrder.ASC.value)
+            sort_plans[f"-{field}"] = SortPlan(field, es_field, SortingOrder.DESC.value)
+    return sort_plans
+
+
+@lru_cache(maxsize=None)
+def get_source_includes(model: Type[BaseModel]) -> tuple[str, ...]:
+    """
+    :return: поля документа, которые нужны для построения модели
+    """
+    return tuple(field.alias for field in model.__fields__.values())
@@ -0,0 +1,348 @@
+import asyncio
+import inspect
+import logging
+import random
+from dataclasses import dataclass
+from datetime import datetime
+from functools import partial
+from time import monotonic, time
+from typing import Any, Awaitable, Callable
+
+import orjson
+from redis.exceptions import LockError, RedisError
+
+from core.config import settings
+from db import elastic, redis
+from services.base import Service
+from services.films import FilmService, get_film_service
+from services.genres import GenreService, get_genre_service
+from services.persons import PersonService, get_person_service
+from utils.cache_keys import SEARCH_KEY_NORMALIZERS
+from utils.caching import get_hash_tag
+from utils.metrics import observe_redis
+
+logger = logging.getLogger(__name__)
+
+WARMUP_LOCK_KEY = "lock:warmup"
+# Методы списков и поиска, запросы к которым повторяет прогрев.
+WARMUP_QUERY_METHODS = ("get_list", "get_by_query")
+
+
+def get_popularity_key(index: str, bucket: int, kind: str = "ids") -> str:
+    """
+    :param kind: ids — рейтинг id объектов, queries — рейтинг запросов списков и поиска
+    """
+    return f"popular:{get_hash_tag(index)}:{kind}:{bucket}"
+
+
+def _current_bucket() -> int:
+    return int(time() // settings.popularity_bucket_seconds)
+
+
+async def record_request(service: Service, obj_id: str) -> None:
+    """
+    С вероятностью popularity_sample_rate учитывает запрос объекта в рейтинге
+    популярности индекса за текущий интервал popularity_bucket_seconds.
+    Рейтинги хранятся в redis, чтобы пережить перезапуск, и истекают через
+    popularity_buckets интервалов. Когда в рейтинге интервала становится вдвое
+    больше popularity_max_ids id, редкие обрезаются до popularity_max_ids:
+    запас оставляет место новым id, которые иначе удалялись бы сразу.
+    """
+    if random.random() >= settings.popularity_sample_rate:
+        return
+    await _record(service, "ids", obj_id)
+
+
+async def record_query(method: Callable, *args: Any, **kwargs: Any) -> None:
+    """
+    Учитывает запрос списка или поиска в рейтинге популярности, как record_request.
+    Аргументы приводятся к тому же виду, что и в ключе кеша, поэтому
+    равнозначные запросы попадают в одну запись рейтинга. Страницы по курсору
+    не учитываются: их нельзя повторить без курсора.
+
+    :param method: метод сервиса из WARMUP_QUERY_METHODS, как его вызывает роутер
+    """
+    if random.random() >= settings.popularity_sample_rate:
+        return
+    bound = inspect.signature(method).bind(*args, **kwargs)
+    bound.apply_defaults()
+    arguments = dict(bound.arguments)
+    if arguments.pop("cursor", None) is not None:
+        return
+    for arg, normalize in SEARCH_KEY_NORMALIZERS.items():
+        if arg in arguments:
+            arguments[arg] = normalize(arguments[arg])
+    query = orjson.dumps(
+        {"method": method.__name__, "arguments": arguments}, option=orjson.OPT_SORT_KEYS
+    )
+    await _record(method.__self__, "queries", query)
+
+
+async def _record(service: Service, kind: str, member: str | bytes) -> None:
+    key = get_popularity_key(service.index, _current_bucket(), kind)
+    max_ids = settings.popularity_max_ids
+    try:
+        async with service.redis.pipeline(transaction=False) as pipe:
+            pipe.zincrby(key, 1, member)
+            pipe.zcard(key)
+            pipe.expire(key, settings.popularity_bucket_seconds * settings.popularity_buckets)
+            _, size, _ = await observe_redis("pipeline", pipe.execute())
+        if size > 2 * max_ids:
+            await observe_redis(
+                "zremrangebyrank", service.redis.zremrangebyrank(key, 0, size - max_ids - 1)
+            )
+    except RedisError:
+        logger.warning("Не удалось учесть запрос %s в рейтинге популярности", member, exc_info=True)
+
+
+async def get_popular_ids(service: Service, limit: int) -> list[str]:
+    return [obj_id.decode() for obj_id in await _get_popular(service, "ids", limit)]
+
+
+async def get_popular_queries(service: Service, limit: int) -> list[tuple[str, dict]]:
+    """
+    :return: имя метода и аргументы самых частых запросов списков и поиска
+    """
+    queries = list()
+    for member in await _get_popular(service, "queries", limit):
+        query = orjson.loads(member)
+        if query["method"] in WARMUP_QUERY_METHODS:
+            queries.append((query["method"], query["arguments"]))
+    return queries
+
+
+async def _get_popular(service: Service, kind: str, limit: int) -> list[bytes]:
+    """
+    Складывает рейтинги последних popularity_buckets интервалов, уменьшая вес
+    каждого следующего более старого интервала вдвое, поэтому порядок отражает
+    недавний трафик.
+    """
+    current = _current_bucket()
+    async with service.redis.pipeline(transaction=False) as pipe:
+        for age in range(settings.popularity_buckets):
+            key = get_popularity_key(service.index, current - age, kind)
+            pipe.zrevrange(key, 0, -1, withscores=True)
+        buckets = await observe_redis("pipeline", pipe.execute())
+
+    scores = dict()
+    for age, bucket in enumerate(buckets):
+        for member, score in bucket:
+            scores[member] = scores.get(member, 0) + score / 2**age
+    return sorted(scores, key=scores.__getitem__, reverse=True)[:limit]
+
+
+@dataclass
+class WarmupProgress:
+    started_at: datetime
+    finished_at: datetime | None = None
+    duration_seconds: float | None = None
+    batches_total: int = 0
+    batches_done: int = 0
+    batches_failed: int = 0
+    objects: int = 0
+    skipped: bool = False
+
+
+class CacheWarmer:
+    """
+    Заполняет кеш до прихода трафика: страницы лучших по рейтингу фильмов
+    и их карточки, все жанры, самые запрашиваемые объекты и самые частые
+    запросы списков и поиска каждого индекса. Работа разбита на пакеты,
+    одновременно выполняется не больше warmup_concurrency пакетов, чтобы
+    прогрев не занимал все соединения с elastic и redis. Уже закешированные
+    записи читаются одним MGET и не запрашиваются из elastic повторно.
+
+    Кеш общий для всех воркеров, поэтому прогревает его тот воркер, который
+    взял блокировку WARMUP_LOCK_KEY в redis; остальные пропускают прогрев.
+    """
+
+    def __init__(self):
+        self.progress: WarmupProgress | None = None
+        self._task: asyncio.Task | None = None
+        self._scheduled: asyncio.TimerHandle | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> WarmupProgress:
+        """
+        :return: состояние нового прогрева или уже идущего, если он не завершён
+        """
+        if self.running:
+            return self.progress
+        self.progress = WarmupProgress(started_at=datetime.now())
+        self._task = asyncio.create_task(
+            self._run(
+                self.progress,
+                get_film_service(redis.redis, elastic.es),
+                get_genre_service(redis.redis, elastic.es),
+                get_person_service(redis.redis, elastic.es),
+            )
+        )
+        return self.progress
+
+    def schedule(self) -> None:
+        """
+        Откладывает прогрев до паузы warmup_invalidation_delay_in_seconds
+        в событиях инвалидации: ETL публикует событие на каждый пакет,
+        а прогревать кеш имеет смысл один раз после загрузки.
+        """
+        if self._scheduled is not None:
+            self._scheduled.cancel()
+        self._scheduled = asyncio.get_running_loop().call_later(
+            settings.warmup_invalidation_delay_in_seconds, self._start_scheduled
+        )
+
+    def _start_scheduled(self) -> None:
+        self._scheduled = None
+        if self.running:
+            self.schedule()
+        else:
+            self.start()
+
+    async def stop(self) -> None:
+        if self._scheduled is not None:
+            self._scheduled.cancel()
+            self._scheduled = None
+        if self.running:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def _run(
+        self,
+        progress: WarmupProgress,
+        film_service: FilmService,
+        genre_service: GenreService,
+        person_service: PersonService,
+    ) -> None:
+        started = monotonic()
+        lock = film_service.redis.lock(
+            WARMUP_LOCK_KEY, timeout=settings.warmup_lock_timeout_in_seconds, blocking=False
+        )
+        try:
+            acquired = await lock.acquire()
+        except RedisError:
+            logger.warning("Не удалось взять блокировку прогрева кеша", exc_info=True)
+            acquired = False
+        if not acquired:
+            progress.skipped = True
+            progress.finished_at = datetime.now()
+            progress.duration_seconds = round(monotonic() - started, 3)
+            logger.info("Прогрев кеша пропущен: его выполняет другой воркер")
+            return
+        try:
+            await self._warm(progress, started, film_service, genre_service, person_service)
+        finally:
+            try:
+                await lock.release()
+            except LockError:
+                logger.warning("Блокировка прогрева кеша истекла до его завершения")
+            except RedisError:
+                logger.warning("Не удалось снять блокировку прогрева кеша", exc_info=True)
+
+    async def _warm(
+        self,
+        progress: WarmupProgress,
+        started: float,
+        film_service: FilmService,
+        genre_service: GenreService,
+        person_service: PersonService,
+    ) -> None:
+        semaphore = asyncio.Semaphore(settings.warmup_concurrency)
+        logger.info("Прогрев кеша начат")
+
+        async def run_batch(load: Callable[[], Awaitable[list]]) -> list:
+            progress.batches_total += 1
+            async with semaphore:
+                try:
+                    objs = await load()
+                except Exception:
+                    progress.batches_failed += 1
+                    logger.exception("Не удалось прогреть пакет кеша")
+                    return []
+            progress.batches_done += 1
+            progress.objects += len(objs)
+            logger.debug(
+                "Прогрев кеша: %s из %s пакетов",
+                progress.batches_done + progress.batches_failed,
+                progress.batches_total,
+            )
+            return objs
+
+        page_size = settings.warmup_page_size
+        film_pages = range(1, -(-settings.warmup_top_films // page_size) + 1)
+        popular_limit = settings.warmup_popular_ids
+        lists = await asyncio.gather(
+            *(
+                run_batch(partial(film_service.get_list, ["-imdb_rating"], page, page_size, {}))
+                for page in film_pages
+            ),
+            run_batch(partial(self._get_all_genres, genre_service, page_size)),
+            run_batch(partial(get_popular_ids, film_service, popular_limit)),
+            run_batch(partial(get_popular_ids, genre_service, popular_limit)),
+            run_batch(partial(get_popular_ids, person_service, popular_limit)),
+            run_batch(
+                partial(
+                    self._get_popular_queries,
+                    (film_service, genre_service, person_service),
+                    settings.warmup_popular_queries,
+                )
+            ),
+        )
+        *film_lists, genres, popular_films, popular_genres, popular_persons, queries = lists
+
+        film_ids = [film.id for films in film_lists for film in films] + popular_films
+        genre_ids = [genre.id for genre in genres] + popular_genres
+        await asyncio.gather(
+            *(
+                run_batch(partial(service.get_by_ids, batch))
+                for service, obj_ids in (
+                    (film_service, film_ids),
+                    (genre_service, genre_ids),
+                    (person_service, popular_persons),
+                )
+                for batch in _batches(list(dict.fromkeys(obj_ids)), settings.batch_max_ids)
+            ),
+            *(
+                run_batch(partial(getattr(service, method), **arguments))
+                for service, method, arguments in queries
+            ),
+        )
+
+        progress.finished_at = datetime.now()
+        progress.duration_seconds = round(monotonic() - started, 3)
+        logger.info(
+            "Прогрев кеша завершён за %s с: %s пакетов, %s с ошибкой, %s объектов",
+            progress.duration_seconds,
+            progress.batches_done,
+            progress.batches_failed,
+            progress.objects,
+        )
+
+    @staticmethod
+    async def _get_popular_queries(
+        services: tuple[Service, ...], limit: int
+    ) -> list[tuple[Service, str, dict]]:
+        return [
+            (service, method, arguments)
+            for service in services
+            for method, arguments in await get_popular_queries(service, limit)
+        ]
+
+    @staticmethod
+    async def _get_all_genres(genre_service: GenreService, page_size: int) -> list:
+        genres, page_number = list(), 1
+        while True:
+            page = await genre_service.get_list(None, page_number, page_size, {})
+            genres.extend(page)
+            if len(page) < page_size:
+                return genres
+            page_number += 1
+
+
+def _batches(obj_ids: list[str], size: int) -> list[list[str]]:
+    return [obj_ids[i : i + size] for i in range(0, len(obj_ids), size)]
@@ -0,0 +1,27 @@
+from typing import Any
+
+from starlette.types import Scope
+
+_route_templates: dict[Any, str] = dict()
+
+
+def get_route(scope: Scope) -> str:
+    """
+    Шаблон пути маршрута, обработавшего запрос, вида /api/v1/films/{film_id}.
+    Доступен после передачи запроса приложению.
+    """
+    endpoint = scope.get("endpoint")
+    if endpoint is None:
+        return "unmatched"
+    route = _route_templates.get(endpoint)
+    if route is None:
+        route = next(
+            (
+                route.path
+                for route in scope["app"].routes
+                if getattr(route, "endpoint", None) is endpoint
+            ),
+            "unmatched",
+        )
+        _route_templates[endpoint] = route
+    return route
@@ -0,0 +1,59 @@
+import asyncio
+import logging
+from typing import Callable
+
+import orjson
+from redis.asyncio.client import Redis
+from redis.exceptions import RedisError
+
+from core.config import settings
+from utils.caching import evict_local, set_generation
+
+logger = logging.getLogger(__name__)
+
+
+def apply_invalidation(index: str, generation: int, cache_keys: list[str]) -> None:
+    """
+    Записи в redis удаляет и поколение индекса увеличивает ETL один раз на пакет.
+    Воркер только сбрасывает копии удалённых записей в памяти процесса
+    и запоминает новое поколение, чтобы списки перестали читаться сразу,
+    а не через cache_generation_refresh_in_seconds.
+    """
+    set_generation(index, generation)
+    evict_local(set(cache_keys))
+
+
+async def listen_invalidations(
+    pubsub_redis: Redis, on_invalidation: Callable[[], None] | None = None
+) -> None:
+    """
+    :param pubsub_redis: клиент для подписки на канал инвалидации
+    :param on_invalidation: вызывается после каждого применённого события,
+        например чтобы запланировать прогрев кеша после загрузки ETL
+    """
+    while True:
+        try:
+            async with pubsub_redis.pubsub(ignore_subscribe_messages=True) as pubsub:
+                await pubsub.subscribe(settings.cache_invalidation_channel)
+                async for message in pubsub.listen():
+                    try:
+                        event = orjson.loads(message["data"])
+                        index, generation = event["index"], int(event["generation"])
+                        cache_keys = event["keys"]
+                    except (orjson.JSONDecodeError, KeyError, TypeError, ValueError):
+                        logger.warning("Некорректное сообщение инвалидации: %s", message["data"])
+                        continue
+                    apply_invalidation(index, generation, cache_keys)
+                    if on_invalidation is not None:
+                        on_invalidation()
+                    logger.debug(
+                        "Поколение кеша %s: %s, сброшено %s записей",
+                        index,
+                        generation,
+                        len(cache_keys),
+                    )
+        except asyncio.CancelledError:
+            raise
+        except (RedisError, OSError):
+            logger.exception("Потеряно соединение с каналом инвалидации кеша")
+            await asyncio.sleep(settings.cache_invalidation_retry_in_seconds)
@@ -0,0 +1,45 @@
+import hashlib
+from typing import Any, Callable
+
+import orjson
+
+
+def normalize_query(query: str | None) -> str | None:
+    return " ".join(query.lower().split()) if query else None
+
+
+def normalize_sort(sort_fields: list[str] | None) -> list[str] | None:
+    """
+    Оставляет первое упоминание каждого поля: повторная сортировка
+    по тому же полю не меняет результат.
+    """
+    if not sort_fields:
+        return None
+    prepared_sort_fields = dict()
+    for field in sort_fields:
+        prepared_sort_fields.setdefault(field.lstrip("-"), field)
+    return list(prepared_sort_fields.values())
+
+
+def normalize_filters(filters: dict[str, list | None]) -> dict[str, list]:
+    return {
+        field: sorted(set(values))
+        for field, values in sorted(filters.items())
+        if values is not None
+    }
+
+
+SEARCH_KEY_NORMALIZERS: dict[str, Callable[[Any], Any]] = {
+    "query": normalize_query,
+    "sort": normalize_sort,
+    "filters": normalize_filters,
+}
+
+
+def hash_arguments(arguments: dict[str, Any]) -> str:
+    canonical = orjson.dumps(arguments, option=orjson.OPT_SORT_KEYS, default=str)
+    return hashlib.sha1(canonical).hexdigest()
+
+
+def get_digest(data: bytes) -> str:
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
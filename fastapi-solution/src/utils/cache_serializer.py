@@ -1,18 +1,71 @@
+import hashlib
 import pickle
 from abc import abstractmethod, ABCMeta
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, get_args, get_origin
+
+import orjson
+from pydantic import BaseModel, schema_json_of
+from pydantic.json import pydantic_encoder
+
+from utils.cursor import Page, RenderedPage
+
+
+@dataclass
+class CacheData:
+    saved_datetime: datetime
+    data: Any
 
 
 class CacheSerializer(metaclass=ABCMeta):
-    @staticmethod
     @abstractmethod
-    def serialize(data):
+    def serialize(self, data: CacheData) -> bytes:
         pass
 
-    @staticmethod
     @abstractmethod
-    def deserialize(data):
+    def deserialize(self, data: bytes) -> CacheData | None:
         pass
 
+    def render(self, data: Any) -> bytes:
+        return orjson.dumps(data, default=_encode_default)
+
+    def deserialize_rendered(self, data: bytes) -> CacheData | None:
+        """
+        Возвращает запись, в которой вместо объектов лежит их json-представление.
+        """
+        cache_data = self.deserialize(data)
+        if cache_data is not None:
+            cache_data.data = self.render(cache_data.data)
+        return cache_data
+
+
+def _encode_default(obj: Any) -> Any:
+    """
+    Поля модели лежат в __dict__ уже в том виде, который вернул бы .dict(),
+    поэтому orjson обходит их сам, без рекурсии pydantic на python.
+    """
+    if isinstance(obj, BaseModel):
+        return obj.__dict__
+    return pydantic_encoder(obj)
+
+
+def _make_builder(data_type: Any) -> Callable[[Any], Any]:
+    """
+    Собирает функцию, которая восстанавливает значение типа data_type из json
+    без валидации: записи в кеш попадают только из проверенных данных,
+    поэтому модели создаются через construct, как в Service._build_trusted.
+    """
+    if get_origin(data_type) is list:
+        (item_type,) = get_args(data_type)
+        build_item = _make_builder(item_type)
+        return lambda data: [build_item(item) for item in data]
+    # До python 3.11 list[X] проходит проверку isinstance(..., type), поэтому
+    # обобщённые типы разбираются раньше.
+    if isinstance(data_type, type) and issubclass(data_type, BaseModel):
+        return lambda data: data_type.construct(**data)
+    return lambda data: data
+
 
 class PickleCacheSerializer(CacheSerializer):
     @staticmethod
@@ -22,3 +75,91 @@ class PickleCacheSerializer(CacheSerializer):
     @staticmethod
     def deserialize(data):
         return pickle.loads(data)
+
+
+class OrjsonCacheSerializer(CacheSerializer):
+    """
+    Хранит запись в виде "<версия>|<время сохранения>|<json>".
+    Версия вычисляется по json-схеме кешируемого типа, поэтому после изменения
+    моделей старые записи перестают читаться и считаются промахом.
+    """
+
+    FORMAT_VERSION = 1
+    SEPARATOR = b"|"
+
+    def __init__(self, data_type: Any):
+        self.data_type = data_type
+        self.build = _make_builder(data_type)
+        schema_hash = hashlib.sha1(schema_json_of(data_type).encode()).hexdigest()[:12]
+        self.version = f"{self.FORMAT_VERSION}.{schema_hash}".encode()
+
+    def serialize(self, data: CacheData) -> bytes:
+        return self.SEPARATOR.join(
+            (
+                self.version,
+                str(data.saved_datetime.timestamp()).encode(),
+                self.render(data.data),
+            )
+        )
+
+    def deserialize(self, data: bytes) -> CacheData | None:
+        cache_data = self.deserialize_rendered(data)
+        if cache_data is not None:
+            cache_data.data = self.build(orjson.loads(cache_data.data))
+        return cache_data
+
+    def deserialize_rendered(self, data: bytes) -> CacheData | None:
+        parts = data.split(self.SEPARATOR, 2)
+        if len(parts) != 3 or parts[0] != self.version:
+            return None
+        _, saved_timestamp, payload = parts
+        saved_datetime = datetime.fromtimestamp(float(saved_timestamp))
+        return CacheData(saved_datetime=saved_datetime, data=payload)
+
+
+class PageCacheSerializer(OrjsonCacheSerializer):
+    """
+    Хранит страницу поиска вместе с search_after её последнего документа:
+    "<версия>|<время сохранения>|<длина search_after>|<search_after><json документов>".
+    """
+
+    FORMAT_VERSION = 2
+
+    def render(self, data: Page) -> RenderedPage:
+        return RenderedPage(super().render(data), data.search_after, data.pit_id)
+
+    def serialize(self, data: CacheData) -> bytes:
+        search_after = orjson.dumps(data.data.search_after)
+        return self.SEPARATOR.join(
+            (
+                self.version,
+                str(data.saved_datetime.timestamp()).encode(),
+                str(len(search_after)).encode(),
+                search_after + self.render(data.data),
+            )
+        )
+
+    def deserialize(self, data: bytes) -> CacheData | None:
+        parts = self._split(data)
+        if parts is None:
+            return None
+        saved_datetime, search_after, payload = parts
+        page = Page(self.build(orjson.loads(payload)), search_after)
+        return CacheData(saved_datetime=saved_datetime, data=page)
+
+    def deserialize_rendered(self, data: bytes) -> CacheData | None:
+        parts = self._split(data)
+        if parts is None:
+            return None
+        saved_datetime, search_after, payload = parts
+        return CacheData(saved_datetime=saved_datetime, data=RenderedPage(payload, search_after))
+
+    def _split(self, data: bytes) -> tuple[datetime, list | None, bytes] | None:
+        parts = data.split(self.SEPARATOR, 3)
+        if len(parts) != 4 or parts[0] != self.version:
+            return None
+        _, saved_timestamp, search_after_size, payload = parts
+        search_after_size = int(search_after_size)
+        search_after = orjson.loads(payload[:search_after_size])
+        saved_datetime = datetime.fromtimestamp(float(saved_timestamp))
+        return saved_datetime, search_after, payload[search_after_size:]
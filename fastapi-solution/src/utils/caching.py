@@ -1,54 +1,401 @@
+import asyncio
 import logging
+import random
 from dataclasses import dataclass
 from datetime import datetime
-from functools import wraps
+from functools import lru_cache, partial, wraps
 from inspect import signature
-from typing import Callable, Any
+from time import monotonic
+from typing import Awaitable, Callable, Any
+
+from redis.exceptions import LockError, RedisError
 
 from core.config import settings
 from services.base import Service
-from utils.cache_serializer import PickleCacheSerializer
+from utils.cache_keys import hash_arguments
+from utils.cache_serializer import CacheData, CacheSerializer, PickleCacheSerializer
 from utils.exceptions import ClientNotInitializedException, CachingException
+from utils.hot_keys import HotKeySketch
+from utils.memory_cache import MemoryCache
+from utils.metrics import observe_redis
+from utils.tracing import start_span
 
 logger = logging.getLogger(__name__)
 
+_in_flight: dict[str, asyncio.Future] = dict()
+_background_tasks: set[asyncio.Task] = set()
+_local_caches: list[MemoryCache] = list()
+_cache_stats: dict[str, "CacheStats"] = dict()
+_generations: dict[str, tuple[int, float]] = dict()
+_refresh_failed_at: dict[str, float] = dict()
+_hot_keys = HotKeySketch(
+    settings.cache_hot_keys_width,
+    settings.cache_hot_keys_depth,
+    settings.cache_hot_keys_top_k,
+    settings.cache_hot_keys_decay_interval,
+)
+
+
+@dataclass
+class CacheLookup:
+    data: Any = None
+    size: int = 0
+    stale: bool = False
+    age: float = 0.0
+
 
 @dataclass
-class CacheData:
-    saved_datetime: datetime
-    data: Any
+class CachePolicy:
+    expire: int
+    stale_ttl: int
+    serializer: CacheSerializer
+    key_normalizers: dict[str, Callable] | None
 
 
-def _get_cache_key(self, func: Callable, *args: list, **kwargs: dict) -> str:
-    func_args = signature(func).bind(self, *args, **kwargs)
+@dataclass
+class CacheStats:
+    hits: int = 0
+    local_hits: int = 0
+    stale_hits: int = 0
+    misses: int = 0
+    coalesced: int = 0
+    refresh_errors: int = 0
+    refreshes_ahead: int = 0
+
+
+_get_signature = lru_cache(maxsize=None)(signature)
+
+
+def _get_cache_key(
+    self,
+    func: Callable,
+    *args: list,
+    key_normalizers: dict[str, Callable] | None = None,
+    generation: int | None = None,
+    by_id: bool = False,
+    **kwargs: dict,
+) -> str:
+    """
+    Ключи методов by_id получают hash tag своего объекта, остальные ключи
+    не содержат hash tag и распределяются по слотам кластера целиком.
+    """
+    func_args = _get_signature(func).bind(self, *args, **kwargs)
     func_args.apply_defaults()
 
-    func_args_str = ",".join(
-        f"{arg}={val}" for arg, val in func_args.arguments.items() if arg != "self"
-    )
+    arguments = {arg: val for arg, val in func_args.arguments.items() if arg != "self"}
+    for arg, normalize in (key_normalizers or {}).items():
+        if arg in arguments:
+            arguments[arg] = normalize(arguments[arg])
+
+    prefix = get_hash_tag(self.index, arguments["obj_id"]) if by_id else self.index
+    name = f"{self.__class__.__name__}.{func.__name__}"
+    if generation is not None:
+        name = f"{name}.g{generation}"
+    return f"{prefix}:{name}.{hash_arguments(arguments)}"
+
+
+def get_hash_tag(index: str, obj_id: str | None = None) -> str:
+    """
+    Записи объекта, его тег и блокировки содержат hash tag объекта, поэтому
+    в Redis Cluster попадают в один слот, а разные объекты распределяются
+    по узлам. Общий hash tag индекса остаётся только у служебных ключей.
+    """
+    if obj_id is None:
+        return f"{{{index}}}"
+    return f"{{{index}:{obj_id}}}"
+
+
+def get_tag_key(index: str, obj_id: str) -> str:
+    """
+    Теги и поколение индекса читает и изменяет ETL, формат ключей повторён
+    в postgres_to_es/cache_invalidation.py.
+    """
+    return f"tag:{get_hash_tag(index, obj_id)}"
+
+
+def get_generation_key(index: str) -> str:
+    return f"gen:{get_hash_tag(index)}"
+
+
+def _get_cache_tags(index: str, data: Any) -> list[str]:
+    """
+    Объект помечается своим id. Списки и агрегаты, зависящие от многих
+    документов, не помечаются: их ключи содержат поколение индекса.
+    """
+    if obj_id := getattr(data, "id", None):
+        return [get_tag_key(index, obj_id)]
+    return []
+
 
-    return f"{self.__class__.__name__}.{func.__name__}.({func_args_str})"
+async def _get_generation(redis, index: str) -> int:
+    """
+    Поколение индекса входит в ключи списков и агрегатов: инвалидация увеличивает
+    его, после чего старые записи больше не читаются и истекают сами, без
+    удаления множества ключей. Значение перечитывается из redis не чаще раза
+    в cache_generation_refresh_in_seconds.
+    """
+    cached = _generations.get(index)
+    if cached is not None:
+        generation, fetched_at = cached
+        if monotonic() - fetched_at < settings.cache_generation_refresh_in_seconds:
+            return generation
+    try:
+        raw_generation = await observe_redis("get", redis.get(get_generation_key(index)))
+    except RedisError:
+        logger.warning("Не удалось прочитать поколение кеша %s", index, exc_info=True)
+        return cached[0] if cached else 0
+    generation = int(raw_generation or 0)
+    set_generation(index, generation)
+    return generation
 
 
-async def _get_cache_data(redis, cache_key: str, expire: int) -> Any:
-    cache_data = await redis.get(cache_key)
-    if cache_data:
-        cache_data: CacheData = PickleCacheSerializer.deserialize(cache_data)
-        if (datetime.now() - cache_data.saved_datetime).seconds < expire:
-            return cache_data.data
+def set_generation(index: str, generation: int) -> None:
+    _generations[index] = (generation, monotonic())
+
+
+def get_cache_stats() -> dict[str, CacheStats]:
+    """
+    :return: счётчики каждого закешированного метода по его полному имени
+    """
+    return _cache_stats
+
+
+def get_hot_keys(limit: int | None = None) -> list[tuple[str, int]]:
+    """
+    :return: самые частые ключи кеша всех методов с оценкой числа попавших в выборку обращений
+    """
+    return _hot_keys.top(limit)
+
+
+def _record_access(cache_key: str) -> None:
+    if random.random() < settings.cache_hot_keys_sample_rate:
+        _hot_keys.add(cache_key)
+
+
+def _is_hot(cache_key: str) -> bool:
+    return _hot_keys.count(cache_key) >= settings.cache_hot_keys_min_count
+
+
+def evict_local(cache_keys: set[str]) -> None:
+    for local_cache in _local_caches:
+        for cache_key in cache_keys:
+            local_cache.delete(cache_key)
+
+
+async def _get_cache_data(
+    redis,
+    cache_key: str,
+    expire: int,
+    stale_ttl: int = 0,
+    serializer: CacheSerializer = PickleCacheSerializer(),
+    rendered: bool = False,
+) -> CacheLookup:
+    try:
+        raw_data = await observe_redis("get", redis.get(cache_key))
+    except RedisError:
+        logger.warning("Не удалось прочитать кеш %s, считаем промахом", cache_key, exc_info=True)
+        raw_data = None
+    with start_span("cache.deserialize", size=len(raw_data or b"")):
+        return _parse_cache_data(raw_data, expire, stale_ttl, serializer, rendered)
+
+
+def _parse_cache_data(
+    raw_data: bytes | None,
+    expire: int,
+    stale_ttl: int,
+    serializer: CacheSerializer,
+    rendered: bool,
+) -> CacheLookup:
+    if raw_data:
+        if rendered:
+            cache_data = serializer.deserialize_rendered(raw_data)
         else:
-            return None
+            cache_data = serializer.deserialize(raw_data)
+        if cache_data is None:
+            return CacheLookup()
+        age = (datetime.now() - cache_data.saved_datetime).total_seconds()
+        if age < expire + stale_ttl:
+            return CacheLookup(cache_data.data, len(raw_data), stale=age >= expire, age=age)
+    return CacheLookup()
+
+
+async def _set_cache_data(
+    redis,
+    cache_key: str,
+    data: Any,
+    ttl: int,
+    tags: list[str] | None = None,
+    serializer: CacheSerializer = PickleCacheSerializer(),
+) -> int:
+    async with redis.pipeline(transaction=False) as pipe:
+        size = _queue_cache_data(pipe, cache_key, data, ttl, tags, serializer)
+        await observe_redis("pipeline", pipe.execute())
+    return size
 
 
-async def _set_cache_data(redis, cache_key: str, data: Any) -> Any:
+def _queue_cache_data(
+    pipe,
+    cache_key: str,
+    data: Any,
+    ttl: int,
+    tags: list[str] | None,
+    serializer: CacheSerializer,
+) -> int:
     cache_data = CacheData(saved_datetime=datetime.now(), data=data)
-    await redis.set(cache_key, PickleCacheSerializer.serialize(cache_data))
+    raw_data = serializer.serialize(cache_data)
+    pipe.set(cache_key, raw_data, ex=ttl)
+    for tag in tags or ():
+        pipe.sadd(tag, cache_key)
+        pipe.expire(tag, ttl)
+    return len(raw_data)
+
+
+async def _single_flight(cache_key: str, load: Callable[[], Awaitable[Any]]) -> tuple[Any, bool]:
+    """
+    Объединяет одновременные промахи по одному ключу в рамках процесса:
+    загрузку выполняет первая корутина, остальные ждут её результат.
+    :return: результат загрузки и признак того, что вызов был присоединён к чужой загрузке
+    """
+    task = _in_flight.get(cache_key)
+    if task is not None:
+        return await asyncio.shield(task), True
+
+    task = asyncio.ensure_future(load())
+    _in_flight[cache_key] = task
+    task.add_done_callback(lambda _: _in_flight.pop(cache_key, None))
+    return await asyncio.shield(task), False
+
+
+async def _load_with_lock(
+    redis,
+    cache_key: str,
+    expire: float,
+    ttl: int,
+    index: str,
+    serializer: CacheSerializer,
+    fetch: Callable,
+) -> tuple[Any, int]:
+    lock = redis.lock(
+        f"lock:{cache_key}",
+        timeout=settings.cache_lock_timeout_in_seconds,
+        blocking_timeout=settings.cache_lock_wait_in_seconds,
+    )
+    try:
+        acquired = await lock.acquire()
+    except RedisError:
+        logger.warning(
+            "Не удалось взять блокировку %s, загружаем без неё", cache_key, exc_info=True
+        )
+        return await _fetch_and_store(redis, cache_key, ttl, index, serializer, fetch)
+    try:
+        if acquired:
+            lookup = await _get_cache_data(redis, cache_key, expire, serializer=serializer)
+            if lookup.data is not None:
+                return lookup.data, lookup.size
+        else:
+            logger.warning("Не удалось дождаться блокировки %s, загружаем без неё", cache_key)
+        return await _fetch_and_store(redis, cache_key, ttl, index, serializer, fetch)
+    finally:
+        if acquired:
+            try:
+                await lock.release()
+            except LockError:
+                logger.warning("Блокировка %s истекла до завершения загрузки", cache_key)
+            except RedisError:
+                logger.warning("Не удалось снять блокировку %s", cache_key, exc_info=True)
+
+
+async def _fetch_and_store(
+    redis, cache_key: str, ttl: int, index: str, serializer: CacheSerializer, fetch: Callable
+) -> tuple[Any, int]:
+    data = await fetch()
+    if data is None:
+        return None, 0
+    tags = _get_cache_tags(index, data)
+    try:
+        return data, await _set_cache_data(redis, cache_key, data, ttl, tags, serializer)
+    except RedisError:
+        logger.warning("Не удалось записать кеш %s", cache_key, exc_info=True)
+        return data, 0
+
+
+def _refresh_in_background(
+    cache_key: str, load: Callable[[], Awaitable[Any]], stats: CacheStats
+) -> bool:
+    """
+    После неудачного обновления ключ не обновляется cache_refresh_retry_in_seconds,
+    чтобы при недоступном elastic каждое чтение устаревшей записи не запускало
+    заведомо неудачный запрос.
+    :return: запущено ли обновление; False, если ключ уже загружается или ждёт повтора
+    """
+    if cache_key in _in_flight:
+        return False
+    failed_at = _refresh_failed_at.get(cache_key)
+    if failed_at is not None:
+        if monotonic() - failed_at < settings.cache_refresh_retry_in_seconds:
+            return False
+        del _refresh_failed_at[cache_key]
 
+    async def refresh():
+        try:
+            await _single_flight(cache_key, load)
+        except Exception:
+            stats.refresh_errors += 1
+            _refresh_failed_at[cache_key] = monotonic()
+            logger.exception("Не удалось обновить запись кеша %s в фоне", cache_key)
+
+    task = asyncio.create_task(refresh())
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+    return True
+
+
+def cache(
+    expire=settings.cache_expire_in_seconds,
+    stale_ttl: int = 0,
+    distributed_lock: bool = False,
+    local_expire: float | None = None,
+    local_max_entries: int = settings.cache_local_max_entries,
+    local_max_bytes: int = settings.cache_local_max_bytes,
+    serializer: CacheSerializer = PickleCacheSerializer(),
+    key_normalizers: dict[str, Callable] | None = None,
+    refresh_ahead: float = settings.cache_refresh_ahead_in_seconds,
+    by_id: bool = False,
+    bypass: Callable[[dict[str, Any]], bool] | None = None,
+) -> Callable:
+    """
+    :param expire: время, в течение которого запись считается свежей
+    :param stale_ttl: время после expire, в течение которого устаревшая запись отдаётся
+        сразу, а обновляется в фоне
+    :param distributed_lock: загружать промах под блокировкой redis, общей для всех воркеров
+    :param local_expire: время жизни записи в памяти процесса; None отключает локальный кеш
+    :param local_max_entries: максимальное число записей в локальном кеше
+    :param local_max_bytes: максимальный суммарный размер записей локального кеша
+    :param serializer: способ хранения записей в redis
+    :param key_normalizers: функции приведения аргументов к каноническому виду перед
+        построением ключа, чтобы эквивалентные запросы попадали в одну запись
+    :param refresh_ahead: за сколько секунд до истечения свежести часто запрашиваемые
+        записи обновляются в фоне, чтобы не выпадать из кеша; 0 отключает обновление
+    :param by_id: метод возвращает один объект по obj_id; такие записи удаляются по тегу
+        объекта, а записи остальных методов устаревают со сменой поколения индекса
+    :param bypass: условие по аргументам вызова, при котором метод вызывается без кеша
+    """
+
+    ttl = expire + stale_ttl
+    refresh_after = max(expire - refresh_ahead, expire / 2)
 
-def cache(expire=settings.cache_expire_in_seconds) -> Callable:
     def decorator(func: Callable) -> Callable:
-        @wraps(func)
-        async def wrapper(self, *args, **kwargs):
+        stats = CacheStats()
+        _cache_stats[func.__qualname__] = stats
+        local_caches = dict()
+        if local_expire:
+            local_caches = {
+                rendered: MemoryCache(local_expire, local_max_entries, local_max_bytes)
+                for rendered in (False, True)
+            }
+            _local_caches.extend(local_caches.values())
+
+        async def get_cached(self, rendered: bool, args: tuple, kwargs: dict, span) -> Any:
             if not isinstance(self, Service):
                 raise CachingException(
                     "Класс должен наследовать Service, для того, чтобы быть закешированным"
@@ -56,18 +403,194 @@ def cache(expire=settings.cache_expire_in_seconds) -> Callable:
             if not self.redis:
                 raise ClientNotInitializedException("Клиент redis не инициализирован")
 
-            cache_key = _get_cache_key(self, func, *args, **kwargs)
-            cache_data = await _get_cache_data(self.redis, cache_key, expire)
-
-            if cache_data is not None:
-                return cache_data
-            else:
+            if bypass is not None and bypass(
+                _get_signature(func).bind(self, *args, **kwargs).arguments
+            ):
+                span.set_attribute("cache.result", "bypass")
                 data = await func(self, *args, **kwargs)
-                if data is None:
-                    return None
-                await _set_cache_data(self.redis, cache_key, data)
+                if rendered and data is not None:
+                    return serializer.render(data)
+                return data
+
+            generation = None if by_id else await _get_generation(self.redis, self.index)
+            with start_span("cache.build_key"):
+                cache_key = _get_cache_key(
+                    self,
+                    func,
+                    *args,
+                    key_normalizers=key_normalizers,
+                    generation=generation,
+                    by_id=by_id,
+                    **kwargs,
+                )
+            span.set_attribute("cache.key", cache_key)
+            _record_access(cache_key)
+            local_cache = local_caches.get(rendered)
+
+            if local_cache is not None:
+                cache_data = local_cache.get(cache_key)
+                if cache_data is not None:
+                    stats.local_hits += 1
+                    span.set_attribute("cache.result", "local_hit")
+                    return cache_data
+
+            lookup = await _get_cache_data(
+                self.redis, cache_key, expire, stale_ttl, serializer, rendered
+            )
+
+            async def fetch():
+                return await func(self, *args, **kwargs)
+
+            async def load(fresh_for: float = expire):
+                if distributed_lock:
+                    data, size = await _load_with_lock(
+                        self.redis, cache_key, fresh_for, ttl, self.index, serializer, fetch
+                    )
+                else:
+                    data, size = await _fetch_and_store(
+                        self.redis, cache_key, ttl, self.index, serializer, fetch
+                    )
+                if data is not None and local_caches:
+                    local_caches[False].set(cache_key, data, size)
                 return data
 
+            if lookup.stale:
+                stats.stale_hits += 1
+                span.set_attribute("cache.result", "stale_hit")
+                _refresh_in_background(cache_key, load, stats)
+                return lookup.data
+
+            if lookup.data is not None:
+                stats.hits += 1
+                span.set_attribute("cache.result", "hit")
+                if refresh_ahead and lookup.age >= refresh_after and _is_hot(cache_key):
+                    if _refresh_in_background(cache_key, partial(load, refresh_after), stats):
+                        stats.refreshes_ahead += 1
+                if local_cache is not None:
+                    local_cache.set(cache_key, lookup.data, lookup.size)
+                return lookup.data
+
+            data, coalesced = await _single_flight(cache_key, load)
+            if coalesced:
+                stats.coalesced += 1
+            else:
+                stats.misses += 1
+            span.set_attribute("cache.result", "coalesced" if coalesced else "miss")
+            if rendered and data is not None:
+                return serializer.render(data)
+            return data
+
+        async def get_traced(self, rendered: bool, args: tuple, kwargs: dict) -> Any:
+            with start_span(f"cache {func.__qualname__}", index=self.index) as span:
+                return await get_cached(self, rendered, args, kwargs, span)
+
+        @wraps(func)
+        async def wrapper(self, *args, **kwargs):
+            return await get_traced(self, False, args, kwargs)
+
+        async def rendered_wrapper(self, *args, **kwargs):
+            return await get_traced(self, True, args, kwargs)
+
+        wrapper.rendered = rendered_wrapper
+        wrapper.policy = CachePolicy(expire, stale_ttl, serializer, key_normalizers)
+        wrapper.stats = stats
+        wrapper.local_caches = local_caches
         return wrapper
 
     return decorator
+
+
+async def get_rendered(method: Callable, *args, **kwargs) -> bytes | None:
+    """
+    Вызывает закешированный метод сервиса так, чтобы при попадании в кеш
+    вернуть готовый json без построения моделей.
+    """
+    return await method.__func__.rendered(method.__self__, *args, **kwargs)
+
+
+def _mget(redis, keys: list[str]) -> Awaitable[list[bytes | None]]:
+    """
+    Ключи разных объектов лежат в разных слотах кластера, поэтому клиент
+    кластера читает их MGET по каждому слоту отдельно.
+    """
+    mget_nonatomic = getattr(redis, "mget_nonatomic", None)
+    if mget_nonatomic is not None:
+        return mget_nonatomic(keys)
+    return redis.mget(keys)
+
+
+async def get_many(
+    method: Callable,
+    obj_ids: list[str],
+    fetch_many: Callable[[list[str]], Awaitable[dict[str, Any]]],
+    rendered: bool = False,
+    **kwargs,
+) -> list[Any] | bytes:
+    """
+    Пакетное чтение через кеш метода вида get_by_id(obj_id, **kwargs) с теми же ключами:
+    попадания читаются MGET, промахи загружаются одним вызовом fetch_many
+    и записываются обратно одним pipeline. Порядок obj_ids сохраняется,
+    ненайденные объекты пропускаются.
+    :param fetch_many: загрузка промахов, возвращающая словарь id -> объект
+    :param rendered: вернуть готовый json-массив вместо списка объектов
+    """
+    self, wrapper = method.__self__, method.__func__
+    policy: CachePolicy = wrapper.policy
+    local_cache = wrapper.local_caches.get(rendered)
+
+    cache_keys = {
+        obj_id: _get_cache_key(
+            self,
+            wrapper.__wrapped__,
+            obj_id,
+            key_normalizers=policy.key_normalizers,
+            by_id=True,
+            **kwargs,
+        )
+        for obj_id in dict.fromkeys(obj_ids)
+    }
+
+    found = dict()
+    if local_cache is not None:
+        for obj_id, cache_key in cache_keys.items():
+            if (data := local_cache.get(cache_key)) is not None:
+                found[obj_id] = data
+        wrapper.stats.local_hits += len(found)
+
+    lookup_ids = [obj_id for obj_id in cache_keys if obj_id not in found]
+    if lookup_ids:
+        try:
+            raw_data = await observe_redis(
+                "mget", _mget(self.redis, [cache_keys[obj_id] for obj_id in lookup_ids])
+            )
+        except RedisError:
+            logger.warning("Не удалось прочитать кеш пакетом, считаем промахом", exc_info=True)
+            raw_data = [None] * len(lookup_ids)
+        for obj_id, raw in zip(lookup_ids, raw_data):
+            lookup = _parse_cache_data(raw, policy.expire, 0, policy.serializer, rendered)
+            if lookup.data is not None:
+                found[obj_id] = lookup.data
+                wrapper.stats.hits += 1
+                if local_cache is not None:
+                    local_cache.set(cache_keys[obj_id], lookup.data, lookup.size)
+
+    miss_ids = [obj_id for obj_id in cache_keys if obj_id not in found]
+    if miss_ids:
+        wrapper.stats.misses += len(miss_ids)
+        fetched = await fetch_many(miss_ids)
+        ttl = policy.expire + policy.stale_ttl
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for obj_id, data in fetched.items():
+                    tags = _get_cache_tags(self.index, data)
+                    _queue_cache_data(pipe, cache_keys[obj_id], data, ttl, tags, policy.serializer)
+                await observe_redis("pipeline", pipe.execute())
+        except RedisError:
+            logger.warning("Не удалось записать кеш пакетом", exc_info=True)
+        for obj_id, data in fetched.items():
+            found[obj_id] = policy.serializer.render(data) if rendered else data
+
+    results = [found[obj_id] for obj_id in obj_ids if obj_id in found]
+    if rendered:
+        return b"[" + b",".join(results) + b"]"
+    return results
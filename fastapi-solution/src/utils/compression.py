@@ -0,0 +1,179 @@
+import gzip
+import logging
+
+import brotli
+from redis.exceptions import RedisError
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from core.config import settings
+from db import redis
+from utils.cache_keys import get_digest
+from utils.memory_cache import MemoryCache
+from utils.metrics import observe_redis
+
+logger = logging.getLogger(__name__)
+
+COMPRESSIBLE_MEDIA_TYPES = ("application/json", "text/")
+
+_COMPRESSORS = {
+    "br": lambda data: brotli.compress(data, quality=settings.compression_brotli_quality),
+    "gzip": lambda data: gzip.compress(data, settings.compression_gzip_level, mtime=0),
+}
+
+
+def choose_encoding(accept_encoding: str) -> str | None:
+    """
+    Выбирает поддерживаемое сжатие с наибольшим весом q из Accept-Encoding,
+    при равных весах предпочитая brotli.
+    """
+    weights = dict()
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        weight = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                continue
+        weights[coding.strip().lower()] = weight
+
+    wildcard = weights.get("*", 0.0)
+    candidates = [
+        (weights.get(coding, wildcard), coding)
+        for coding in _COMPRESSORS
+        if weights.get(coding, wildcard) > 0
+    ]
+    if not candidates:
+        return None
+    return max(candidates, key=lambda candidate: candidate[0])[1]
+
+
+def get_response_encoding(accept_encoding: str, body_size: int) -> str | None:
+    """
+    Способ сжатия, который middleware применит к json-ответу размером body_size.
+    По нему ответ 304 получает тот же ETag, что и полный ответ.
+    """
+    if body_size < settings.compression_min_size:
+        return None
+    return choose_encoding(accept_encoding)
+
+
+def _add_vary(headers: MutableHeaders) -> None:
+    if "accept-encoding" not in headers.get("vary", "").lower():
+        headers.add_vary_header("Accept-Encoding")
+
+
+class CompressionMiddleware:
+    """
+    Сжимает ответы не меньше compression_min_size байт выбранным клиентом способом.
+    Сжатые байты хранятся по дайджесту исходного тела в памяти процесса и, при
+    compression_shared, в redis рядом с записями кеша, поэтому ответы из кеша,
+    которые повторяются байт в байт, сжимаются один раз на все воркеры.
+    Если у ответа уже есть ETag с дайджестом, тело повторно не хешируется,
+    а к ETag добавляется способ сжатия. Vary: Accept-Encoding получают все
+    ответы сжимаемых типов, в том числе оставленные без сжатия.
+    Потоковые ответы передаются без изменений.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self.compressed = MemoryCache(
+            settings.compression_cache_expire_in_seconds,
+            settings.compression_cache_max_entries,
+            settings.compression_cache_max_bytes,
+        )
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        start_message: Message | None = None
+        passthrough = False
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal start_message, passthrough
+            if passthrough:
+                await send(message)
+                return
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+
+            body = message.get("body", b"")
+            headers = MutableHeaders(raw=start_message["headers"])
+            if headers.get("content-type", "").startswith(COMPRESSIBLE_MEDIA_TYPES):
+                _add_vary(headers)
+            if (
+                encoding is None
+                or message.get("more_body")
+                or not self._is_compressible(headers, body)
+            ):
+                passthrough = True
+                await send(start_message)
+                await send(message)
+                return
+
+            etag = headers.get("etag")
+            digest = etag.strip('"') if etag else get_digest(body)
+            compressed = await self._compress(body, digest, encoding)
+            if etag:
+                headers["ETag"] = f'"{digest}-{encoding}"'
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(compressed))
+            await send(start_message)
+            await send({"type": "http.response.body", "body": compressed})
+
+        await self.app(scope, receive, send_compressed)
+
+    @staticmethod
+    def _is_compressible(headers: MutableHeaders, body: bytes) -> bool:
+        return (
+            len(body) >= settings.compression_min_size
+            and "content-encoding" not in headers
+            and headers.get("content-type", "").startswith(COMPRESSIBLE_MEDIA_TYPES)
+        )
+
+    async def _compress(self, body: bytes, digest: str, encoding: str) -> bytes:
+        key = f"{encoding}:{digest}"
+        compressed = self.compressed.get(key)
+        if compressed is None:
+            compressed = await _get_shared(key)
+            if compressed is None:
+                compressed = _COMPRESSORS[encoding](body)
+                await _set_shared(key, compressed)
+            self.compressed.set(key, compressed, len(compressed))
+        return compressed
+
+
+def _get_shared_key(key: str) -> str:
+    return f"compressed:{key}"
+
+
+async def _get_shared(key: str) -> bytes | None:
+    if not settings.compression_shared or redis.redis is None:
+        return None
+    try:
+        return await observe_redis("get", redis.redis.get(_get_shared_key(key)))
+    except RedisError:
+        logger.warning("Не удалось прочитать сжатый ответ %s", key, exc_info=True)
+        return None
+
+
+async def _set_shared(key: str, compressed: bytes) -> None:
+    if not settings.compression_shared or redis.redis is None:
+        return
+    try:
+        await observe_redis(
+            "set",
+            redis.redis.set(
+                _get_shared_key(key),
+                compressed,
+                ex=int(settings.compression_cache_expire_in_seconds),
+            ),
+        )
+    except RedisError:
+        logger.warning("Не удалось сохранить сжатый ответ %s", key, exc_info=True)
@@ -0,0 +1,75 @@
+import base64
+import binascii
+from dataclasses import asdict, dataclass
+from typing import Any, Iterable
+
+import orjson
+
+from utils.exceptions import InvalidCursorException
+
+
+@dataclass
+class Cursor:
+    """
+    :param sort: сортировка elastic, для которой получены значения search_after
+    """
+
+    search_after: list[Any]
+    sort: str
+    pit_id: str | None = None
+
+
+class Page(list):
+    """
+    Страница поиска. Кроме документов хранит значения сортировки последнего
+    из них в том виде, в котором их вернул elastic: из них строится курсор
+    следующей страницы. Для неполной страницы search_after равен None.
+    :param pit_id: id point in time из ответа elastic, если поиск шёл по нему
+    """
+
+    def __init__(
+        self,
+        items: Iterable = (),
+        search_after: list[Any] | None = None,
+        pit_id: str | None = None,
+    ):
+        super().__init__(items)
+        self.search_after = search_after
+        self.pit_id = pit_id
+
+
+class RenderedPage(bytes):
+    """
+    Готовый json-массив страницы с теми же search_after и pit_id, что у Page.
+    """
+
+    def __new__(
+        cls, payload: bytes, search_after: list[Any] | None = None, pit_id: str | None = None
+    ):
+        page = super().__new__(cls, payload)
+        page.search_after = search_after
+        page.pit_id = pit_id
+        return page
+
+
+def uses_point_in_time(arguments: dict[str, Any]) -> bool:
+    """
+    Страницы внутри point in time видны только своему клиенту, поэтому
+    такие запросы не кешируются.
+    """
+    cursor = arguments.get("cursor")
+    return cursor is not None and cursor.pit_id is not None
+
+
+def encode_cursor(cursor: Cursor) -> str:
+    return base64.urlsafe_b64encode(orjson.dumps(asdict(cursor))).rstrip(b"=").decode()
+
+
+def decode_cursor(value: str) -> Cursor:
+    try:
+        data = orjson.loads(base64.urlsafe_b64decode(value + "=" * (-len(value) % 4)))
+        return Cursor(
+            search_after=list(data["search_after"]), sort=data["sort"], pit_id=data.get("pit_id")
+        )
+    except (binascii.Error, orjson.JSONDecodeError, KeyError, TypeError, ValueError) as e:
+        raise InvalidCursorException("Некорректный курсор") from e
@@ -4,3 +4,7 @@ class ClientNotInitializedException(Exception):
 
 class CachingException(Exception):
     pass
+
+
+class InvalidCursorException(Exception):
+    pass
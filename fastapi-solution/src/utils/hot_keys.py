@@ -0,0 +1,55 @@
+class HotKeySketch:
+    """
+    Частоты ключей в count-min sketch фиксированного размера и top_k самых
+    частых ключей. Счётчики обновляются консервативно: увеличиваются только
+    строки с минимальным значением, что уменьшает переоценку редких ключей.
+    Каждые decay_interval добавлений все счётчики делятся пополам, поэтому
+    рейтинг отражает недавний трафик.
+    """
+
+    def __init__(self, width: int, depth: int, top_k: int, decay_interval: int):
+        self.width = width
+        self.depth = depth
+        self.top_k = top_k
+        self.decay_interval = decay_interval
+        self._rows = [[0] * width for _ in range(depth)]
+        self._top: dict[str, int] = dict()
+        self._added = 0
+
+    def add(self, key: str) -> int:
+        """
+        :return: оценка частоты ключа после добавления
+        """
+        cells = [(row, hash((seed, key)) % self.width) for seed, row in enumerate(self._rows)]
+        estimate = min(row[cell] for row, cell in cells) + 1
+        for row, cell in cells:
+            if row[cell] < estimate:
+                row[cell] = estimate
+
+        if key in self._top or len(self._top) < self.top_k:
+            self._top[key] = estimate
+        else:
+            coldest = min(self._top, key=self._top.__getitem__)
+            if estimate > self._top[coldest]:
+                del self._top[coldest]
+                self._top[key] = estimate
+
+        self._added += 1
+        if self._added % self.decay_interval == 0:
+            self._decay()
+        return estimate
+
+    def count(self, key: str) -> int:
+        """
+        :return: оценка частоты ключа, если он среди top_k, иначе 0
+        """
+        return self._top.get(key, 0)
+
+    def top(self, limit: int | None = None) -> list[tuple[str, int]]:
+        return sorted(self._top.items(), key=lambda item: item[1], reverse=True)[:limit]
+
+    def _decay(self) -> None:
+        for row in self._rows:
+            for cell, value in enumerate(row):
+                row[cell] = value >> 1
+        self._top = {key: count >> 1 for key, count in self._top.items() if count >> 1}
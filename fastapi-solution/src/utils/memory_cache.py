@@ -0,0 +1,59 @@
+from collections import OrderedDict
+from time import monotonic
+from typing import Any
+
+
+class MemoryCache:
+    """
+    Ограниченный по числу записей и объёму LRU-кеш с TTL в памяти процесса.
+    Объекты хранятся без сериализации, поэтому возвращаемые значения
+    разделяются между вызывающими и не должны изменяться.
+    """
+
+    def __init__(self, expire: float, max_entries: int, max_bytes: int):
+        self.expire = expire
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[str, tuple[float, int, Any]] = OrderedDict()
+        self._size = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    def get(self, key: str) -> Any:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        expires_at, _, value = entry
+        if expires_at <= monotonic():
+            self.delete(key)
+            return None
+
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any, size: int) -> None:
+        self.delete(key)
+        if size > self.max_bytes:
+            return
+
+        self._entries[key] = (monotonic() + self.expire, size, value)
+        self._size += size
+
+        while len(self._entries) > self.max_entries or self._size > self.max_bytes:
+            _, (_, evicted_size, _) = self._entries.popitem(last=False)
+            self._size -= evicted_size
+
+    def delete(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._size -= entry[1]
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._size = 0
@@ -0,0 +1,115 @@
+from time import perf_counter
+from typing import Any, Awaitable
+
+from prometheus_client import Gauge, Histogram
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from core.config import settings
+from utils.asgi import get_route
+from utils.tracing import start_span
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.02, 0.05, 0.1, 0.25, 0.5, 1, 2.5)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+REQUEST_LATENCY = Histogram(
+    "api_request_duration_seconds",
+    "Время обработки запроса",
+    ("method", "route", "status"),
+    buckets=LATENCY_BUCKETS,
+)
+REQUESTS_IN_FLIGHT = Gauge("api_requests_in_flight", "Запросы в обработке")
+RESPONSE_SIZE = Histogram(
+    "api_response_size_bytes", "Размер тела ответа", ("route",), buckets=SIZE_BUCKETS
+)
+REDIS_LATENCY = Histogram(
+    "redis_command_duration_seconds", "Время команды redis", ("command",), buckets=LATENCY_BUCKETS
+)
+ELASTIC_LATENCY = Histogram(
+    "elastic_request_duration_seconds",
+    "Время запроса к elastic со стороны клиента",
+    ("operation",),
+    buckets=LATENCY_BUCKETS,
+)
+ELASTIC_TOOK = Histogram(
+    "elastic_took_seconds",
+    "Время выполнения запроса внутри elastic по полю took",
+    ("operation",),
+    buckets=LATENCY_BUCKETS,
+)
+
+_elastic_in_flight = 0
+
+
+def get_elastic_in_flight() -> int:
+    return _elastic_in_flight
+
+
+async def observe_redis(command: str, request: Awaitable[Any]) -> Any:
+    with start_span(f"redis.{command}"):
+        if not settings.metrics_redis:
+            return await request
+        started = perf_counter()
+        try:
+            return await request
+        finally:
+            REDIS_LATENCY.labels(command).observe(perf_counter() - started)
+
+
+async def observe_elastic(operation: str, request: Awaitable[dict]) -> dict:
+    """
+    Разница между временем запроса и took показывает затраты на сеть,
+    очередь пула соединений и разбор ответа. Вызов также оформляется span трассировки,
+    а число выполняющихся запросов показывает занятость пула соединений.
+    """
+    global _elastic_in_flight
+    with start_span(f"elastic.{operation}") as span:
+        started = perf_counter()
+        _elastic_in_flight += 1
+        try:
+            response = await request
+        finally:
+            _elastic_in_flight -= 1
+            if settings.metrics_elastic:
+                ELASTIC_LATENCY.labels(operation).observe(perf_counter() - started)
+        if "took" in response:
+            span.set_attribute("elastic.took_ms", response["took"])
+            if settings.metrics_elastic:
+                ELASTIC_TOOK.labels(operation).observe(response["took"] / 1000)
+        return response
+
+
+class MetricsMiddleware:
+    """
+    Метрики запросов по шаблону пути маршрута, а не по фактическому пути,
+    чтобы число рядов не зависело от id в запросах.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not settings.metrics_requests:
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        size = 0
+
+        async def send_observed(message: Message) -> None:
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            else:
+                size += len(message.get("body", b""))
+            await send(message)
+
+        started = perf_counter()
+        REQUESTS_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_observed)
+        finally:
+            REQUESTS_IN_FLIGHT.dec()
+            route = get_route(scope)
+            REQUEST_LATENCY.labels(scope["method"], route, status).observe(perf_counter() - started)
+            if settings.metrics_payload:
+                RESPONSE_SIZE.labels(route).observe(size)
@@ -0,0 +1,261 @@
+import logging
+import random
+from abc import ABCMeta, abstractmethod
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+from queue import Empty, Full, Queue
+from threading import Thread
+from time import time_ns
+from typing import Any, ContextManager, Iterator
+
+import orjson
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from core.config import settings
+from utils.asgi import get_route
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Span:
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: str | None = None
+    start_time: int = field(default_factory=time_ns)
+    end_time: int | None = None
+    attributes: dict[str, Any] = field(default_factory=dict)
+
+    sampled = True
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def update_name(self, name: str) -> None:
+        self.name = name
+
+
+class _NoopSpan:
+    """
+    Span запроса, не попавшего в выборку: все операции ничего не делают,
+    поэтому трассировка таких запросов стоит одного обращения к ContextVar.
+    """
+
+    sampled = False
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        pass
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def update_name(self, name: str) -> None:
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+_current_span: ContextVar[Span | None] = ContextVar("current_span", default=None)
+
+
+class SpanExporter(metaclass=ABCMeta):
+    @abstractmethod
+    def export(self, span: Span) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+class InMemorySpanExporter(SpanExporter):
+    def __init__(self, max_spans: int):
+        self.spans: deque[Span] = deque(maxlen=max_spans)
+
+    def export(self, span: Span) -> None:
+        self.spans.append(span)
+
+
+class FileSpanExporter(SpanExporter):
+    """
+    Пишет span по одному json на строку. Span копятся в очереди, а сериализует
+    и записывает их пачками отдельный поток, поэтому экспорт не блокирует цикл
+    событий. Если поток не успевает, span сверх max_queued отбрасываются.
+    """
+
+    def __init__(self, path: str, max_queued: int):
+        self.path = path
+        self.dropped = 0
+        self._queue: Queue[Span | None] = Queue(maxsize=max_queued)
+        self._writer: Thread | None = None
+
+    def export(self, span: Span) -> None:
+        if self._writer is None:
+            self._writer = Thread(target=self._write_batches, name="span-writer", daemon=True)
+            self._writer.start()
+        try:
+            self._queue.put_nowait(span)
+        except Full:
+            self.dropped += 1
+
+    def close(self) -> None:
+        """
+        Дописывает накопленные span и останавливает поток записи.
+        """
+        if self._writer is not None:
+            self._queue.put(None)
+            self._writer.join()
+            self._writer = None
+
+    def _write_batches(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except Empty:
+                    break
+            spans = [span for span in batch if span is not None]
+            if spans:
+                self._write(spans)
+            if len(spans) < len(batch):
+                return
+
+    def _write(self, spans: list[Span]) -> None:
+        lines = b"".join(orjson.dumps(asdict(span), default=str) + b"\n" for span in spans)
+        try:
+            with open(self.path, "ab") as file:
+                file.write(lines)
+        except OSError:
+            logger.warning("Не удалось записать %s span в %s", len(spans), self.path, exc_info=True)
+
+
+def _create_exporter() -> SpanExporter | None:
+    if settings.tracing_exporter == "memory":
+        return InMemorySpanExporter(settings.tracing_memory_max_spans)
+    if settings.tracing_exporter == "file":
+        return FileSpanExporter(settings.tracing_file_path, settings.tracing_file_max_queued)
+    return None
+
+
+_exporter: SpanExporter | None = _create_exporter()
+
+
+def get_exporter() -> SpanExporter | None:
+    return _exporter
+
+
+def set_exporter(exporter: SpanExporter | None) -> None:
+    global _exporter
+    _exporter = exporter
+
+
+def parse_traceparent(traceparent: str | None) -> tuple[str, str, bool] | None:
+    """
+    :return: trace id, id родительского span и флаг выборки из заголовка W3C traceparent
+    """
+    if not traceparent:
+        return None
+    parts = traceparent.strip().split("-")
+    if len(parts) < 4 or len(parts[1]) != 32 or len(parts[2]) != 16 or len(parts[3]) != 2:
+        return None
+    try:
+        flags = int(parts[3], 16)
+        int(parts[1], 16), int(parts[2], 16)
+    except ValueError:
+        return None
+    if parts[1] == "0" * 32 or parts[2] == "0" * 16:
+        return None
+    return parts[1], parts[2], bool(flags & 1)
+
+
+@contextmanager
+def _activate(span: Span) -> Iterator[Span]:
+    token = _current_span.set(span)
+    try:
+        yield span
+    except BaseException as e:
+        span.set_attribute("error", type(e).__name__)
+        raise
+    finally:
+        span.end_time = time_ns()
+        _current_span.reset(token)
+        if _exporter is not None:
+            _exporter.export(span)
+
+
+@contextmanager
+def start_trace(name: str, traceparent: str | None = None) -> Iterator[Span | _NoopSpan]:
+    """
+    Начинает корневой span запроса. Если во входящем traceparent есть решение
+    о выборке, оно соблюдается, иначе запрос попадает в выборку
+    с вероятностью tracing_sample_rate.
+    """
+    parent = parse_traceparent(traceparent)
+    if parent is not None:
+        trace_id, parent_id, sampled = parent
+    else:
+        trace_id, parent_id = None, None
+        sampled = random.random() < settings.tracing_sample_rate
+
+    if not sampled or _exporter is None:
+        yield NOOP_SPAN
+        return
+
+    span = Span(
+        name=name,
+        trace_id=trace_id or f"{random.getrandbits(128):032x}",
+        span_id=f"{random.getrandbits(64):016x}",
+        parent_id=parent_id,
+    )
+    with _activate(span):
+        yield span
+
+
+def start_span(name: str, **attributes: Any) -> ContextManager[Span | _NoopSpan]:
+    parent = _current_span.get()
+    if parent is None:
+        return NOOP_SPAN
+
+    span = Span(
+        name=name,
+        trace_id=parent.trace_id,
+        span_id=f"{random.getrandbits(64):016x}",
+        parent_id=parent.span_id,
+        attributes=attributes,
+    )
+    return _activate(span)
+
+
+class TracingMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        traceparent = Headers(scope=scope).get("traceparent")
+        with start_trace(f"{scope['method']} {scope['path']}", traceparent) as span:
+            if not span.sampled:
+                await self.app(scope, receive, send)
+                return
+
+            async def send_traced(message: Message) -> None:
+                if message["type"] == "http.response.start":
+                    span.set_attribute("http.status_code", message["status"])
+                await send(message)
+
+            span.set_attribute("http.method", scope["method"])
+            span.set_attribute("http.target", scope["path"])
+            await self.app(scope, receive, send_traced)
+            route = get_route(scope)
+            span.set_attribute("http.route", route)
+            span.update_name(f"{scope['method']} {route}")
@@ -0,0 +1,69 @@
+"""
+Тесты слоя кеширования и пагинации без внешних сервисов: redis заменяется
+InMemoryRedis, elastic — FakeElasticsearch из бенчмарков.
+
+Запуск из каталога fastapi-solution:
+    python -m pytest tests
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path[:0] = [str(ROOT / "src"), str(ROOT)]
+
+from benchmarks.fake_elastic import FakeElasticsearch  # noqa: E402
+from benchmarks.fixtures import make_corpus  # noqa: E402
+from db.elastic import get_elastic  # noqa: E402
+from db.memory_redis import InMemoryRedis  # noqa: E402
+from db.redis import get_redis  # noqa: E402
+from main import app  # noqa: E402
+from utils import caching  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def reset_caching():
+    """
+    Локальные кеши, поколения индексов и счётчики горячих ключей живут
+    на уровне модуля, поэтому между тестами они сбрасываются.
+    """
+    yield
+    for local_cache in caching._local_caches:
+        local_cache.clear()
+    caching._generations.clear()
+    caching._refresh_failed_at.clear()
+    caching._in_flight.clear()
+    caching._hot_keys.__init__(
+        caching._hot_keys.width,
+        caching._hot_keys.depth,
+        caching._hot_keys.top_k,
+        caching._hot_keys.decay_interval,
+    )
+
+
+@pytest.fixture
+def redis() -> InMemoryRedis:
+    return InMemoryRedis()
+
+
+@pytest.fixture(scope="session")
+def corpus() -> dict:
+    return make_corpus(films=60, persons=30, genres=5)
+
+
+@pytest.fixture
+def elastic(corpus) -> FakeElasticsearch:
+    return FakeElasticsearch(corpus)
+
+
+@pytest.fixture
+def client(redis, elastic) -> TestClient:
+    """
+    Приложение без startup: клиенты redis и elastic подменяются зависимостями.
+    """
+    app.dependency_overrides.update({get_redis: lambda: redis, get_elastic: lambda: elastic})
+    yield TestClient(app)
+    app.dependency_overrides.clear()
@@ -0,0 +1,44 @@
+import asyncio
+
+from core.config import settings
+from services.films import FilmService
+
+
+def test_get_by_ids_keeps_order_and_duplicates(redis, elastic, corpus):
+    service = FilmService(redis, elastic)
+    first, second = (doc["id"] for doc in corpus["movies"][:2])
+
+    async def scenario():
+        films = await service.get_by_ids([second, first, "missing", second])
+        cached = await service.get_by_ids([first, second])
+        return [film.id for film in films], [film.id for film in cached]
+
+    assert asyncio.run(scenario()) == ([second, first, second], [first, second])
+    assert elastic.requests == 1
+
+
+def test_get_by_ids_shares_cache_with_get_by_id(redis, elastic, corpus):
+    service = FilmService(redis, elastic)
+    film_id = corpus["movies"][0]["id"]
+
+    async def scenario():
+        await service.get_by_id(film_id)
+        return await service.get_by_ids([film_id], rendered=True)
+
+    assert asyncio.run(scenario()).startswith(b'[{"id":"' + film_id.encode())
+    assert elastic.requests == 1
+
+
+def test_batch_endpoint(client, corpus):
+    first, second = (doc["id"] for doc in corpus["persons"][:2])
+
+    response = client.get("/api/v1/persons/batch", params={"ids": [second, "missing", first]})
+
+    assert response.status_code == 200
+    assert [person["id"] for person in response.json()] == [second, first]
+
+
+def test_batch_endpoint_limits_ids(client):
+    ids = [str(i) for i in range(settings.batch_max_ids + 1)]
+
+    assert client.get("/api/v1/genres/batch", params={"ids": ids}).status_code == 400
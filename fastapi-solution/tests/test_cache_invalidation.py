@@ -0,0 +1,64 @@
+import asyncio
+
+import orjson
+
+from core.config import settings
+from services.films import FilmService
+from utils import caching
+from utils.cache_invalidation import apply_invalidation, listen_invalidations
+from utils.caching import get_generation_key, get_tag_key
+
+
+async def _invalidate_like_etl(redis, index: str, ids: list[str]) -> tuple[int, list[str]]:
+    """
+    Те же команды, что выполняет CacheInvalidationPublisher в ETL.
+    """
+    generation = await redis.incr(get_generation_key(index))
+    tag_keys = [get_tag_key(index, obj_id) for obj_id in ids]
+    cache_keys = sorted({key.decode() for tag in tag_keys for key in await redis.smembers(tag)})
+    await redis.delete(*cache_keys, *tag_keys)
+    return generation, cache_keys
+
+
+def test_changed_film_is_reloaded_after_invalidation(redis, elastic):
+    service = FilmService(redis, elastic)
+
+    async def scenario():
+        films = await service.get_list(["title"], 1, 5, {})
+        film_id = films[0].id
+        await service.get_by_id(film_id)
+
+        requests = elastic.requests
+        await service.get_list(["title"], 1, 5, {})
+        await service.get_by_id(film_id)
+        assert elastic.requests == requests
+
+        doc = elastic.indices["movies"][film_id]
+        elastic.indices["movies"][film_id] = {**doc, "title": "Aaa changed"}
+        generation, cache_keys = await _invalidate_like_etl(redis, "movies", [film_id])
+        apply_invalidation("movies", generation, cache_keys)
+        films = await service.get_list(["title"], 1, 5, {})
+        film = await service.get_by_id(film_id)
+        return len(cache_keys), films[0].title, film.title
+
+    assert asyncio.run(scenario()) == (1, "Aaa changed", "Aaa changed")
+
+
+def test_listener_only_updates_local_state(redis):
+    cache_key = "{movies:f1}:FilmService.get_by_id.x"
+    local_cache = caching._local_caches[0]
+
+    async def scenario():
+        local_cache.set(cache_key, "film", 1)
+        await redis.set(cache_key, "film")
+        listener = asyncio.create_task(listen_invalidations(redis))
+        await asyncio.sleep(0)
+        event = {"index": "movies", "ids": ["f1"], "generation": 7, "keys": [cache_key]}
+        await redis.publish(settings.cache_invalidation_channel, orjson.dumps(event))
+        await asyncio.sleep(0.01)
+        listener.cancel()
+        return await redis.get(cache_key), await redis.get(get_generation_key("movies"))
+
+    assert asyncio.run(scenario()) == (b"film", None)
+    assert local_cache.get(cache_key) is None
+    assert caching._generations["movies"][0] == 7
@@ -0,0 +1,35 @@
+import asyncio
+
+from services.films import FilmService
+from utils.cache_keys import hash_arguments, normalize_filters, normalize_query, normalize_sort
+
+
+def test_query_is_lowercased_and_spaces_collapsed():
+    assert normalize_query("  Star   WARS ") == "star wars"
+    assert normalize_query("") is None
+
+
+def test_sort_keeps_first_mention_of_field():
+    assert normalize_sort(["-imdb_rating", "title", "imdb_rating"]) == ["-imdb_rating", "title"]
+    assert normalize_sort([]) is None
+
+
+def test_filters_ignore_order_duplicates_and_missing_values():
+    assert normalize_filters({"genres_id": ["b", "a", "b"], "actors_id": None}) == {
+        "genres_id": ["a", "b"]
+    }
+
+
+def test_hash_does_not_depend_on_key_order():
+    assert hash_arguments({"a": 1, "b": [2]}) == hash_arguments({"b": [2], "a": 1})
+
+
+def test_equivalent_searches_share_cache_entry(redis, elastic):
+    service = FilmService(redis, elastic)
+
+    async def scenario():
+        await service.get_by_query("Star Wars", ["title"], 1, 5, {"genres_id": None})
+        await service.get_by_query(" star  wars", ["title", "-title"], 1, 5, {})
+        return elastic.requests
+
+    assert asyncio.run(scenario()) == 1
@@ -0,0 +1,54 @@
+import asyncio
+from datetime import datetime
+
+from models.film import FilmBrief, FilmDetail
+from services.base import Service
+from utils.cache_serializer import CacheData, OrjsonCacheSerializer
+from utils.caching import cache
+
+
+class BriefService(Service):
+    index = "briefs"
+
+    def __init__(self, redis):
+        super().__init__(redis, elastic=None)
+        self.fetches = 0
+
+    @cache(expire=60, serializer=OrjsonCacheSerializer(list[FilmBrief]))
+    async def get_list(self, name: str) -> list[FilmBrief]:
+        self.fetches += 1
+        return [FilmBrief.construct(id=name, title=name.title(), imdb_rating=7.5)]
+
+
+def test_round_trip_keeps_rendered_json(corpus):
+    films = [FilmDetail(**doc) for doc in corpus["movies"][:3]]
+    serializer = OrjsonCacheSerializer(list[FilmDetail])
+
+    raw = serializer.serialize(CacheData(saved_datetime=datetime.now(), data=films))
+    restored = serializer.deserialize(raw).data
+
+    assert [film.id for film in restored] == [film.id for film in films]
+    assert serializer.render(restored) == serializer.render(films)
+    assert serializer.deserialize_rendered(raw).data == serializer.render(films)
+
+
+def test_entry_of_other_schema_is_not_read():
+    data = CacheData(saved_datetime=datetime.now(), data=[])
+    raw = OrjsonCacheSerializer(list[FilmBrief]).serialize(data)
+
+    assert OrjsonCacheSerializer(list[FilmDetail]).deserialize(raw) is None
+    assert OrjsonCacheSerializer(list[FilmBrief]).deserialize(b"garbage") is None
+
+
+def test_version_mismatch_is_a_miss(redis):
+    service = BriefService(redis)
+
+    async def scenario():
+        await service.get_list("a")
+        (key,) = [key.decode() for key in await redis.keys() if b"get_list" in key]
+        _, saved, payload = (await redis.get(key)).split(b"|", 2)
+        await redis.set(key, b"0.outdated|" + saved + b"|" + payload)
+        return await service.get_list("a")
+
+    assert asyncio.run(scenario())[0].title == "A"
+    assert service.fetches == 2
@@ -0,0 +1,136 @@
+import asyncio
+
+from redis.exceptions import ConnectionError
+
+from db.memory_redis import InMemoryRedis
+from services.base import Service
+from utils import caching
+from utils.caching import cache
+
+
+class DeadRedis(InMemoryRedis):
+    """
+    Redis, к которому не удаётся подключиться: каждая команда завершается ошибкой.
+    """
+
+    async def get(self, *args, **kwargs):
+        raise ConnectionError("redis is down")
+
+    mget = set = incr = delete = expire = sadd = get
+
+    def lock(self, name: str, timeout: float | None = None, blocking_timeout: float | None = None):
+        return _DeadLock()
+
+
+class _DeadLock:
+    async def acquire(self) -> bool:
+        raise ConnectionError("redis is down")
+
+    async def release(self) -> None:
+        raise ConnectionError("redis is down")
+
+
+class ThingService(Service):
+    index = "things"
+
+    def __init__(self, redis):
+        super().__init__(redis, elastic=None)
+        self.fetches = 0
+        self.failing = False
+
+    async def _fetch(self, name: str) -> dict:
+        self.fetches += 1
+        await asyncio.sleep(0.01)
+        return {"name": name, "version": self.fetches}
+
+    @cache(expire=60)
+    async def get_value(self, name: str) -> dict:
+        return await self._fetch(name)
+
+    @cache(expire=0, stale_ttl=60)
+    async def get_stale(self, name: str) -> dict:
+        if self.failing:
+            raise ConnectionError("elastic is down")
+        return await self._fetch(name)
+
+    @cache(expire=60, local_expire=60)
+    async def get_local(self, name: str) -> dict:
+        return await self._fetch(name)
+
+    @cache(expire=60, distributed_lock=True, by_id=True)
+    async def get_by_id(self, obj_id: str) -> dict:
+        return await self._fetch(obj_id)
+
+
+def test_concurrent_misses_are_loaded_once(redis):
+    service = ThingService(redis)
+
+    async def scenario():
+        return await asyncio.gather(*(service.get_value("a") for _ in range(10)))
+
+    results = asyncio.run(scenario())
+    assert service.fetches == 1
+    assert results == [{"name": "a", "version": 1}] * 10
+
+
+def test_hit_does_not_fetch_again(redis):
+    service = ThingService(redis)
+
+    async def scenario():
+        await service.get_value("a")
+        return await service.get_value("a")
+
+    assert asyncio.run(scenario()) == {"name": "a", "version": 1}
+    assert service.fetches == 1
+
+
+def test_lock_is_skipped_when_redis_is_down():
+    service = ThingService(DeadRedis())
+
+    async def scenario():
+        return await service.get_by_id("a"), await service.get_value("b")
+
+    assert asyncio.run(scenario()) == ({"name": "a", "version": 1}, {"name": "b", "version": 2})
+
+
+def test_local_tier_answers_without_redis(redis):
+    service = ThingService(redis)
+
+    async def scenario():
+        await service.get_local("a")
+        await redis.flushdb()
+        return await service.get_local("a")
+
+    assert asyncio.run(scenario()) == {"name": "a", "version": 1}
+    assert service.fetches == 1
+    assert ThingService.get_local.stats.local_hits >= 1
+
+
+def test_stale_entry_is_returned_and_refreshed_in_background(redis):
+    service = ThingService(redis)
+
+    async def scenario():
+        first = await service.get_stale("a")
+        stale = await service.get_stale("a")
+        await asyncio.gather(*caching._background_tasks)
+        return first, stale, await service.get_stale("a")
+
+    first, stale, refreshed = asyncio.run(scenario())
+    assert first == stale == {"name": "a", "version": 1}
+    assert refreshed == {"name": "a", "version": 2}
+
+
+def test_failed_refresh_is_not_retried_during_cooldown(redis):
+    service = ThingService(redis)
+    stats = ThingService.get_stale.stats
+
+    async def scenario():
+        await service.get_stale("a")
+        service.failing = True
+        errors = stats.refresh_errors
+        for _ in range(5):
+            assert await service.get_stale("a") == {"name": "a", "version": 1}
+            await asyncio.gather(*caching._background_tasks)
+        return stats.refresh_errors - errors
+
+    assert asyncio.run(scenario()) == 1
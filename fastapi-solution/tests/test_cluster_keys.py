@@ -0,0 +1,28 @@
+from redis.crc import key_slot
+
+from services.films import FilmService
+from utils.caching import _get_cache_key, get_generation_key, get_tag_key
+
+
+def test_object_keys_share_slot_and_objects_are_spread(redis, elastic):
+    service = FilmService(redis, elastic)
+    get_by_id = FilmService.get_by_id.__wrapped__
+
+    def object_keys(obj_id: str) -> list[str]:
+        cache_key = _get_cache_key(service, get_by_id, obj_id, by_id=True)
+        return [cache_key, f"lock:{cache_key}", get_tag_key("movies", obj_id)]
+
+    slots = {obj_id: {key_slot(key.encode()) for key in object_keys(obj_id)} for obj_id in "abc"}
+    assert all(len(object_slots) == 1 for object_slots in slots.values())
+    assert len(set.union(*slots.values())) == 3
+
+
+def test_list_keys_have_no_hash_tag(redis, elastic):
+    service = FilmService(redis, elastic)
+    get_list = FilmService.get_list.__wrapped__
+
+    key = _get_cache_key(service, get_list, None, 1, 10, {}, generation=3)
+
+    assert key.startswith("movies:FilmService.get_list.g3.")
+    assert "{" not in key
+    assert get_generation_key("movies") == "gen:{movies}"
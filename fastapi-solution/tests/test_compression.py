@@ -0,0 +1,71 @@
+import asyncio
+import gzip
+
+from db import redis as redis_db
+from utils import compression
+from utils.compression import CompressionMiddleware, choose_encoding
+
+BODY = b'{"films":[' + b",".join(b'{"id":"%d"}' % i for i in range(200)) + b"]}"
+
+
+async def _json_app(scope, receive, send):
+    await send(
+        {
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [(b"content-type", b"application/json")],
+        }
+    )
+    await send({"type": "http.response.body", "body": BODY})
+
+
+async def _request(app, accept_encoding: str) -> tuple[dict, bytes]:
+    messages = list()
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {"type": "http", "headers": [(b"accept-encoding", accept_encoding.encode())]}
+    await app(scope, None, send)
+    headers = {key.decode(): value.decode() for key, value in messages[0]["headers"]}
+    return headers, messages[1]["body"]
+
+
+def test_encoding_follows_q_values_and_prefers_brotli():
+    assert choose_encoding("gzip, br") == "br"
+    assert choose_encoding("gzip;q=1, br;q=0.5") == "gzip"
+    assert choose_encoding("br;q=0, *") == "gzip"
+    assert choose_encoding("identity") is None
+
+
+def test_json_is_compressed_and_varies_on_encoding():
+    headers, body = asyncio.run(_request(CompressionMiddleware(_json_app), "gzip"))
+
+    assert headers["content-encoding"] == "gzip"
+    assert headers["vary"] == "Accept-Encoding"
+    assert gzip.decompress(body) == BODY
+
+
+def test_small_body_is_left_as_is(monkeypatch):
+    monkeypatch.setattr(compression.settings, "compression_min_size", len(BODY) + 1)
+
+    headers, body = asyncio.run(_request(CompressionMiddleware(_json_app), "gzip"))
+
+    assert "content-encoding" not in headers
+    assert body == BODY
+
+
+def test_workers_share_compressed_body(redis, monkeypatch):
+    calls = list()
+    monkeypatch.setattr(redis_db, "redis", redis)
+    monkeypatch.setitem(
+        compression._COMPRESSORS, "gzip", lambda data: calls.append(data) or gzip.compress(data)
+    )
+    workers = [CompressionMiddleware(_json_app) for _ in range(2)]
+
+    async def scenario():
+        return [await _request(worker, "gzip") for worker in workers for _ in range(2)]
+
+    responses = asyncio.run(scenario())
+    assert len(calls) == 1
+    assert len({body for _, body in responses}) == 1
@@ -0,0 +1,120 @@
+import asyncio
+
+import pytest
+from elasticsearch import NotFoundError
+
+from benchmarks.fake_elastic import FakeElasticsearch
+from db.elastic import get_elastic
+from main import app
+from models.film import FilmDetail
+from services.films import FilmService
+from utils.cursor import Cursor, decode_cursor, encode_cursor
+from utils.exceptions import InvalidCursorException
+
+
+class PitElasticsearch(FakeElasticsearch):
+    """
+    Поиск по point in time возвращает обновлённый id, а после истечения
+    point in time завершается ошибкой search_context_missing_exception.
+    """
+
+    expired = False
+
+    async def search(self, index=None, body=None, **params) -> dict:
+        if body and "pit" in body:
+            if self.expired:
+                raise NotFoundError(404, "search_context_missing_exception", {})
+            response = await super().search("movies", body, **params)
+            return {**response, "pit_id": body["pit"]["id"] + "+"}
+        return await super().search(index, body, **params)
+
+
+def test_cursor_round_trip():
+    cursor = Cursor(search_after=[8.5, "f1"], sort="imdb_rating:desc,id:desc", pit_id="pit")
+    assert decode_cursor(encode_cursor(cursor)) == cursor
+
+
+@pytest.mark.parametrize("value", ["not base64!", "e30", "eyJzZWFyY2hfYWZ0ZXIiOlsxXX0"])
+def test_malformed_cursor_is_rejected(value):
+    with pytest.raises(InvalidCursorException):
+        decode_cursor(value)
+
+
+def test_cursor_pages_match_offset_pages(redis, elastic):
+    service = FilmService(redis, elastic)
+    sort = ["-imdb_rating"]
+
+    async def scenario():
+        first = await service.get_list(sort, 1, 10, {})
+        cursor = service.make_cursor(first.search_after, sort, FilmDetail)
+        cursor = decode_cursor(encode_cursor(cursor))
+        service.check_cursor(cursor, sort, FilmDetail)
+        by_cursor = await service.get_list(sort, 1, 10, {}, cursor=cursor)
+        return by_cursor, await service.get_list(sort, 2, 10, {})
+
+    by_cursor, by_offset = asyncio.run(scenario())
+    assert [film.id for film in by_cursor] == [film.id for film in by_offset]
+
+
+def test_search_after_is_taken_from_elastic_sort(redis, elastic):
+    service = FilmService(redis, elastic)
+
+    async def scenario():
+        hits = await elastic.search("movies", {}, size=10, sort="title.raw:asc,id:desc")
+        page = await service.get_list(["title"], 1, 10, {})
+        cached = await service.get_list(["title"], 1, 10, {})
+        last = await service.get_list(["title"], 7, 10, {})
+        return hits["hits"]["hits"][-1]["sort"], page, cached, last
+
+    sort_values, page, cached, last = asyncio.run(scenario())
+    assert page.search_after == cached.search_after == sort_values
+    assert len(last) == 0 and last.search_after is None
+
+
+def test_point_in_time_pages_are_not_cached(redis, corpus):
+    elastic = PitElasticsearch(corpus)
+    service = FilmService(redis, elastic)
+    sort = ["-imdb_rating"]
+
+    async def scenario():
+        first = await service.get_list(sort, 1, 10, {})
+        cursor = service.make_cursor(first.search_after, sort, FilmDetail, pit_id="pit")
+        pages = [await service.get_list(sort, 1, 10, {}, cursor=cursor) for _ in range(2)]
+        return pages, len(await redis.keys())
+
+    pages, keys = asyncio.run(scenario())
+    assert elastic.requests == 3
+    assert keys == 1
+    assert pages[0].pit_id == "pit+"
+
+
+def test_expired_point_in_time_is_bad_request(client, corpus):
+    elastic = PitElasticsearch(corpus)
+    app.dependency_overrides[get_elastic] = lambda: elastic
+    first = client.get("/api/v1/films/", params={"sort": "-imdb_rating", "page_size": 10})
+    cursor = decode_cursor(first.headers["X-Next-Cursor"])
+    cursor.pit_id = "pit"
+
+    elastic.expired = True
+    response = client.get(
+        "/api/v1/films/",
+        params={"sort": "-imdb_rating", "page_size": 10, "cursor": encode_cursor(cursor)},
+    )
+
+    assert response.status_code == 400
+
+
+def test_cursor_for_another_sort_is_rejected(redis, elastic):
+    service = FilmService(redis, elastic)
+    cursor = service.make_cursor([8.5, "f1"], ["-imdb_rating"], FilmDetail)
+    with pytest.raises(InvalidCursorException):
+        service.check_cursor(cursor, ["title"], FilmDetail)
+
+
+@pytest.mark.parametrize("search_after", [[8.5], [8.5, "f1", "extra"], [{"a": 1}, "f1"]])
+def test_tampered_search_after_is_rejected(redis, elastic, search_after):
+    service = FilmService(redis, elastic)
+    cursor = service.make_cursor([8.5, "f1"], ["-imdb_rating"], FilmDetail)
+    tampered = Cursor(search_after=search_after, sort=cursor.sort)
+    with pytest.raises(InvalidCursorException):
+        service.check_cursor(tampered, ["-imdb_rating"], FilmDetail)
@@ -0,0 +1,30 @@
+import asyncio
+
+from services.films import FilmService
+
+
+def test_facets_count_matching_films(redis, elastic, corpus):
+    genre = corpus["movies"][0]["genres"][0]
+    films = [
+        film
+        for film in corpus["movies"]
+        if any(item["id"] == genre["id"] for item in film["genres"])
+    ]
+    service = FilmService(redis, elastic)
+
+    facets = asyncio.run(service.get_facets(None, {"genres_id": [genre["id"]]}))
+
+    genre_counts = {value["id"]: value["count"] for value in facets.dict()["genres"]}
+    assert genre_counts[genre["id"]] == len(films)
+    assert sum(value["count"] for value in facets.dict()["imdb_rating"]) == len(films)
+    assert elastic.requests == 1
+
+
+def test_facets_endpoint_is_cached(client, elastic):
+    first = client.get("/api/v1/films/facets", params={"query": "star"})
+    second = client.get("/api/v1/films/facets", params={"query": " Star "})
+
+    assert first.status_code == 200
+    assert set(first.json()) == {"genres", "directors", "imdb_rating"}
+    assert second.json() == first.json()
+    assert elastic.requests == 1
@@ -0,0 +1,40 @@
+from models.film import FilmDetail
+from services.films import FilmService
+
+
+def test_filters_without_query_run_in_constant_score(redis, elastic):
+    service = FilmService(redis, elastic)
+
+    query = service._build_query({"genres_id": ["g1"], "actors_id": None}, FilmDetail)
+
+    assert query == {
+        "constant_score": {
+            "filter": {
+                "bool": {
+                    "filter": [
+                        {"nested": {"path": "genres", "query": {"terms": {"genres.id": ["g1"]}}}}
+                    ]
+                }
+            }
+        }
+    }
+
+
+def test_text_query_scores_and_filters_separately(redis, elastic):
+    service = FilmService(redis, elastic)
+
+    query = service._build_query({"genres_id": ["g1"]}, FilmDetail, ("title", "star"))
+
+    assert query["bool"]["must"] == {"match": {"title": {"query": "star", "fuzziness": "auto"}}}
+    assert "nested" in query["bool"]["filter"][0]
+
+
+def test_request_cache_only_without_text_query(redis, elastic):
+    service = FilmService(redis, elastic)
+
+    _, list_params = service._build_search(FilmDetail, None, 1, 10, {})
+    _, search_params = service._build_search(FilmDetail, None, 1, 10, {}, ("title", "star"))
+
+    assert list_params.get("request_cache") is True
+    assert "preference" in list_params
+    assert "request_cache" not in search_params and "preference" not in search_params
@@ -0,0 +1,92 @@
+import asyncio
+
+import pytest
+
+from core.config import settings
+from services.base import Service
+from utils.caching import cache
+from utils.hot_keys import HotKeySketch
+
+
+class RatingService(Service):
+    index = "ratings"
+
+    def __init__(self, redis):
+        super().__init__(redis, elastic=None)
+        self.fetches = 0
+
+    @cache(expire=0.2, refresh_ahead=0.15)
+    async def get_rating(self, name: str) -> dict:
+        self.fetches += 1
+        return {"name": name, "version": self.fetches}
+
+
+@pytest.fixture
+def sampled(monkeypatch):
+    monkeypatch.setattr(settings, "cache_hot_keys_sample_rate", 1)
+    monkeypatch.setattr(settings, "cache_hot_keys_min_count", 3)
+
+
+def _sketch(top_k: int = 3, decay_interval: int = 1000) -> HotKeySketch:
+    return HotKeySketch(width=256, depth=4, top_k=top_k, decay_interval=decay_interval)
+
+
+def test_top_keys_are_ordered_by_frequency():
+    sketch = _sketch()
+    for key, count in (("a", 5), ("b", 20), ("c", 10), ("d", 1)):
+        for _ in range(count):
+            sketch.add(key)
+    assert [key for key, _ in sketch.top()] == ["b", "c", "a"]
+    assert sketch.count("b") >= 20
+    assert sketch.count("d") == 0
+
+
+def test_frequent_key_replaces_coldest_top_key():
+    sketch = _sketch(top_k=2)
+    for key in ("a", "b", "c", "c", "c"):
+        sketch.add(key)
+    top = dict(sketch.top())
+    assert len(top) == 2
+    assert top["c"] == 3
+
+
+def test_counts_decay_with_traffic():
+    sketch = _sketch(decay_interval=10)
+    for _ in range(9):
+        sketch.add("a")
+    assert sketch.count("a") == 9
+    sketch.add("b")
+    assert sketch.count("a") == 4
+    assert sketch.count("b") == 0
+
+
+def test_hot_key_is_refreshed_before_expiry(sampled, redis):
+    service = RatingService(redis)
+
+    async def scenario():
+        for _ in range(3):
+            await service.get_rating("hot")
+        await service.get_rating("cold")
+        await asyncio.sleep(0.12)
+        hot, cold = await service.get_rating("hot"), await service.get_rating("cold")
+        await asyncio.sleep(0.02)
+        return hot, cold, await service.get_rating("hot")
+
+    hot, cold, refreshed = asyncio.run(scenario())
+    assert hot["version"] == 1 and cold["version"] == 2
+    assert refreshed["version"] == 3
+    assert service.fetches == 3
+
+
+def test_admin_endpoint_lists_hot_keys(monkeypatch, sampled, client):
+    monkeypatch.setattr(settings, "admin_token", "secret")
+    for _ in range(3):
+        client.get("/api/v1/genres/")
+
+    response = client.get("/api/v1/admin/hot-keys", headers={"X-Admin-Token": "secret"})
+    forbidden = client.get("/api/v1/admin/hot-keys", headers={"X-Admin-Token": "wrong"})
+
+    assert response.status_code == 200
+    assert response.json()[0]["key"].startswith("genres:GenreService.get_list")
+    assert response.json()[0]["count"] == 3
+    assert forbidden.status_code == 403
@@ -0,0 +1,39 @@
+from api.v1.responses import etag_matches
+from core.config import settings
+
+
+def test_etag_comparison_is_weak_and_ignores_encoding():
+    assert etag_matches('"abc"', "abc")
+    assert etag_matches('W/"other", "abc-gzip"', "abc")
+    assert etag_matches("*", "abc")
+    assert not etag_matches('"abd"', "abc")
+    assert not etag_matches(None, "abc")
+
+
+def test_film_details_are_revalidated_with_etag(client, corpus):
+    url = f"/api/v1/films/{corpus['movies'][0]['id']}"
+
+    response = client.get(url, headers={"Accept-Encoding": "identity"})
+    etag = response.headers["ETag"]
+    not_modified = client.get(url, headers={"If-None-Match": etag, "Accept-Encoding": "identity"})
+
+    assert response.status_code == 200
+    assert response.headers["Cache-Control"] == (
+        f"public, max-age={settings.cache_expire_in_seconds}, "
+        f"stale-while-revalidate={settings.cache_stale_ttl_in_seconds}"
+    )
+    assert not_modified.status_code == 304
+    assert not_modified.content == b""
+    assert not_modified.headers["ETag"] == etag
+
+
+def test_not_modified_keeps_etag_of_compressed_response(client, corpus):
+    url = f"/api/v1/films/{corpus['movies'][0]['id']}"
+    headers = {"Accept-Encoding": "gzip"}
+
+    etag = client.get(url, headers=headers).headers["ETag"]
+    not_modified = client.get(url, headers={**headers, "If-None-Match": etag})
+
+    assert etag.endswith('-gzip"')
+    assert not_modified.status_code == 304
+    assert not_modified.headers["ETag"] == etag
@@ -0,0 +1,37 @@
+from utils.memory_cache import MemoryCache
+
+
+def test_expired_entry_is_dropped():
+    cache = MemoryCache(expire=0, max_entries=10, max_bytes=100)
+    cache.set("a", 1, 1)
+    assert cache.get("a") is None
+    assert len(cache) == 0
+    assert cache.size == 0
+
+
+def test_least_recently_used_entry_is_evicted_first():
+    cache = MemoryCache(expire=60, max_entries=2, max_bytes=100)
+    cache.set("a", 1, 1)
+    cache.set("b", 2, 1)
+    cache.get("a")
+    cache.set("c", 3, 1)
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+
+
+def test_size_limit_evicts_until_entries_fit():
+    cache = MemoryCache(expire=60, max_entries=10, max_bytes=10)
+    cache.set("a", 1, 4)
+    cache.set("b", 2, 4)
+    cache.set("c", 3, 4)
+    assert cache.get("a") is None
+    assert cache.size == 8
+
+
+def test_entry_larger_than_limit_is_not_stored():
+    cache = MemoryCache(expire=60, max_entries=10, max_bytes=10)
+    cache.set("a", 1, 4)
+    cache.set("a", 2, 11)
+    assert cache.get("a") is None
+    assert cache.size == 0
@@ -0,0 +1,79 @@
+import asyncio
+
+from db.memory_redis import InMemoryRedis
+
+
+def test_pipeline_returns_results_in_order(redis: InMemoryRedis):
+    async def scenario():
+        async with redis.pipeline(transaction=False) as pipe:
+            pipe.incr("counter")
+            pipe.incr("counter")
+            pipe.set("key", "value", ex=60)
+            pipe.sadd("tag", "key")
+            pipe.smembers("tag")
+            return await pipe.execute()
+
+    assert asyncio.run(scenario()) == [1, 2, True, 1, {b"key"}]
+
+
+def test_expired_keys_are_not_returned(redis: InMemoryRedis):
+    async def scenario():
+        await redis.set("key", "value")
+        await redis.expire("key", 0)
+        return await redis.get("key"), await redis.mget(["key", "missing"])
+
+    assert asyncio.run(scenario()) == (None, [None, None])
+
+
+def test_lock_waits_no_longer_than_blocking_timeout(redis: InMemoryRedis):
+    async def scenario():
+        first = redis.lock("lock:key", timeout=1, blocking_timeout=0.01)
+        second = redis.lock("lock:key", timeout=1, blocking_timeout=0.01)
+        acquired = await first.acquire(), await second.acquire()
+        await first.release()
+        return acquired, await second.acquire()
+
+    assert asyncio.run(scenario()) == ((True, False), True)
+
+
+def test_non_blocking_lock_fails_at_once(redis: InMemoryRedis):
+    async def scenario():
+        first = redis.lock("lock:key", timeout=1)
+        second = redis.lock("lock:key", timeout=1, blocking=False)
+        return await first.acquire(), await second.acquire()
+
+    assert asyncio.run(scenario()) == (True, False)
+
+
+def test_zremrangebyrank_clamps_range_like_redis(redis: InMemoryRedis):
+    async def scenario():
+        for score, member in enumerate("abcde", start=1):
+            await redis.zincrby("rating", score, member)
+        assert await redis.zremrangebyrank("rating", 3, 1) == 0
+        assert await redis.zremrangebyrank("rating", 10, 20) == 0
+        assert await redis.zremrangebyrank("rating", -100, 0) == 1
+        assert await redis.zremrangebyrank("rating", -2, -1) == 2
+        return await redis.zrevrange("rating", 0, -1)
+
+    assert asyncio.run(scenario()) == [b"c", b"b"]
+
+
+def test_zrevrange_with_scores(redis: InMemoryRedis):
+    async def scenario():
+        await redis.zincrby("rating", 2, "a")
+        await redis.zincrby("rating", 5, "b")
+        await redis.zincrby("rating", 1, "a")
+        return await redis.zrevrange("rating", 0, 0, withscores=True), await redis.zcard("rating")
+
+    assert asyncio.run(scenario()) == ([(b"b", 5.0)], 2)
+
+
+def test_published_message_reaches_subscriber(redis: InMemoryRedis):
+    async def scenario():
+        async with redis.pubsub() as pubsub:
+            await pubsub.subscribe("channel")
+            receivers = await redis.publish("channel", "hello")
+            message = await anext(pubsub.listen())
+        return receivers, message["data"], await redis.publish("channel", "nobody")
+
+    assert asyncio.run(scenario()) == (1, b"hello", 0)
@@ -0,0 +1,40 @@
+from prometheus_client import REGISTRY
+
+from api.metrics import CacheStatsCollector
+from services.films import FilmService
+
+
+def _sample(name: str, labels: dict) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+def test_cache_stats_are_collected_per_method(client, corpus):
+    labels = {"method": FilmService.get_by_id.__qualname__}
+
+    def served_from_cache() -> float:
+        return _sample("cache_hits_total", labels) + _sample("cache_local_hits_total", labels)
+
+    served = served_from_cache()
+    for _ in range(3):
+        client.get(f"/api/v1/films/{corpus['movies'][0]['id']}")
+
+    families = {family.name for family in CacheStatsCollector().collect()}
+    assert {"cache_hits", "cache_misses", "cache_local_hits"} <= families
+    assert served_from_cache() == served + 2
+
+
+def test_request_metrics_use_route_template(client, corpus):
+    labels = {"method": "GET", "route": "/api/v1/films/{film_id}", "status": "200"}
+    count = _sample("api_request_duration_seconds_count", labels)
+
+    client.get(f"/api/v1/films/{corpus['movies'][0]['id']}")
+    client.get(f"/api/v1/films/{corpus['movies'][1]['id']}")
+
+    assert _sample("api_request_duration_seconds_count", labels) == count + 2
+
+
+def test_metrics_endpoint_exposes_registry(client):
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert "api_requests_in_flight" in response.text
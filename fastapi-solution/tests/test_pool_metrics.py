@@ -0,0 +1,18 @@
+from api.metrics import PoolUsageCollector
+from core.config import settings
+from db import elastic, redis
+from db.memory_redis import InMemoryRedis
+
+
+def test_pool_usage_is_exported_as_gauges(monkeypatch):
+    monkeypatch.setattr(settings, "elastic_max_connections", 7)
+    monkeypatch.setattr(elastic, "es", elastic.create_elastic())
+    monkeypatch.setattr(redis, "redis", InMemoryRedis())
+
+    (family,) = PoolUsageCollector().collect()
+
+    samples = {tuple(sample.labels.values()): sample.value for sample in family.samples}
+    assert family.type == "gauge"
+    assert samples[("elastic", "max")] == 7
+    assert samples[("elastic", "in_use")] == 0
+    assert samples[("redis", "max")] == 0
@@ -0,0 +1,60 @@
+from models.film import FilmDetail, FilmFilters
+from models.person import PersonDetail
+from services.films import FilmService
+from services.query_plan import (
+    FilterPlan,
+    compile_filter_plan,
+    compile_filter_plans,
+    compile_sort_plans,
+)
+
+
+def test_nested_filter_is_compiled_to_nested_terms():
+    plan = compile_filter_plan("genres_id", FilmDetail)
+
+    assert plan == FilterPlan(nested_paths=("genres",), field="genres.id")
+    assert plan.build(["g1"]) == {
+        "nested": {"path": "genres", "query": {"terms": {"genres.id": ["g1"]}}}
+    }
+
+
+def test_plain_and_unknown_filters():
+    assert compile_filter_plan("full_name", PersonDetail).build(["a"]) == {
+        "terms": {"full_name": ["a"]}
+    }
+    assert compile_filter_plan("unknown_id", FilmDetail) is None
+
+
+def test_filter_plans_cover_filter_fields():
+    plans = compile_filter_plans(FilmFilters, FilmDetail)
+
+    assert set(plans) == set(FilmFilters.__dataclass_fields__)
+    assert plans["directors_name"].field == "directors.name"
+
+
+def test_sort_plans_for_allowed_fields_only():
+    plans = compile_sort_plans(FilmDetail, {"title": "title.raw", "missing": "missing"})
+
+    assert {name: plan.clause for name, plan in plans.items()} == {
+        "title": "title.raw:asc",
+        "-title": "title.raw:desc",
+    }
+
+
+def test_sort_string_ends_with_id_tiebreaker(redis, elastic):
+    service = FilmService(redis, elastic)
+
+    assert service._make_sort_string(["-imdb_rating", "bogus"], FilmDetail) == (
+        "imdb_rating:desc,id:desc"
+    )
+    assert service._make_sort_string(None, FilmDetail) == "id:desc"
+
+
+def test_plans_are_compiled_once_per_model(redis, elastic):
+    service = FilmService(redis, elastic)
+
+    service._get_query_filters({"genres_id": ["g1"]}, FilmDetail)
+    plans = service._get_plans(FilmDetail)
+    service._get_query_filters({"genres_id": ["g2"]}, FilmDetail)
+
+    assert service._get_plans(FilmDetail)[1]["genres_id"] is plans[1]["genres_id"]
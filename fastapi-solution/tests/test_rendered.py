@@ -0,0 +1,39 @@
+import asyncio
+
+import orjson
+
+from services.films import FilmService
+from utils.caching import get_rendered
+
+
+def _fail(*args, **kwargs):
+    raise AssertionError("модели не должны строиться при попадании в кеш")
+
+
+def test_rendered_hit_skips_models(redis, elastic, monkeypatch):
+    service = FilmService(redis, elastic)
+    serializer = FilmService.get_list.policy.serializer
+
+    async def scenario():
+        films = await service.get_list(["title"], 1, 5, {})
+        monkeypatch.setattr(serializer, "build", _fail)
+        return films, await get_rendered(service.get_list, ["title"], 1, 5, {})
+
+    films, rendered = asyncio.run(scenario())
+    assert isinstance(rendered, bytes)
+    assert orjson.loads(bytes(rendered)) == [film.dict() for film in films]
+    assert elastic.requests == 1
+
+
+def test_rendered_miss_renders_loaded_object(redis, elastic, corpus):
+    service = FilmService(redis, elastic)
+    film_id = corpus["movies"][0]["id"]
+
+    async def scenario():
+        rendered = await get_rendered(service.get_by_id, film_id)
+        return rendered, await get_rendered(service.get_by_id, film_id)
+
+    first, second = asyncio.run(scenario())
+    assert first == second
+    assert orjson.loads(first)["id"] == film_id
+    assert elastic.requests == 1
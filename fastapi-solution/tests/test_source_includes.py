@@ -0,0 +1,30 @@
+import asyncio
+
+from benchmarks.fake_elastic import FakeElasticsearch
+from models.film import FilmBrief
+from services.films import FilmService
+from services.query_plan import get_source_includes
+
+
+class RecordingElasticsearch(FakeElasticsearch):
+    def __init__(self, corpus: dict):
+        super().__init__(corpus)
+        self.search_params = list()
+
+    async def search(self, index=None, body=None, **params) -> dict:
+        self.search_params.append(params)
+        return await super().search(index, body, **params)
+
+
+def test_source_includes_are_model_fields():
+    assert get_source_includes(FilmBrief) == ("id", "title", "imdb_rating")
+
+
+def test_list_reads_only_brief_fields(redis, corpus):
+    elastic = RecordingElasticsearch(corpus)
+    service = FilmService(redis, elastic)
+
+    films = asyncio.run(service.get_list(["title"], 1, 5, {}))
+
+    assert elastic.search_params[0]["_source_includes"] == ("id", "title", "imdb_rating")
+    assert all(set(film.dict()) == {"id", "title", "imdb_rating"} for film in films)
@@ -0,0 +1,24 @@
+def _has_word_with_prefix(text: str, prefix: str) -> bool:
+    return any(word.lower().startswith(prefix) for word in text.split())
+
+
+def test_suggest_returns_films_and_persons_by_prefix(client, elastic):
+    response = client.get("/api/v1/suggest/", params={"query": " STA", "size": 3})
+    requests = elastic.requests
+    cached = client.get("/api/v1/suggest/", params={"query": "sta", "size": 3})
+
+    suggestions = response.json()
+    assert response.status_code == 200
+    assert 0 < len(suggestions["films"]) <= 3
+    assert all(_has_word_with_prefix(film["title"], "sta") for film in suggestions["films"])
+    assert all(set(film) == {"id", "title"} for film in suggestions["films"])
+    assert all(set(person) == {"id", "full_name"} for person in suggestions["persons"])
+    assert cached.json() == suggestions
+    assert elastic.requests == requests
+
+
+def test_blank_suggest_query_does_not_search(client, elastic):
+    response = client.get("/api/v1/suggest/", params={"query": "   "})
+
+    assert response.json() == {"films": [], "persons": []}
+    assert elastic.requests == 0
@@ -0,0 +1,102 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from core.config import settings
+from main import app
+from utils import tracing
+from utils.tracing import (
+    NOOP_SPAN,
+    InMemorySpanExporter,
+    TracingMiddleware,
+    parse_traceparent,
+    start_span,
+    start_trace,
+)
+
+TRACE_ID = "4bf92f3577b34da6a3ce929d0e0e4736"
+PARENT_ID = "00f067aa0ba902b7"
+
+
+@pytest.fixture
+def exporter():
+    previous = tracing.get_exporter()
+    exporter = InMemorySpanExporter(100)
+    tracing.set_exporter(exporter)
+    yield exporter
+    tracing.set_exporter(previous)
+
+
+@pytest.fixture
+def traced_client(client):
+    return TestClient(TracingMiddleware(app))
+
+
+@pytest.mark.parametrize("flags, sampled", [("01", True), ("00", False), ("03", True)])
+def test_traceparent_is_parsed(flags, sampled):
+    assert parse_traceparent(f"00-{TRACE_ID}-{PARENT_ID}-{flags}") == (
+        TRACE_ID,
+        PARENT_ID,
+        sampled,
+    )
+
+
+@pytest.mark.parametrize(
+    "traceparent",
+    [
+        None,
+        "",
+        "garbage",
+        f"00-{TRACE_ID}-{PARENT_ID}",
+        f"00-{TRACE_ID[:-1]}-{PARENT_ID}-01",
+        f"00-{TRACE_ID}-{PARENT_ID}-zz",
+        f"00-{'0' * 32}-{PARENT_ID}-01",
+        f"00-{TRACE_ID}-{'0' * 16}-01",
+    ],
+)
+def test_invalid_traceparent_is_ignored(traceparent):
+    assert parse_traceparent(traceparent) is None
+
+
+@pytest.mark.parametrize("rate, exported", [(0, 0), (1, 1)])
+def test_requests_are_sampled_with_sample_rate(monkeypatch, exporter, rate, exported):
+    monkeypatch.setattr(settings, "tracing_sample_rate", rate)
+    with start_trace("GET /"):
+        pass
+    assert len(exporter.spans) == exported
+
+
+@pytest.mark.parametrize("flags, exported", [("01", 1), ("00", 0)])
+def test_incoming_sampling_decision_wins(monkeypatch, exporter, flags, exported):
+    monkeypatch.setattr(settings, "tracing_sample_rate", 1 - exported)
+    with start_trace("GET /", f"00-{TRACE_ID}-{PARENT_ID}-{flags}"):
+        pass
+    assert len(exporter.spans) == exported
+
+
+def test_span_outside_trace_is_noop(exporter):
+    with start_span("elastic.search") as span:
+        assert span is NOOP_SPAN
+    assert not exporter.spans
+
+
+def test_middleware_continues_incoming_trace(monkeypatch, exporter, traced_client):
+    monkeypatch.setattr(settings, "tracing_sample_rate", 0)
+    response = traced_client.get(
+        "/api/v1/genres/", headers={"traceparent": f"00-{TRACE_ID}-{PARENT_ID}-01"}
+    )
+
+    assert response.status_code == 200
+    root = exporter.spans[-1]
+    assert root.trace_id == TRACE_ID and root.parent_id == PARENT_ID
+    assert root.name == "GET /api/v1/genres/"
+    assert root.attributes["http.status_code"] == 200
+    children = [span for span in exporter.spans if span.parent_id == root.span_id]
+    assert children and all(span.trace_id == TRACE_ID for span in children)
+
+
+def test_middleware_skips_unsampled_requests(monkeypatch, exporter, traced_client):
+    monkeypatch.setattr(settings, "tracing_sample_rate", 0)
+    response = traced_client.get("/api/v1/genres/")
+
+    assert response.status_code == 200
+    assert not exporter.spans
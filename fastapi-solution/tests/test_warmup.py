@@ -0,0 +1,166 @@
+import asyncio
+from datetime import datetime
+
+import orjson
+import pytest
+
+from core.config import settings
+from services import warmup
+from services.films import FilmService
+from services.genres import GenreService
+from services.persons import PersonService
+from services.warmup import (
+    WARMUP_LOCK_KEY,
+    CacheWarmer,
+    WarmupProgress,
+    get_popular_ids,
+    get_popular_queries,
+    record_query,
+    record_request,
+)
+from utils.cache_invalidation import listen_invalidations
+from utils.cursor import Cursor
+
+
+@pytest.fixture(autouse=True)
+def warmup_settings(monkeypatch):
+    monkeypatch.setattr(settings, "popularity_sample_rate", 1)
+    monkeypatch.setattr(settings, "warmup_top_films", 20)
+    monkeypatch.setattr(settings, "warmup_page_size", 10)
+
+
+def _warm(redis, elastic) -> WarmupProgress:
+    progress = WarmupProgress(started_at=datetime.now())
+    services = (
+        FilmService(redis, elastic),
+        GenreService(redis, elastic),
+        PersonService(redis, elastic),
+    )
+    asyncio.run(CacheWarmer()._run(progress, *services))
+    return progress
+
+
+def test_recent_requests_outweigh_old_ones(monkeypatch, redis, elastic):
+    service = FilmService(redis, elastic)
+    bucket = settings.popularity_bucket_seconds
+
+    async def scenario():
+        monkeypatch.setattr(warmup, "time", lambda: 10 * bucket)
+        for _ in range(3):
+            await record_request(service, "old")
+        monkeypatch.setattr(warmup, "time", lambda: 12 * bucket)
+        for _ in range(2):
+            await record_request(service, "new")
+        return await get_popular_ids(service, 10)
+
+    assert asyncio.run(scenario()) == ["new", "old"]
+
+
+def test_new_id_is_not_trimmed_at_once(monkeypatch, redis, elastic):
+    monkeypatch.setattr(settings, "popularity_max_ids", 2)
+    service = FilmService(redis, elastic)
+
+    async def scenario():
+        for obj_id in ("a", "a", "b", "b", "c"):
+            await record_request(service, obj_id)
+        return await get_popular_ids(service, 10)
+
+    assert asyncio.run(scenario()) == ["b", "a", "c"]
+
+
+def test_equivalent_queries_share_rating_entry(redis, elastic):
+    service = FilmService(redis, elastic)
+
+    async def scenario():
+        await record_query(
+            service.get_by_query, "Star  Wars", ["title"], 1, 10, {"genres_id": None}
+        )
+        await record_query(service.get_by_query, "star wars", ["title", "-title"], 1, 10, {})
+        await record_query(service.get_list, None, 1, 10, {}, cursor=Cursor([1, "f1"], "title"))
+        return await get_popular_queries(service, 10)
+
+    assert asyncio.run(scenario()) == [
+        (
+            "get_by_query",
+            {
+                "query": "star wars",
+                "sort": ["title"],
+                "page_number": 1,
+                "page_size": 10,
+                "filters": {},
+            },
+        )
+    ]
+
+
+def test_unknown_methods_are_not_replayed(redis, elastic):
+    service = FilmService(redis, elastic)
+
+    async def scenario():
+        query = orjson.dumps({"method": "get_facets", "arguments": {}})
+        await redis.zincrby(
+            warmup.get_popularity_key("movies", warmup._current_bucket(), "queries"), 1, query
+        )
+        return await get_popular_queries(service, 10)
+
+    assert asyncio.run(scenario()) == []
+
+
+def test_warmup_fills_top_films_and_popular_queries(redis, elastic):
+    films = FilmService(redis, elastic)
+    persons = PersonService(redis, elastic)
+
+    async def record():
+        await record_query(films.get_by_query, "film", ["-imdb_rating"], 1, 10, {})
+        await record_query(persons.get_list, ["full_name"], 2, 10, {})
+
+    asyncio.run(record())
+    progress = _warm(redis, elastic)
+    requests = elastic.requests
+
+    async def replay():
+        await films.get_list(["-imdb_rating"], 2, 10, {})
+        await films.get_by_query(" Film", ["-imdb_rating"], 1, 10, {"genres_id": None})
+        await persons.get_list(["full_name"], 2, 10, {})
+
+    asyncio.run(replay())
+    assert progress.batches_failed == 0 and not progress.skipped
+    assert progress.objects > 0
+    assert elastic.requests == requests
+
+
+def test_only_lock_holder_warms(redis, elastic):
+    async def hold_lock():
+        await redis.lock(WARMUP_LOCK_KEY).acquire()
+
+    asyncio.run(hold_lock())
+    progress = _warm(redis, elastic)
+
+    assert progress.skipped and progress.finished_at is not None
+    assert elastic.requests == 0
+
+
+def test_lock_is_released_after_warmup(redis, elastic):
+    _warm(redis, elastic)
+    assert not _warm(redis, elastic).skipped
+
+
+def test_invalidation_events_schedule_one_warmup(monkeypatch, redis):
+    monkeypatch.setattr(settings, "warmup_invalidation_delay_in_seconds", 0.02)
+    warmer = CacheWarmer()
+    started = list()
+    monkeypatch.setattr(warmer, "start", lambda: started.append(True))
+
+    async def scenario():
+        listener = asyncio.create_task(listen_invalidations(redis, warmer.schedule))
+        await asyncio.sleep(0)
+        for generation in range(3):
+            event = {"index": "movies", "generation": generation, "keys": []}
+            await redis.publish(settings.cache_invalidation_channel, orjson.dumps(event))
+            await asyncio.sleep(0.005)
+        scheduled_before_delay = len(started)
+        await asyncio.sleep(0.05)
+        listener.cancel()
+        return scheduled_before_delay, len(started)
+
+    assert asyncio.run(scenario()) == (0, 1)
@@ -0,0 +1,55 @@
+import json
+
+from loguru import logger
+from redis import Redis
+
+from decorators import backoff
+from settings import CACHE_INVALIDATION_CHANNEL
+
+
+def get_tag_key(index_name: str, obj_id: str) -> str:
+    """
+    Формат ключей совпадает с utils/caching.py в fastapi-solution.
+    """
+    return f"tag:{{{index_name}:{obj_id}}}"
+
+
+def get_generation_key(index_name: str) -> str:
+    return f"gen:{{{index_name}}}"
+
+
+class CacheInvalidationPublisher:
+    """
+    Инвалидирует кеш API один раз на пакет: удаляет записи, помеченные тегами
+    изменённых объектов, увеличивает поколение индекса и сообщает воркерам API
+    новое поколение и удалённые ключи, чтобы они сбросили свой кеш в памяти.
+    """
+
+    def __init__(self, redis_adapter: Redis):
+        self.redis_adapter = redis_adapter
+
+    @backoff()
+    def publish(self, index_name: str, ids: list[str]) -> None:
+        tag_keys = [get_tag_key(index_name, obj_id) for obj_id in ids]
+        pipe = self.redis_adapter.pipeline(transaction=False)
+        pipe.incr(get_generation_key(index_name))
+        for tag_key in tag_keys:
+            pipe.smembers(tag_key)
+        generation, *members = pipe.execute()
+
+        cache_keys = sorted({key for keys in members for key in keys})
+        if cache_keys or tag_keys:
+            self.redis_adapter.delete(*cache_keys, *tag_keys)
+
+        message = json.dumps(
+            {"index": index_name, "ids": ids, "generation": generation, "keys": cache_keys}
+        )
+        receivers = self.redis_adapter.publish(CACHE_INVALIDATION_CHANNEL, message)
+        logger.debug(
+            "Инвалидировано {} записей кеша для {} объектов {}, поколение {}, подписчиков {}",
+            len(cache_keys),
+            len(ids),
+            index_name,
+            generation,
+            receivers,
+        )
@@ -25,14 +25,49 @@ class ElasticsearchLoader:
         logger.debug("Индекс для movies создан")
 
     @backoff()
-    def load_data(self, index_name: str, index_params: dict, data: list[BaseModel]) -> None:
+    def prepare_index(self, index_name: str, index_params: dict) -> bool:
+        """
+        Создаёт индекс, а в существующий добавляет поля верхнего уровня, которых
+        в нём ещё нет: при "dynamic": "strict" документы с такими полями иначе
+        не загружаются. Новые анализаторы можно добавить только в закрытый индекс,
+        поэтому на время put_settings индекс закрывается.
+        :return: True, если индекс создан или изменён и документы нужно загрузить заново
+        """
+        if not self.client.indices.exists(index=index_name):
+            self._create_index(index_name, index_params)
+            return True
+
+        mapping = self.client.indices.get_mapping(index=index_name)[index_name]["mappings"]
+        missing_fields = {
+            field: params
+            for field, params in index_params["mappings"]["properties"].items()
+            if field not in mapping.get("properties", {})
+        }
+        if not missing_fields:
+            return False
+
+        analysis = index_params["settings"].get("analysis", {})
+        index_settings = self.client.indices.get_settings(index=index_name)[index_name]["settings"]
+        current_analyzers = index_settings["index"].get("analysis", {}).get("analyzer", {})
+        if not set(analysis.get("analyzer", {})) <= set(current_analyzers):
+            self.client.indices.close(index=index_name)
+            try:
+                self.client.indices.put_settings(index=index_name, body={"analysis": analysis})
+            finally:
+                self.client.indices.open(index=index_name, wait_for_active_shards="all")
+
+        self.client.indices.put_mapping(index=index_name, properties=missing_fields)
+        logger.info("В индекс {} добавлены поля {}", index_name, ", ".join(missing_fields))
+        return True
+
+    @backoff()
+    def load_data(self, index_name: str, data: list[BaseModel]) -> None:
         if not self.client:
             raise Exception(
                 "Клиент elasticsearch не инициализирован. Воспользуйтесь create_connection."
             )
 
-        if not self.client.indices.exists(index=index_name):
-            self._create_index(index_name, index_params)
-
         documents = [{"_index": index_name, "_id": row.id, "_source": row.dict()} for row in data]
-        bulk(self.client, documents)
+        # Инвалидация кеша API публикуется сразу после загрузки, поэтому документы
+        # должны быть видны поиску к этому моменту, иначе API закеширует старые списки.
+        bulk(self.client, documents, refresh="wait_for")
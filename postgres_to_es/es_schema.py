@@ -35,6 +35,12 @@ MOVIES_INDEX = {
                 "russian_stop",
                 "russian_stemmer"
               ]
+            },
+            "suggest": {
+              "tokenizer": "standard",
+              "filter": [
+                "lowercase"
+              ]
             }
           }
         }
@@ -70,6 +76,10 @@ MOVIES_INDEX = {
               }
             }
           },
+          "title_suggest": {
+            "type": "completion",
+            "analyzer": "suggest"
+          },
           "description": {
             "type": "text",
             "analyzer": "ru_en"
@@ -165,6 +175,12 @@ PERSONS_INDEX = {
                 "russian_stop",
                 "russian_stemmer"
               ]
+            },
+            "suggest": {
+              "tokenizer": "standard",
+              "filter": [
+                "lowercase"
+              ]
             }
           }
         }
@@ -184,6 +200,10 @@ PERSONS_INDEX = {
               }
             }
           },
+          "full_name_suggest": {
+            "type": "completion",
+            "analyzer": "suggest"
+          },
           "films": {
             "type": "nested",
             "dynamic": "strict",
@@ -4,12 +4,13 @@ from typing import Any
 
 from pydantic import BaseModel
 
+from cache_invalidation import CacheInvalidationPublisher
 from data_transform import DataTransform
 from elasticsearch_loader import ElasticsearchLoader
 from loguru import logger
 from postgres_extractor import PostgresExtractor, FILMWORKS_QUERY, PERSONS_QUERY, GENRES_QUERY
 from es_schema import MOVIES_INDEX, PERSONS_INDEX, GENRE_INDEX
-from settings import ETL_REPEAT_INTERVAL_TIME_SEC, REDIS_ADAPTER
+from settings import CACHE_REDIS_ADAPTER, ETL_REPEAT_INTERVAL_TIME_SEC, REDIS_ADAPTER
 from state import RedisStorage, State
 from models import ESFilmworkData, ESPersonData, ESGenreData
 
@@ -57,6 +58,7 @@ if __name__ == "__main__":
     extractor = PostgresExtractor()
     transformer = DataTransform()
     loader = ElasticsearchLoader()
+    invalidation_publisher = CacheInvalidationPublisher(CACHE_REDIS_ADAPTER)
 
     etl_for = ("filmwork", "person", "genre")
 
@@ -66,6 +68,13 @@ if __name__ == "__main__":
 
             with extractor.create_connection(), loader.create_connection():
                 last_modified_datetime = state.get_state("last_modified_datetime") or datetime.min
+                changed_indices = [
+                    loader.prepare_index(etl.elastic_index_name, etl.elastic_index_params)
+                    for etl in map(ETLHandler.get_etl, etl_for)
+                ]
+                if any(changed_indices):
+                    logger.info("Схема индексов изменилась, загружаем все записи заново")
+                    last_modified_datetime = datetime.min
 
                 for obj_type in etl_for:
                     etl = ETLHandler.get_etl(obj_type)
@@ -76,8 +85,9 @@ if __name__ == "__main__":
                         transformed_data = transformer.validate_and_transform(
                             etl.transform_model, data
                         )
-                        loader.load_data(
-                            etl.elastic_index_name, etl.elastic_index_params, transformed_data
+                        loader.load_data(etl.elastic_index_name, transformed_data)
+                        invalidation_publisher.publish(
+                            etl.elastic_index_name, [row.id for row in transformed_data]
                         )
                         count += len(transformed_data)
                         logger.info("Загружено всего {} записей для {}", count, obj_type)
@@ -1,6 +1,16 @@
 from typing import Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, validator
+
+
+def make_suggest_inputs(text: str) -> list[str]:
+    """
+    Варианты ввода для completion-подсказки: полный текст и его окончания,
+    начинающиеся с каждого следующего слова, чтобы подсказка находилась
+    по началу любого слова.
+    """
+    words = text.split()
+    return [" ".join(words[i:]) for i in range(len(words))]
 
 
 class ESFilmworkPersonData(BaseModel):
@@ -25,6 +35,11 @@ class ESFilmworkData(BaseModel):
     writers: list[ESFilmworkPersonData] = []
     directors: list[ESFilmworkPersonData] = []
     genres: list[ESFilmworkGenreData] = []
+    title_suggest: list[str] = []
+
+    @validator("title_suggest", always=True)
+    def fill_title_suggest(cls, value: list[str], values: dict) -> list[str]:
+        return value or make_suggest_inputs(values.get("title", ""))
 
 
 class ESPersonFilmworkData(BaseModel):
@@ -36,6 +51,11 @@ class ESPersonData(BaseModel):
     id: str
     full_name: str
     films: list[ESPersonFilmworkData] = []
+    full_name_suggest: list[str] = []
+
+    @validator("full_name_suggest", always=True)
+    def fill_full_name_suggest(cls, value: list[str], values: dict) -> list[str]:
+        return value or make_suggest_inputs(values.get("full_name", ""))
 
 
 class ESGenreData(BaseModel):
@@ -4,6 +4,7 @@ import sys
 from dotenv import load_dotenv
 from loguru import logger
 from redis import Redis
+from redis.cluster import RedisCluster
 
 load_dotenv()
 
@@ -18,6 +19,18 @@ REDIS_ADAPTER = Redis(
     decode_responses=True,
 )
 
+# Кеш API в режиме cluster распределён по слотам, поэтому удалять его записи
+# нужно через клиент кластера; состояние ETL остаётся на REDIS_ADAPTER.
+CACHE_REDIS_ADAPTER = (
+    RedisCluster(
+        host=os.environ.get("REDIS_HOST", "redis"),
+        port=int(os.environ.get("REDIS_PORT", "6379")),
+        decode_responses=True,
+    )
+    if os.environ.get("REDIS_MODE") == "cluster"
+    else REDIS_ADAPTER
+)
+
 ETL_BATCH_SIZE: int = int(os.environ.get("ETL_BATCH_SIZE", 100))
 
 POSTGRES_CONNECTION_SETTINGS = {
@@ -30,5 +43,6 @@ POSTGRES_CONNECTION_SETTINGS = {
 
 ELASTIC_SEARCH_URL = f'http://{os.environ.get("ELASTIC_HOST", "elasticsearch")}:{os.environ.get("ELASTIC_PORT", 9200)}'
 
+CACHE_INVALIDATION_CHANNEL = os.environ.get("CACHE_INVALIDATION_CHANNEL", "cache_invalidation")
 
 ETL_REPEAT_INTERVAL_TIME_SEC: int = int(os.environ.get("ETL_REPEAT_INTERVAL_TIME_SEC", 60))